@@ -0,0 +1,306 @@
+"""
+Tk gerektirmeyen toplu render: bir klasördeki (veya glob desenindeki) tüm fotoğrafları
+aynı ayarlarla 1080x1080 post olarak işler ve çıktı klasörüne yazar.
+
+Örnek:
+    python batch_render.py ~/Fotograflar/kampanya -o cikti --filter Sıcak --text "Yaz İndirimi"
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import profiling
+from constants import INSTAGRAM_SIZE, EXPORT_TARGETS, FILTERS, TEXT_POSITIONS, DEFAULT_SETTINGS
+from encoder import save_image
+from ingest import load_square
+from multi_export import export_targets
+from output_names import OutputNames
+from recipe import RecipeError, compile_plan, load_recipe, validate
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+POOL_BROKEN = "worker süreci beklenmedik şekilde sonlandı; süreç havuzu kullanılamıyor"
+
+# Her worker süreci ayarları bir kez alır ve plana derler (initializer), her dosyada tekrar taşınmaz
+_worker_plan = None
+_worker_settings = None
+_worker_targets = None
+_worker_target_kb = None
+
+
+def iter_inputs(source: str, recursive: bool = False):
+    """Klasör ya da glob deseninden görsel yollarını sırayla üretir (listeyi bellekte tutmaz)."""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*") if recursive else os.path.join(source, "*")
+    else:
+        pattern = source
+    for path in glob.iglob(pattern, recursive=recursive):
+        if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTS):
+            yield path
+
+
+def input_root(source: str) -> str:
+    """Çıktıda alt klasörlerin yeniden kurulacağı kök: klasörse kendisi, glob ise joker içermeyen baş kısmı."""
+    if os.path.isdir(source):
+        return source
+    root = os.path.dirname(source)
+    while root and any(c in root for c in "*?["):
+        root = os.path.dirname(root)
+    return root or "."
+
+
+def output_rel(path: str, root: str = None) -> str:
+    """Girdinin çıktıda korunacak göreli yolu: kök verilirse alt klasörüyle (in/sub/a.jpg -> sub/a.jpg)."""
+    if root is None:
+        return os.path.basename(path)
+    rel = os.path.relpath(path, root)
+    return os.path.basename(path) if rel.startswith(os.pardir) else rel
+
+
+def _init_worker(settings, trace=False, targets=None, target_kb=None):
+    # Ayarlar ana süreçte doğrulandı; burada yalnızca derlenir
+    global _worker_plan, _worker_settings, _worker_targets, _worker_target_kb
+    _worker_plan = compile_plan(settings, check=False)
+    _worker_settings = settings
+    _worker_targets = targets
+    _worker_target_kb = target_kb
+    if trace:
+        profiling.enable()
+
+
+def _render_one(path: str, out_path: str):
+    t0 = time.perf_counter()
+    err = None
+    try:
+        with profiling.span("file", "batch", path=os.path.basename(path)):
+            if _worker_targets:
+                # Çoklu format: kaynak bir kez çözülür, her hedef <ad>_<hedef><uzantı> olarak yazılır
+                out_dir, fname = os.path.split(out_path)
+                stem, ext = os.path.splitext(fname)
+                export_targets(path, out_dir, _worker_settings, targets=_worker_targets,
+                               stem=stem, ext=ext, workers=1, check=False, target_kb=_worker_target_kb)
+            else:
+                img = load_square(path, size=INSTAGRAM_SIZE)
+                out = _worker_plan.run(img)
+                os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+                with profiling.span("save", "batch"):
+                    save_image(out, out_path, target_kb=_worker_target_kb)
+    except Exception as e:
+        err = str(e)
+    # --trace açıksa bu dosyanın olayları sonuçla birlikte ana sürece taşınır
+    prof = profiling.active()
+    trace = prof.drain() if prof is not None else None
+    return path, time.perf_counter() - t0, err, trace
+
+
+def run_batch(paths, out_dir: str, settings: dict, workers: int = None,
+              max_inflight: int = None, ext: str = ".jpg", progress=None, profiler=None,
+              targets: dict = None, target_kb: float = None, root: str = None) -> dict:
+    """
+    Yolları bir ProcessPoolExecutor ile render eder. Aynı anda en fazla `max_inflight`
+    iş kuyrukta bulunur; böylece binlerce dosyalık klasörlerde bellek sabit kalır.
+    Çıktılar girdinin `root`a göre alt klasörüne yazılır (root yoksa doğrudan out_dir'e).
+    Aynı ada düşen girdiler (ör. a.jpg ile a.png) izleme moduyla aynı kuralla ayrı adlar alır
+    (output_names.OutputNames: ilk gelen a.jpg, diğeri a_png.jpg); hiçbir çıktı üzerine yazılmaz.
+    profiler verilirse worker'larda ölçüm açılır ve olaylar ona eklenir.
+    targets verilirse (ad -> boyut) her dosyadan tüm hedefler tek çözümle üretilir.
+    target_kb verilirse her çıktı bu boyutun altına sığacak kaliteyle kodlanır.
+    Bir worker süreci çökerse (ör. bellek yetmeyip öldürülürse) havuz kullanılamaz: kuyruktaki ve
+    henüz gönderilmemiş girdiler hatalı sayılır, toplu iş yine istatistik döndürür.
+    """
+    settings = validate(settings)   # bir kez; worker'lar yalnızca plana derler
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or workers * 2
+    os.makedirs(out_dir, exist_ok=True)
+
+    durations = []
+    failures = []
+    t_start = time.perf_counter()
+
+    def fail(path, err):
+        failures.append((path, err))
+        if progress is not None:
+            progress(path, 0.0, err)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings, profiler is not None, targets, target_kb)) as ex:
+        pending = {}        # future -> girdi yolu
+        broken = False      # bir worker çöktüyse havuz artık iş almaz
+
+        def drain(return_when):
+            nonlocal broken
+            done, _ = wait(set(pending), return_when=return_when)
+            for fut in done:
+                path = pending.pop(fut)
+                try:
+                    path, secs, err, trace = fut.result()
+                except BrokenProcessPool:
+                    broken = True
+                    fail(path, POOL_BROKEN)
+                    continue
+                if profiler is not None and trace is not None:
+                    profiler.merge(*trace)
+                if err is None:
+                    durations.append(secs)
+                else:
+                    failures.append((path, err))
+                if progress is not None:
+                    progress(path, secs, err)
+
+        names = OutputNames(ext)
+        for path in paths:
+            if broken:
+                fail(path, POOL_BROKEN)
+                continue
+            # Anahtar tam yol: kök yokken farklı klasörlerdeki a.jpg'ler de ayrı girdidir
+            out_path = os.path.join(out_dir, names.get(path, output_rel(path, root)))
+            try:
+                pending[ex.submit(_render_one, path, out_path)] = path
+            except BrokenProcessPool:
+                broken = True
+                fail(path, POOL_BROKEN)
+                continue
+            if len(pending) >= max_inflight:
+                drain(FIRST_COMPLETED)
+        if pending:
+            drain(ALL_COMPLETED)
+
+    wall = time.perf_counter() - t_start
+    return {
+        "ok": len(durations),
+        "failed": failures,
+        "wall_s": wall,
+        "files_per_s": (len(durations) / wall) if wall > 0 else 0.0,
+        "per_file_mean_s": statistics.fmean(durations) if durations else 0.0,
+        "per_file_median_s": statistics.median(durations) if durations else 0.0,
+        "per_file_max_s": max(durations) if durations else 0.0,
+    }
+
+
+def _parse_args(argv=None):
+    d = DEFAULT_SETTINGS
+    p = argparse.ArgumentParser(description="Klasördeki fotoğrafları Tk olmadan 1080x1080 posta dönüştürür.")
+    p.add_argument("source", help="Girdi klasörü veya glob deseni (örn. 'foto/*.jpg')")
+    p.add_argument("-o", "--out", required=True, help="Çıktı klasörü")
+    p.add_argument("-r", "--recursive", action="store_true", help="Alt klasörleri de tara")
+    p.add_argument("--format", choices=["jpg", "webp", "png"], default="jpg")
+    p.add_argument("--target-kb", type=float, default=None, metavar="KB",
+                   help="Her dosyayı bu boyutun altına sığdıracak en yüksek kaliteyi ara (jpg/webp)")
+    p.add_argument("--targets", default=None, metavar="AD,AD",
+                   help=f"Her fotoğraftan bu formatları üret ({', '.join(EXPORT_TARGETS)}); 'all' hepsi")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    p.add_argument("--max-inflight", type=int, default=None, help="Aynı anda kuyrukta bekleyen en fazla iş")
+    p.add_argument("--trace", default=None, metavar="DOSYA",
+                   help="Aşama sürelerini Chrome trace JSON olarak kaydet (chrome://tracing, ui.perfetto.dev)")
+
+    p.add_argument("--recipe", default=None, metavar="DOSYA",
+                   help="Ayarları bu tarif (JSON) dosyasından al; verilirse aşağıdaki efekt seçenekleri yok sayılır")
+
+    p.add_argument("--filter", choices=FILTERS, default=d["filter"])
+    p.add_argument("--brightness", type=float, default=d["brightness"])
+    p.add_argument("--contrast", type=float, default=d["contrast"])
+    p.add_argument("--saturation", type=float, default=d["saturation"])
+    p.add_argument("--sharpness", type=float, default=d["sharpness"])
+    p.add_argument("--no-glow", action="store_true")
+    p.add_argument("--glow-strength", type=float, default=d["glow_strength"])
+    p.add_argument("--glow-radius", type=float, default=d["glow_radius"])
+    p.add_argument("--no-grain", action="store_true")
+    p.add_argument("--grain-amount", type=float, default=d["grain_amount"])
+    p.add_argument("--grain-seed", type=int, default=d["grain_seed"])
+    p.add_argument("--no-text", action="store_true")
+    p.add_argument("--text", default=d["text"])
+    p.add_argument("--text-pos", choices=TEXT_POSITIONS, default=d["text_pos"])
+    p.add_argument("--text-size", type=int, default=d["text_size"])
+    p.add_argument("--text-color", default=d["text_color"])
+    p.add_argument("--no-underline", action="store_true")
+    p.add_argument("--underline-color", default=d["underline_color"])
+    p.add_argument("--underline-thickness", type=int, default=d["underline_thickness"])
+    p.add_argument("--underline-seed", type=int, default=d["underline_seed"])
+    return p.parse_args(argv)
+
+
+def settings_from_args(args) -> dict:
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(
+        filter=args.filter,
+        brightness=args.brightness,
+        contrast=args.contrast,
+        saturation=args.saturation,
+        sharpness=args.sharpness,
+        glow_on=not args.no_glow,
+        glow_strength=args.glow_strength,
+        glow_radius=args.glow_radius,
+        grain_on=not args.no_grain,
+        grain_amount=args.grain_amount,
+        grain_seed=args.grain_seed,
+        text_on=not args.no_text,
+        text=args.text,
+        text_pos=args.text_pos,
+        text_size=args.text_size,
+        text_color=args.text_color,
+        underline_on=not args.no_underline,
+        underline_color=args.underline_color,
+        underline_thickness=args.underline_thickness,
+        underline_seed=args.underline_seed,
+    )
+    return settings
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    try:
+        settings = load_recipe(args.recipe) if args.recipe else settings_from_args(args)
+        print(f"Plan: {compile_plan(settings)!r}")
+    except RecipeError as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 2
+    profiler = profiling.Profiler() if args.trace else None
+    targets = None
+    if args.targets:
+        names = list(EXPORT_TARGETS) if args.targets == "all" else [n.strip() for n in args.targets.split(",")]
+        unknown = [n for n in names if n not in EXPORT_TARGETS]
+        if unknown:
+            print(f"Hata: bilinmeyen format: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        targets = {n: EXPORT_TARGETS[n] for n in names}
+
+    def progress(path, secs, err):
+        if err is None:
+            print(f"✓ {os.path.basename(path)}  {secs * 1000:.0f} ms")
+        else:
+            print(f"✗ {os.path.basename(path)}  {err}", file=sys.stderr)
+
+    stats = run_batch(
+        iter_inputs(args.source, recursive=args.recursive),
+        out_dir=args.out,
+        settings=settings,
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        ext="." + args.format,
+        progress=progress,
+        profiler=profiler,
+        targets=targets,
+        target_kb=args.target_kb,
+        root=input_root(args.source),
+    )
+
+    print(
+        f"\nToplam: {stats['ok']} başarılı, {len(stats['failed'])} hatalı  |  "
+        f"{stats['wall_s']:.1f} sn  |  {stats['files_per_s']:.2f} dosya/sn  |  "
+        f"dosya başına ort. {stats['per_file_mean_s'] * 1000:.0f} ms, "
+        f"medyan {stats['per_file_median_s'] * 1000:.0f} ms, "
+        f"en yavaş {stats['per_file_max_s'] * 1000:.0f} ms"
+    )
+    if profiler is not None:
+        profiler.export_chrome_trace(args.trace)
+        ms = profiler.rolling_ms()
+        print("Aşama ort. (ms): " + ", ".join(f"{k} {v:.1f}" for k, v in sorted(ms.items())))
+        print(f"Trace: {args.trace}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,556 @@
+"""
+image_pipeline aşamaları için benchmark: seed'li sentetik görsellerle her aşamayı ölçer,
+sonuçları JSON'a yazar ve kayıtlı bir baseline'a göre yavaşlayan aşama varsa hata döner.
+
+Her durum ayrı bir alt süreçte çalışır; böylece tepe bellek o duruma aittir ve
+önbellekler (grain bankası, font ölçümleri) durumlar arasında taşınmaz.
+
+Örnek:
+    python benchmark.py -o sonuc.json
+    python benchmark.py --only "glow/*" --sizes 1,12
+    python benchmark.py --baseline bench_baseline.json --threshold 0.15
+    python benchmark.py --baseline bench_baseline.json --update-baseline
+    python benchmark.py --backend numpy --only "pipeline/*"
+    python benchmark.py --parity
+    python benchmark.py --startup
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+from PIL import Image, ImageChops
+
+try:
+    import resource
+except ImportError:     # Windows: tepe bellek ölçülmez
+    resource = None
+
+from constants import INSTAGRAM_SIZE, FILTERS, DEFAULT_SETTINGS
+
+# Girdi boyutları (4:3 kamera oranı)
+INPUT_SIZES = {
+    1: (1152, 864),
+    12: (4000, 3000),
+    50: (8160, 6120),
+}
+GLOW_RADII = [0, 2, 6, 12, 20]
+GRAIN_AMOUNTS = [0.0, 0.1, 0.2, 0.3]
+# Tk penceresi açan durumlar; ekran yoksa çalıştırılmadan "skipped" yazılır ve baseline karşılaştırmasına girmez.
+# Diğer durumların hatası ya da zaman aşımı "error" olarak kaydedilir ve baseline'ı varsa başarısızlık sayılır.
+DISPLAY_CASES = ("underline/turtle",)
+
+# --parity: Pillow ve NumPy arka uçlarının karşılaştırıldığı ayarlar (DEFAULT_SETTINGS üzerine)
+PARITY_CASES = {
+    "default": {},
+    "adjustments": {"brightness": 1.2, "contrast": 1.3, "saturation": 0.7, "sharpness": 1.5},
+    "sepya+sat": {"filter": "Sepya", "saturation": 1.4, "contrast": 0.8},
+    "invert+glow": {"filter": "Invert", "glow_strength": 1.0, "glow_radius": 20.0},
+    "grain_max": {"grain_amount": 1.0, "glow_on": False},
+    "cool+sharp": {"filter": "Soğuk", "sharpness": 2.0, "brightness": 0.8},
+}
+
+
+# --startup: temiz bir yorumlayıcıda içe aktarma ve ilk önizleme süreleri (ms) için bütçe.
+# Süre, yorumlayıcının kendi açılışı hariç, ilk import'tan sonuca kadar ölçülür; gürültü yalnızca
+# süreyi uzattığı için bütçe tekrarların en kısasıyla karşılaştırılır.
+STARTUP_BUDGET_MS = {
+    "import/image_pipeline": 120,
+    "import/recipe": 130,
+    "import/batch_render": 200,
+    "import/render_server": 220,
+    "import/ui_app": 250,
+    "preview/headless": 600,
+    "preview/ui": 700,
+}
+# Bu modüller ilk kullanımda yüklenmeli; açılışta sys.modules'te görünürlerse durum başarısız sayılır
+GUI_MODULES = ("tkinter", "turtle", "PIL.ImageTk")
+LAZY_MODULES = ("turtle", "PIL.ImageTk", "font_registry", "numpy", "multiprocessing", "gallery_panel")
+
+_STARTUP_CHILD = """
+import sys, time
+t0 = time.perf_counter()
+{body}
+ms = (time.perf_counter() - t0) * 1000
+import json
+print(json.dumps({{"ms": ms, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+# İlk önizleme: ui_app._render_proxy ile aynı yol (kare -> proxy -> plan); pencere açılmaz
+_FIRST_PREVIEW = """
+from PIL import Image
+from constants import INSTAGRAM_SIZE, PREVIEW_MAX, DEFAULT_SETTINGS
+from ingest import load_square
+from recipe import compile_plan
+base = load_square({path!r}, INSTAGRAM_SIZE)
+proxy = base.resize((PREVIEW_MAX, PREVIEW_MAX), Image.LANCZOS)
+compile_plan(DEFAULT_SETTINGS, scale=PREVIEW_MAX / INSTAGRAM_SIZE[0], check=False).run(proxy, ("proxy", 0))
+"""
+
+
+def synthetic_image(size: tuple[int, int], seed: int = 0) -> Image.Image:
+    """
+    Seed'e göre her seferinde aynı olan, yumuşak renk geçişleri + ince doku içeren RGB görsel.
+    Şeritler halinde üretilir; 50 MP'de bile tepe bellek görselin kendisine yakın kalır.
+    """
+    rng = random.Random(f"bench:{seed}")
+    w, h = size
+    sw, sh = 48, 36
+    small = Image.merge("RGB", [Image.frombytes("L", (sw, sh), rng.randbytes(sw * sh)) for _ in range(3)])
+
+    tile = Image.frombytes("L", (256, 256), rng.randbytes(256 * 256))
+    row = Image.new("L", (w, 256))
+    for x in range(0, w, 256):
+        row.paste(tile, (x, 0))
+    row = row.convert("RGB")
+
+    out = Image.new("RGB", (w, h))
+    for y0 in range(0, h, 256):
+        y1 = min(h, y0 + 256)
+        strip = small.resize((w, y1 - y0), Image.BICUBIC, box=(0, y0 * sh / h, sw, y1 * sh / h))
+        out.paste(Image.blend(strip, row.crop((0, 0, w, y1 - y0)), 0.2), (0, y0))
+    return out
+
+
+def input_jpeg(mp: int) -> str:
+    """ingest durumları için sentetik JPEG; bir kez yazılır, sonraki çalıştırmalarda yeniden kullanılır."""
+    folder = os.path.join(tempfile.gettempdir(), "instagram_post_maker_bench")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{mp}MP.jpg")
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        synthetic_image(INPUT_SIZES[mp]).save(tmp, format="JPEG", quality=92)
+        os.replace(tmp, path)
+    return path
+
+
+def _text_args(underline: bool):
+    from image_pipeline import hex_to_rgb
+    from underline import underline_provider
+    d = DEFAULT_SETTINGS
+    provider = underline_provider(hex_to_rgb(d["underline_color"]), d["underline_thickness"], d["underline_seed"])
+    return (True, d["text"], d["text_pos"], d["text_size"], hex_to_rgb(d["text_color"]), underline, provider)
+
+
+def _underline_bbox():
+    import image_pipeline
+    d = DEFAULT_SETTINGS
+    font = image_pipeline.get_font(d["text_size"])
+    return tuple(image_pipeline.text_xy(None, d["text"], font, d["text_pos"], INSTAGRAM_SIZE))
+
+
+def build_cases(sizes=(1, 12, 50)) -> dict:
+    """
+    ad -> (setup, fn). setup() ölçüm dışında girdiyi hazırlar, fn(girdi) ölçülen işi yapar.
+    Alt süreçte çağrılır; image_pipeline burada içe aktarılır.
+    """
+    import image_pipeline as ip
+    from ingest import load_square
+    from stage_cache import run_stages
+
+    # Efekt durumları seçili arka ucun fonksiyonlarını ölçer (imzalar aynı)
+    fx = ip
+    if ip.get_backend() == "numpy":
+        import numpy_backend as fx
+
+    def square_input():
+        return synthetic_image(INSTAGRAM_SIZE)
+
+    cases = {}
+    for mp in sizes:
+        size = INPUT_SIZES[mp]
+        cases[f"square/{mp}MP"] = (
+            lambda size=size: synthetic_image(size),
+            lambda img: ip.make_instagram_square(img, INSTAGRAM_SIZE),
+        )
+        cases[f"ingest/{mp}MP"] = (
+            lambda mp=mp: input_jpeg(mp),
+            lambda path: load_square(path, INSTAGRAM_SIZE),
+        )
+
+    for name in FILTERS:
+        cases[f"filter/{name}"] = (square_input, lambda img, name=name: fx.apply_filter(img, name))
+    cases["adjustments/identity"] = (square_input, lambda img: fx.apply_adjustments(img, 1.0, 1.0, 1.0, 1.0))
+    cases["adjustments/all"] = (square_input, lambda img: fx.apply_adjustments(img, 1.2, 1.1, 1.3, 1.5))
+    for r in GLOW_RADII:
+        cases[f"glow/r={r}"] = (square_input, lambda img, r=r: fx.apply_glow(img, True, 0.35, r))
+    for a in GRAIN_AMOUNTS:
+        cases[f"grain/a={a}"] = (square_input, lambda img, a=a: fx.apply_film_grain(img, True, a))
+    cases["text/plain"] = (square_input, lambda img: ip.apply_text_effect(img, *_text_args(False)))
+    cases["text/underline"] = (square_input, lambda img: ip.apply_text_effect(img, *_text_args(True)))
+
+    def vector_underline(bbox):
+        from underline import vector_underline_overlay
+        # lru_cache atlanır: çizimin kendisi ölçülür
+        return vector_underline_overlay.__wrapped__(bbox, (255, 255, 255), DEFAULT_SETTINGS["underline_thickness"], 7)
+    cases["underline/vector"] = (_underline_bbox, vector_underline)
+
+    def turtle_underline(bbox):
+        from turtle_underline import turtle_underline_overlay
+        return turtle_underline_overlay(INSTAGRAM_SIZE, bbox, (255, 255, 255), DEFAULT_SETTINGS["underline_thickness"], 7)
+    cases["underline/turtle"] = (_underline_bbox, turtle_underline)
+
+    cases["pipeline/default"] = (
+        square_input,
+        lambda img: run_stages(img, None, ip.build_stages(DEFAULT_SETTINGS)),
+    )
+    return cases
+
+
+def _proc_status(field: str):
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Linux'ta tepe RSS'i (VmHWM) şu anki değere indirir; setup'ın belleği ölçüme karışmaz."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss():
+    """
+    Tepe bellek (bayt). Linux'ta VmHWM (exec'te sıfırlanır), diğerlerinde ru_maxrss;
+    ru_maxrss Linux'ta exec'ten önceki üst sürecin tepesini de taşıdığı için tercih edilmez.
+    """
+    peak = _proc_status("VmHWM")
+    if peak is not None or resource is None:
+        return peak
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_case(name: str, sizes, repeat: int) -> dict:
+    """Tek bir durumu bu süreçte ölçer. İlk çalıştırma (soğuk önbellek) ayrıca raporlanır."""
+    setup, fn = build_cases(sizes)[name]
+    arg = setup()
+    base_rss = _proc_status("VmRSS") if _reset_peak_rss() else _peak_rss()
+    walls, cpus = [], []
+    for _ in range(max(1, repeat)):
+        w0, c0 = time.perf_counter(), time.process_time()
+        fn(arg)
+        walls.append((time.perf_counter() - w0) * 1000)
+        cpus.append((time.process_time() - c0) * 1000)
+    peak = _peak_rss()
+    warm_walls = walls[1:] or walls
+    warm_cpus = cpus[1:] or cpus
+    return {
+        "cold_ms": round(walls[0], 3),
+        "wall_ms": round(statistics.median(warm_walls), 3),
+        "cpu_ms": round(statistics.median(warm_cpus), 3),
+        "peak_mb": None if peak is None else round(peak / 2**20, 1),
+        "peak_delta_mb": None if peak is None or base_rss is None else round((peak - base_rss) / 2**20, 1),
+        "repeat": len(walls),
+    }
+
+
+def _has_display() -> bool:
+    """Tk penceresi açılabilir mi? X11'de $DISPLAY yoksa turtle TclError ile düşer."""
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY"))
+
+
+def _run_in_subprocess(name: str, sizes, repeat: int, timeout: float) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-case", name,
+           "--sizes", ",".join(str(s) for s in sizes), "--repeat", str(repeat)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    except subprocess.TimeoutExpired:
+        return {"error": f"zaman aşımı ({timeout:.0f} sn)"}
+    if proc.returncode != 0:
+        lines = (proc.stderr or proc.stdout).strip().splitlines()
+        return {"error": lines[-1] if lines else f"çıkış kodu {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float = 1.0) -> list:
+    """
+    wall_ms'i baseline'dan `threshold` oranından (ve en az `min_ms`) fazla artan durumlar:
+    [(ad, baseline_ms, yeni_ms), ...]. Baseline'da olmayan ya da bilerek atlanan ("skipped") durumlar
+    karşılaştırılmaz; baseline'da ölçümü olup bu kez hata veren durumlar için yeni_ms None'dır.
+    """
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base or "wall_ms" not in base or "skipped" in res:
+            continue
+        if "wall_ms" not in res:
+            # Çöken ya da zaman aşımına uğrayan durum sessizce geçerse yavaşlama hiç görülmez
+            regressions.append((name, base["wall_ms"], None))
+            continue
+        old, new = base["wall_ms"], res["wall_ms"]
+        if new > old * (1.0 + threshold) and new - old >= min_ms:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def parity(seed: int = 0) -> dict:
+    """
+    PARITY_CASES'i iki arka uçla da render eder: {ad: (en büyük fark, ortalama fark)}.
+    Farklar 0-255 kanal seviyesidir; numpy_backend.PARITY_TOLERANCE ile karşılaştırılır.
+    """
+    import image_pipeline as ip
+    from recipe import compile_plan
+
+    img = synthetic_image(INSTAGRAM_SIZE, seed)
+    previous = ip.get_backend()
+    out = {}
+    try:
+        for name, overrides in PARITY_CASES.items():
+            settings = dict(DEFAULT_SETTINGS, text_on=False, **overrides)
+            rendered = []
+            for backend in ("pillow", "numpy"):
+                ip.set_backend(backend)
+                rendered.append(compile_plan(settings).run(img))
+            # Kanal başına |a - b|: difference + histogram, NumPy'a gerek kalmadan
+            hist = ImageChops.difference(*rendered).histogram()
+            counts = [sum(hist[v::256][:3]) for v in range(256)]
+            total = sum(counts)
+            worst = max(v for v, n in enumerate(counts) if n) if total else 0
+            out[name] = (worst, sum(v * n for v, n in enumerate(counts)) / max(1, total))
+    finally:
+        ip.set_backend(previous)
+    return out
+
+
+def _run_parity() -> int:
+    import image_pipeline as ip
+    if "numpy" not in ip.available_backends():
+        print("NumPy kurulu değil; karşılaştırılacak ikinci arka uç yok.", file=sys.stderr)
+        return 1
+    from numpy_backend import PARITY_TOLERANCE
+
+    failed = False
+    print(f"{'durum':<16}{'en büyük':>10}{'ortalama':>10}")
+    for name, (worst, mean) in parity().items():
+        mark = "" if worst <= PARITY_TOLERANCE else "  !"
+        failed = failed or bool(mark)
+        print(f"{name:<16}{worst:>10}{mean:>10.3f}{mark}")
+    print(f"\nTolerans: kanal başına en fazla {PARITY_TOLERANCE} seviye")
+    return 1 if failed else 0
+
+
+def startup_cases(path: str) -> dict:
+    """
+    ad -> (alt süreçte çalışacak kod, açılışta yüklenmemesi gereken modüller).
+    Çekirdek modüller GUI'ye hiç dokunmamalı; ui_app tkinter'ı yükler ama ağır modülleri ertelemeli.
+    """
+    lazy = [m for m in LAZY_MODULES if not (m == "numpy" and os.environ.get("IPM_BACKEND") == "numpy")]
+    headless = sorted(set(GUI_MODULES) | set(lazy))
+    # Sunucu ve toplu render süreç havuzu kullanır; multiprocessing onlarda beklenir
+    pooled = [m for m in headless if m != "multiprocessing"]
+    preview = _FIRST_PREVIEW.format(path=path)
+    return {
+        "import/image_pipeline": ("import image_pipeline", headless),
+        "import/recipe": ("import recipe", headless),
+        "import/batch_render": ("import batch_render", pooled),
+        "import/render_server": ("import render_server", pooled),
+        "import/ui_app": ("import ui_app", lazy),
+        "preview/headless": (preview, [m for m in headless if m != "font_registry"]),
+        "preview/ui": ("import ui_app\n" + preview, [m for m in lazy if m != "font_registry"]),
+    }
+
+
+def _run_startup(repeat: int, timeout: float, out: str = None) -> int:
+    """
+    Her durumu `repeat` kez ayrı bir yorumlayıcıda çalıştırır, en kısa süreyi STARTUP_BUDGET_MS ile
+    karşılaştırır. Bütçe aşılırsa ya da ertelenmesi gereken bir modül açılışta yüklenirse 1 döner.
+    Hangi import'un pahalı olduğunu görmek için: python -X importtime -c "import recipe"
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    cases = startup_cases(input_jpeg(12))
+    results = {}
+    failed = False
+    print(f"{'durum':<24}{'ms':>10}{'en az':>10}{'bütçe':>10}")
+    for name, (body, forbidden) in cases.items():
+        code = _STARTUP_CHILD.format(body=body, forbidden=list(forbidden))
+        runs, loaded = [], set()
+        try:
+            for _ in range(max(1, repeat)):
+                proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                      timeout=timeout, cwd=cwd)
+                if proc.returncode != 0:
+                    lines = (proc.stderr or proc.stdout).strip().splitlines()
+                    raise RuntimeError(lines[-1] if lines else f"çıkış kodu {proc.returncode}")
+                res = json.loads(proc.stdout.strip().splitlines()[-1])
+                runs.append(res["ms"])
+                loaded.update(res["loaded"])
+        except (subprocess.TimeoutExpired, RuntimeError) as e:
+            results[name] = {"error": str(e)}
+            print(f"{name:<24}  hata: {e}")
+            failed = True
+            continue
+        budget = STARTUP_BUDGET_MS.get(name)
+        ms = statistics.median(runs)
+        results[name] = {"ms": round(ms, 1), "min_ms": round(min(runs), 1), "budget_ms": budget,
+                         "loaded": sorted(loaded)}
+        mark = "  !" if budget is not None and min(runs) > budget else ""
+        print(f"{name:<24}{ms:>10.1f}{min(runs):>10.1f}{budget or '-':>10}{mark}")
+        if loaded:
+            print(f"{'':<24}  açılışta yüklendi: {', '.join(sorted(loaded))}")
+        failed = failed or bool(mark) or bool(loaded)
+
+    if out:
+        report = {"meta": {"python": platform.python_version(), "pillow": PIL.__version__,
+                           "platform": platform.platform(), "repeat": repeat,
+                           "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                  "startup": results}
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+
+def _load_baseline(path: str) -> dict:
+    # Okunamayan baseline sessizce boş sayılırsa karşılaştırma hiç yapılmadan 0 dönülür (CI'da fark edilmez)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("results"), dict):
+        raise ValueError("'results' bölümü yok")
+    return data["results"]
+
+
+def _parse_args(argv=None):
+    p = argparse.ArgumentParser(description="image_pipeline aşamalarını ölçer ve baseline ile karşılaştırır.")
+    p.add_argument("--sizes", default="1,12,50",
+                   help=f"Girdi boyutları (MP, virgülle). Seçenekler: {','.join(map(str, INPUT_SIZES))}")
+    p.add_argument("--only", action="append", default=None, metavar="DESEN",
+                   help="Yalnızca bu glob desenine uyan durumlar (örn. 'glow/*'); tekrarlanabilir")
+    p.add_argument("--repeat", type=int, default=5, help="Durum başına tekrar (ilki soğuk çalıştırma)")
+    p.add_argument("--timeout", type=float, default=600.0, help="Durum başına süre sınırı (sn)")
+    p.add_argument("-o", "--out", default=None, help="Sonuç JSON dosyası")
+    p.add_argument("--baseline", default=None, help="Karşılaştırılacak baseline JSON dosyası")
+    p.add_argument("--threshold", type=float, default=0.15, help="İzin verilen yavaşlama oranı (0.15 = %%15)")
+    p.add_argument("--min-ms", type=float, default=1.0, help="Bundan küçük farklar gürültü sayılır")
+    p.add_argument("--update-baseline", action="store_true", help="Sonuçları --baseline dosyasına yaz")
+    p.add_argument("--list", action="store_true", help="Durumları listele ve çık")
+    p.add_argument("--backend", choices=["pillow", "numpy"], default=None,
+                   help="Efekt arka ucu (varsayılan: IPM_BACKEND ya da pillow)")
+    p.add_argument("--parity", action="store_true",
+                   help="Pillow ve NumPy arka uçlarının çıktılarını karşılaştır ve çık")
+    p.add_argument("--startup", action="store_true",
+                   help="İçe aktarma ve ilk önizleme sürelerini bütçeyle karşılaştır ve çık")
+    p.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+    try:
+        args.sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        p.error("--sizes tamsayı listesi olmalı, örn. 1,12,50")
+    unknown = [s for s in args.sizes if s not in INPUT_SIZES]
+    if unknown:
+        p.error(f"Bilinmeyen boyut: {unknown}")
+    if args.update_baseline and not args.baseline:
+        p.error("--update-baseline için --baseline gerekli")
+    if args.baseline and not args.update_baseline and not os.path.exists(args.baseline):
+        p.error(f"baseline dosyası yok: {args.baseline} (ilk kez oluşturmak için --update-baseline)")
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.backend:
+        # Alt süreçler ortamı devralır; image_pipeline içe aktarılırken arka ucu buradan seçer
+        os.environ["IPM_BACKEND"] = args.backend
+    if args.parity:
+        return _run_parity()
+    if args.startup:
+        return _run_startup(args.repeat, args.timeout, args.out)
+
+    if args.run_case is not None:
+        print(json.dumps(run_case(args.run_case, args.sizes, args.repeat)))
+        return 0
+
+    names = list(build_cases(args.sizes))
+    if args.only:
+        names = [n for n in names if any(fnmatch.fnmatch(n, pat) for pat in args.only)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    baseline = {}
+    if args.baseline and not args.update_baseline:
+        try:
+            baseline = _load_baseline(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"Hata: baseline okunamadı: {args.baseline}: {e}", file=sys.stderr)
+            return 2
+
+    # JPEG girdileri ana süreçte hazırlanır; alt süreçlerin tepe belleğine yazma maliyeti girmez
+    for mp in args.sizes:
+        if f"ingest/{mp}MP" in names:
+            input_jpeg(mp)
+
+    results = {}
+    print(f"{'durum':<24}{'soğuk ms':>10}{'ms':>10}{'cpu ms':>10}{'tepe MB':>10}{'Δ MB':>8}{'baseline':>10}")
+    for name in names:
+        if name in DISPLAY_CASES and not _has_display():
+            res = {"skipped": "ekran yok ($DISPLAY)"}
+        else:
+            res = _run_in_subprocess(name, args.sizes, args.repeat, args.timeout)
+        results[name] = res
+        if "skipped" in res:
+            print(f"{name:<24}  atlandı: {res['skipped']}")
+            continue
+        if "error" in res:
+            print(f"{name:<24}  hata: {res['error']}")
+            continue
+        vs = ""
+        base = baseline.get(name)
+        if base and base.get("wall_ms"):
+            vs = f"{(res['wall_ms'] / base['wall_ms'] - 1) * 100:+.0f}%"
+        peak = "-" if res["peak_mb"] is None else f"{res['peak_mb']:.0f}"
+        delta = "-" if res["peak_delta_mb"] is None else f"{res['peak_delta_mb']:.0f}"
+        print(f"{name:<24}{res['cold_ms']:>10.1f}{res['wall_ms']:>10.1f}{res['cpu_ms']:>10.1f}{peak:>10}{delta:>8}{vs:>10}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "backend": os.environ.get("IPM_BACKEND") or "pillow",
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline güncellendi: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.min_ms)
+    if regressions:
+        print(f"\nYavaşlayan ya da ölçülemeyen aşamalar (eşik %{args.threshold * 100:.0f}):", file=sys.stderr)
+        for name, old, new in regressions:
+            if new is None:
+                print(f"  {name}: {old:.1f} ms -> ölçülemedi ({results[name]['error']})", file=sys.stderr)
+            else:
+                print(f"  {name}: {old:.1f} ms -> {new:.1f} ms ({(new / old - 1) * 100:+.0f}%)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
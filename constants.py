@@ -1,8 +1,48 @@
 INSTAGRAM_SIZE = (1080, 1080)   # 1:1 post(instagram post boyutu)
+# Tek seferde üretilebilen çıktı formatları (ad -> boyut)
+EXPORT_TARGETS = {
+    "feed": (1080, 1080),
+    "portrait": (1080, 1350),   # 4:5
+    "story": (1080, 1920),      # 9:16
+    "thumb": (320, 320),
+}
 PREVIEW_MAX = 600               # önizleme alanı (px)
+PREVIEW_IDLE_MS = 250           # slider bırakıldıktan bu kadar sonra tam çözünürlük render
+HISTORY_MAX_MB = 48             # geri al geçmişinde saklanan render edilmiş karelerin bellek sınırı
+HISTORY_COALESCE_MS = 800       # aynı ayara bu süreden sık gelen değişiklikler tek geri al adımı
+GALLERY_THUMB = 144             # galeri küçük görsel kenarı (px)
+STRIP_TILE = 88                 # filtre karşılaştırma şeridindeki karo kenarı (px)
+STRIP_DELAY_MS = 120            # şerit, ana önizlemeye öncelik vermek için bu kadar gecikmeli güncellenir
+SQUARE_CACHE_MB = 1024          # kırpılmış kare + küçük görsel disk önbelleği sınırı
+# Profil açıkken durum çubuğunda gösterilen aşamalar (profiling kancalarının adları)
+PROFILE_STAGES = ("color", "sharpness", "glow", "grain", "effects", "text", "underline", "preview")
 
 FILTERS = ["Normal", "Siyah-Beyaz", "Sepya", "Sıcak", "Soğuk", "Invert"] #filtre seçenekleri
 TEXT_POSITIONS = ["Üst-Orta", "Orta", "Alt-Orta"] #metin pozisyon seçenekleri
 
 # Turtle underline overlay'de arka planı transparanlaştırmak için
-CHROMA_GREEN = (0, 255, 0)
\ No newline at end of file
+CHROMA_GREEN = (0, 255, 0)
+
+# Arayüzdeki varsayılan değerlerle aynı render ayarları (headless kullanım için)
+DEFAULT_SETTINGS = {
+    "filter": "Normal",
+    "brightness": 1.0,
+    "contrast": 1.0,
+    "saturation": 1.0,
+    "sharpness": 1.0,
+    "glow_on": True,
+    "glow_strength": 0.35,
+    "glow_radius": 6.0,
+    "grain_on": True,
+    "grain_amount": 0.08,
+    "grain_seed": 0,
+    "text_on": True,
+    "text": "Merhaba 🌿",
+    "text_pos": "Alt-Orta",
+    "text_size": 72,
+    "text_color": "#FFFFFF",
+    "underline_on": True,
+    "underline_color": "#FFFFFF",
+    "underline_thickness": 10,
+    "underline_seed": 7,
+}
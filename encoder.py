@@ -0,0 +1,226 @@
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import as_completed
+
+from PIL import Image
+
+from profiling import profiled
+
+FORMATS = {
+    ".jpg": "JPEG",
+    ".jpeg": "JPEG",
+    ".webp": "WEBP",
+    ".png": "PNG",
+}
+DEFAULT_QUALITY = 95
+QUALITY_RANGE = (20, 95)    # hedef boyut aramasında denenecek kalite aralığı
+
+# İlk atomik yazışta bir kez okunur (bkz. _file_mode)
+_umask = None
+_umask_lock = threading.Lock()
+
+# Hedef boyut aramasında paralel denenen JPEG varyantları (subsampling 0 = 4:4:4, 2 = 4:2:0)
+JPEG_VARIANTS = [
+    {"progressive": False, "subsampling": 0},
+    {"progressive": True, "subsampling": 0},
+    {"progressive": False, "subsampling": 2},
+    {"progressive": True, "subsampling": 2},
+]
+
+
+def format_for_path(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Desteklenmeyen uzantı: {ext or '(yok)'} (jpg, webp, png)")
+    return FORMATS[ext]
+
+
+def encode(img: Image.Image, fmt: str = "JPEG", quality: int = DEFAULT_QUALITY, **params) -> bytes:
+    """Görseli bellekte kodlar (geçici dosya yok). PNG kayıpsızdır, quality yok sayılır."""
+    if fmt == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        img.save(buf, "JPEG", quality=int(quality), optimize=True, **params)
+    elif fmt == "WEBP":
+        img.save(buf, "WEBP", quality=int(quality), method=params.get("method", 4))
+    elif fmt == "PNG":
+        img.save(buf, "PNG", optimize=True)
+    else:
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+    return buf.getvalue()
+
+
+def _search(img: Image.Image, fmt: str, params: dict, max_bytes: int, q_range=QUALITY_RANGE):
+    """
+    max_bytes'ı aşmayan en yüksek kaliteyi ikili aramayla bulur.
+    (kalite, veri, sığdı_mı) döndürür; hiçbir kalite sığmazsa en düşük kalitenin sonucu döner.
+    """
+    lo, hi = q_range
+    data = encode(img, fmt, hi, **params)
+    if len(data) <= max_bytes:
+        return hi, data, True
+    best = (lo, encode(img, fmt, lo, **params))
+    if len(best[1]) > max_bytes:
+        return lo, best[1], False
+    lo += 1
+    hi -= 1
+    while lo <= hi:
+        q = (lo + hi) // 2
+        data = encode(img, fmt, q, **params)
+        if len(data) <= max_bytes:
+            best = (q, data)
+            lo = q + 1
+        else:
+            hi = q - 1
+    return best[0], best[1], True
+
+
+def _search_packed(packed, fmt: str, params: dict, max_bytes: int):
+    # Worker süreci: görsel ham bayt olarak gelir (Image nesnesi yerine daha ucuz pickle)
+    mode, size, raw = packed
+    return _search(Image.frombytes(mode, size, raw), fmt, params, max_bytes)
+
+
+def _variants(fmt: str) -> list:
+    if fmt == "JPEG":
+        return JPEG_VARIANTS
+    return [{}]
+
+
+def _better(a, b) -> bool:
+    # Sığan > sığmayan. Sığanlarda: yüksek kalite, sonra 4:4:4, sonra bütçeye daha yakın (büyük) dosya.
+    # Hiçbiri sığmadıysa yalnızca en küçük dosya (kayıt "en küçük hali" olarak bildirilir)
+    def rank(r):
+        q, data, fits, params = r
+        if not fits:
+            return (False, -len(data))
+        full_chroma = params.get("subsampling", 0) == 0
+        return (True, q, full_chroma, len(data))
+    return rank(a) > rank(b)
+
+
+@profiled("encode")
+def encode_to_budget(img: Image.Image, max_kb: float, fmt: str = "JPEG", executor=None, progress=None) -> dict:
+    """
+    Dosyayı `max_kb` KB altına sığdıran en yüksek kaliteli ayarları arar.
+    JPEG'de progressive/subsampling varyantları `executor` (ör. ProcessPoolExecutor) varsa paralel,
+    yoksa sırayla denenir. progress(bitmiş, toplam) ana süreçte çağrılır.
+
+    {"data", "format", "quality", "params", "fits"} döndürür. PNG kayıpsız olduğu için aranmaz.
+    """
+    max_bytes = int(max_kb * 1024)
+    if fmt == "PNG":
+        data = encode(img, "PNG")
+        if progress is not None:
+            progress(1, 1)
+        return {"data": data, "format": fmt, "quality": None, "params": {}, "fits": len(data) <= max_bytes}
+    if fmt == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+
+    variants = _variants(fmt)
+    results = []
+    if executor is None or len(variants) == 1:
+        for i, params in enumerate(variants):
+            results.append(_search(img, fmt, params, max_bytes) + (params,))
+            if progress is not None:
+                progress(i + 1, len(variants))
+    else:
+        packed = (img.mode, img.size, img.tobytes())
+        futures = {executor.submit(_search_packed, packed, fmt, params, max_bytes): params for params in variants}
+        for i, fut in enumerate(as_completed(futures)):
+            results.append(fut.result() + (futures[fut],))
+            if progress is not None:
+                progress(i + 1, len(variants))
+
+    best = results[0]
+    for r in results[1:]:
+        if _better(r, best):
+            best = r
+    q, data, fits, params = best
+    return {"data": data, "format": fmt, "quality": q, "params": params, "fits": fits}
+
+
+def _file_mode() -> int:
+    """open() ile oluşturulan dosyanın izinleri (0o666 & ~umask)."""
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            try:
+                # Linux: umask değiştirilmeden okunur
+                with open("/proc/self/status", "r", encoding="ascii") as f:
+                    _umask = next(int(line.split()[1], 8) for line in f if line.startswith("Umask:"))
+            except (OSError, StopIteration, ValueError):
+                # Başka sistemlerde yalnızca değiştirilerek okunabilir; bir kez, kilit altında
+                _umask = os.umask(0o022)
+                os.umask(_umask)
+    return 0o666 & ~_umask
+
+
+def write_bytes(path: str, data: bytes):
+    """
+    Yarım dosya kalmasın diye önce yanına yazıp sonra yerine taşır. Geçici dosya adı her yazışta
+    benzersizdir: aynı yola eş zamanlı yazanlar (ör. küçük resim thread'leri) birbirinin yarım verisini taşımaz.
+    """
+    folder, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile(dir=folder or ".", prefix=f".{name}.", suffix=".part", delete=False) as f:
+        tmp = f.name
+        try:
+            f.write(data)
+        except BaseException:
+            f.close()
+            os.unlink(tmp)
+            raise
+    try:
+        # NamedTemporaryFile 0600 açar; çıktı normal open() ile yazılmış gibi umask'e uysun
+        os.chmod(tmp, _file_mode())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def save_image(img: Image.Image, path: str, target_kb: float = None, executor=None, progress=None) -> dict:
+    """
+    Uzantıya göre JPEG/WebP/PNG kaydeder. target_kb verilirse encode_to_budget ile,
+    yoksa varsayılan kaliteyle (JPEG 95, optimize) kodlanır. Sonuç sözlüğüne "path" eklenir.
+    """
+    fmt = format_for_path(path)
+    if target_kb:
+        result = encode_to_budget(img, target_kb, fmt, executor=executor, progress=progress)
+    else:
+        result = {"data": encode(img, fmt), "format": fmt, "quality": None if fmt == "PNG" else DEFAULT_QUALITY,
+                  "params": {}, "fits": True}
+        if progress is not None:
+            progress(1, 1)
+    write_bytes(path, result["data"])
+    result["path"] = path
+    return result
+
+
+class Encoder:
+    """Hedef boyut aramaları için tembel açılan, yeniden kullanılan süreç havuzu (arayüz için)."""
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or min(len(JPEG_VARIANTS), os.cpu_count() or 1)
+        self._pool = None
+
+    def save(self, img: Image.Image, path: str, target_kb: float = None, progress=None) -> dict:
+        executor = None
+        if target_kb and self.workers > 1:
+            if self._pool is None:
+                # multiprocessing ilk hedef boyutlu kayıtta yüklenir (açılışı yavaşlatmasın)
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self._pool
+        return save_image(img, path, target_kb=target_kb, executor=executor, progress=progress)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
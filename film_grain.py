@@ -0,0 +1,108 @@
+import random
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+GRAIN_TILE = 256        # karo boyutu (tam çözünürlükte)
+GRAIN_VARIANTS = 4      # seed başına farklı karo sayısı (tekrar eden desen görünmesin)
+_REF_SIGMA = 48.0       # karolar bu sigma ile saklanır; istenen sigma LUT ile elde edilir
+_TRANSPOSES = (
+    None,
+    Image.Transpose.FLIP_LEFT_RIGHT,
+    Image.Transpose.FLIP_TOP_BOTTOM,
+    Image.Transpose.ROTATE_90,
+    Image.Transpose.ROTATE_180,
+    Image.Transpose.ROTATE_270,
+    Image.Transpose.TRANSPOSE,
+    Image.Transpose.TRANSVERSE,
+)
+
+
+def _noise_tile(seed: int, variant: int) -> Image.Image:
+    """
+    Seed'li, bulanıklaştırılmış gri gürültü karosu (ortalama 128, sigma _REF_SIGMA).
+    Image.effect_noise seed almadığı için dört düzgün dağılımın toplamı (Irwin-Hall) kullanılır.
+    """
+    rng = random.Random(f"grain:{seed}:{variant}")
+    n = GRAIN_TILE * GRAIN_TILE
+    a, b, c, d = (rng.randbytes(n) for _ in range(4))
+    sd = (4 * (256 * 256 - 1) / 12) ** 0.5
+    lut = bytes(max(0, min(255, int(round(128 + (v - 510) * _REF_SIGMA / sd)))) for v in range(1021))
+    data = bytes(lut[w + x + y + z] for w, x, y, z in zip(a, b, c, d))
+    tile = Image.frombytes("L", (GRAIN_TILE, GRAIN_TILE), data)
+    from PIL import ImageFilter
+    return tile.filter(ImageFilter.GaussianBlur(radius=0.6))
+
+
+class GrainBank:
+    """
+    Film grain karolarını ve bunlardan kurulan katmanları sınırlı LRU önbelleklerde tutar.
+    Aynı (boyut, sigma, seed, ölçek) için gürültü yeniden üretilmez; katman karo + rastgele
+    kaydırma/çevirme ile kurulduğu için tekrar eden desen görünmez ve sonuç seed'e göre sabittir.
+    """
+
+    def __init__(self, max_tiles: int = 64, max_layers: int = 4):
+        self.max_tiles = int(max_tiles)
+        self.max_layers = int(max_layers)
+        self._tiles = OrderedDict()     # (seed, variant, op) -> L karo
+        self._layers = OrderedDict()    # (size, seed, scale) -> L katman (_REF_SIGMA)
+        self._grains = OrderedDict()    # (size, seed, scale, sigma) -> RGB katman
+        self._lock = threading.Lock()
+
+    def _get(self, cache: OrderedDict, key, limit: int, build):
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        value = build()
+        with self._lock:
+            cache[key] = value
+            while len(cache) > limit:
+                cache.popitem(last=False)
+        return value
+
+    def tile(self, seed: int, variant: int, op: int) -> Image.Image:
+        def build():
+            if op == 0:
+                return _noise_tile(seed, variant)
+            return self.tile(seed, variant, 0).transpose(_TRANSPOSES[op])
+        return self._get(self._tiles, (seed, variant, op), self.max_tiles, build)
+
+    def layer(self, size: tuple[int, int], seed: int, scale: float = 1.0) -> Image.Image:
+        def build():
+            w, h = size
+            if scale != 1.0:
+                # Proxy: tam çözünürlük katmanın küçültülmüşü; önizleme son çıktıdaki grain'i gösterir
+                full = (max(1, int(round(w / scale))), max(1, int(round(h / scale))))
+                return self.layer(full, seed).resize((w, h), Image.LANCZOS)
+
+            cell = GRAIN_TILE
+            rng = random.Random(f"grain-offset:{seed}")
+            dx = rng.randrange(cell)
+            dy = rng.randrange(cell)
+
+            out = Image.new("L", (w, h), 128)
+            for row in range(-1, h // cell + 1):
+                for col in range(-1, w // cell + 1):
+                    pick = random.Random(f"grain-cell:{seed}:{row}:{col}")
+                    variant = pick.randrange(GRAIN_VARIANTS)
+                    op = pick.randrange(len(_TRANSPOSES))
+                    out.paste(self.tile(seed, variant, op), (col * cell + dx, row * cell + dy))
+            return out
+        return self._get(self._layers, (tuple(size), seed, scale), self.max_layers, build)
+
+    def grain(self, size: tuple[int, int], sigma: float, seed: int, scale: float = 1.0) -> Image.Image:
+        def build():
+            k = float(sigma) / _REF_SIGMA
+            lut = [max(0, min(255, int(round(128 + (i - 128) * k)))) for i in range(256)]
+            return self.layer(size, seed, scale).point(lut).convert("RGB")
+        return self._get(self._grains, (tuple(size), sigma, seed, scale), self.max_layers, build)
+
+
+_BANK = GrainBank()
+
+
+def grain_layer(size: tuple[int, int], sigma: float, seed: int = 0, scale: float = 1.0) -> Image.Image:
+    """Paylaşılan bankadan RGB grain katmanı (salt okunur kullanın)."""
+    return _BANK.grain(tuple(size), float(sigma), int(seed), float(scale))
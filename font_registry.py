@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import threading
+from functools import lru_cache
+
+from PIL import ImageFont
+
+FONT_EXTS = (".ttf", ".otf", ".ttc")
+
+# Sırayla denenecek fontlar (küçük harf dosya adı, uzantısız); ilk bulunan varsayılan olur
+PREFERRED_FONTS = [
+    "helvetica", "arial", "times new roman",
+    "dejavusans", "liberationsans-regular", "notosans-regular",
+    "freesans", "ubuntu-r", "cantarell-regular",
+]
+
+
+def default_font_dirs() -> list[str]:
+    home = os.path.expanduser("~")
+    if sys.platform == "darwin":
+        return [
+            "/System/Library/Fonts",
+            "/System/Library/Fonts/Supplemental",
+            "/Library/Fonts",
+            os.path.join(home, "Library", "Fonts"),
+        ]
+    if sys.platform.startswith("win"):
+        return [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")]
+    data_home = os.environ.get("XDG_DATA_HOME", os.path.join(home, ".local", "share"))
+    return [
+        "/usr/share/fonts",
+        "/usr/local/share/fonts",
+        os.path.join(data_home, "fonts"),
+        os.path.join(home, ".fonts"),
+    ]
+
+
+def default_index_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "instagram_post_maker", "fonts.json")
+
+
+class FontRegistry:
+    """
+    Sistem font klasörlerini ilk ihtiyaçta bir kez tarar ve sonucu diske yazar.
+    Sonraki açılışlarda klasörlerin (alt klasörler dahil) mtime'ları değişmediyse tarama yapılmaz.
+    """
+
+    def __init__(self, dirs=None, index_path=None):
+        self.dirs = list(dirs) if dirs is not None else default_font_dirs()
+        self.index_path = index_path or default_index_path()
+        self._index = None      # küçük harf dosya adı -> yol
+        self._lock = threading.Lock()
+
+    def _dir_stamps(self) -> dict:
+        # Alt klasörler de damgalanır: mevcut bir aile klasörüne eklenen font yalnızca onun mtime'ını değiştirir.
+        # Yalnızca klasörler stat edilir (fontconfig'in önbellek denetimi gibi); dosyalar açılmaz.
+        stamps = {}
+        stack = list(self.dirs)
+        while stack:
+            d = stack.pop()
+            try:
+                stamps[d] = os.stat(d).st_mtime_ns
+                with os.scandir(d) as it:
+                    stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+            except OSError:
+                pass
+        return stamps
+
+    def _scan(self) -> dict:
+        found = {}
+        for d in self.dirs:
+            for root, _subdirs, files in os.walk(d):
+                for name in files:
+                    stem, ext = os.path.splitext(name)
+                    if ext.lower() in FONT_EXTS:
+                        found.setdefault(stem.lower(), os.path.join(root, name))
+        return found
+
+    def _load_persisted(self, stamps: dict):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("dirs") != stamps:
+            return None
+        return data.get("fonts")
+
+    def _persist(self, stamps: dict, fonts: dict):
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"dirs": stamps, "fonts": fonts}, f)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass
+
+    def index(self) -> dict:
+        with self._lock:
+            if self._index is None:
+                stamps = self._dir_stamps()
+                fonts = self._load_persisted(stamps)
+                if fonts is None:
+                    fonts = self._scan()
+                    self._persist(stamps, fonts)
+                self._index = fonts
+            return self._index
+
+    def find(self, name: str):
+        return self.index().get(name.lower())
+
+    def default_path(self):
+        for name in PREFERRED_FONTS:
+            path = self.find(name)
+            if path is not None:
+                return path
+        return None
+
+
+_REGISTRY = FontRegistry()
+
+
+@lru_cache(maxsize=64)
+def load_font(path, size: int):
+    """(yol, boyut) başına bir kez yüklenir. path None ise Pillow'un gömülü fontu kullanılır."""
+    if path is not None:
+        try:
+            return ImageFont.truetype(path, size=int(size))
+        except Exception:
+            pass
+    try:
+        return ImageFont.load_default(size=int(size))
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def _default_path():
+    return _REGISTRY.default_path()
+
+
+def get_font(size: int):
+    return load_font(_default_path(), int(size))
+
+
+@lru_cache(maxsize=512)
+def _measure(text: str, font) -> tuple[int, int, int, int]:
+    return font.getbbox(text)
+
+
+def text_bbox(text: str, font) -> tuple[int, int, int, int]:
+    """
+    (0, 0)'a çizilen metnin kutusu. Fontlar load_font'ta (yol, boyut) başına tek nesne olduğundan
+    önbellek anahtarı fiilen (metin, yol, boyut) olur.
+    """
+    return _measure(text, font)
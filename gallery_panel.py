@@ -0,0 +1,140 @@
+import os
+import tkinter as tk
+
+from square_cache import ThumbnailLoader, list_images
+
+TILE_PAD = 8
+LABEL_H = 16
+
+
+class GalleryPanel(tk.Frame):
+    """
+    Klasördeki fotoğrafların dikey küçük görsel listesi. Küçük görseller ThumbnailLoader'da
+    üretilir; kaydırdıkça görünen satırlar sıranın önüne alınır. Tıklanan dosyanın karesi de aynı
+    thread'lerde hazırlanır (büyük dosyada hash ve çözme arayüzü dondurmaz) ve
+    on_select(yol, kare, stats, hata) ile bildirilir.
+    """
+
+    def __init__(self, master, cache, on_select, **kw):
+        super().__init__(master, **kw)
+        self.cache = cache
+        self.on_select = on_select
+        self.loader = ThumbnailLoader(cache)
+        self.thumb = cache.thumb_size
+        self.tile_h = self.thumb + LABEL_H + TILE_PAD
+
+        self._paths = []
+        self._rows = {}             # yol -> indeks
+        self._photos = {}           # indeks -> PhotoImage (Tk referansı tutulmalı)
+        self._gen = 0
+        self._selected = None
+        self._opening = None        # tıklanıp karesi hazırlanan dosya; yalnızca en sonuncusu açılır
+        self._poll_job = None
+
+        self.header = tk.Label(self, text="", anchor="w", fg="#666")
+        self.header.pack(fill="x")
+        self.canvas = tk.Canvas(self, width=self.thumb + 2 * TILE_PAD, bg="#1b1b1b", highlightthickness=0,
+                                yscrollcommand=self._on_yscroll)
+        bar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self._bar = bar
+        bar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="y", expand=True)
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Configure>", lambda _e: self._prioritize_visible())
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(seq, self._on_wheel)
+
+    def show_folder(self, folder: str) -> int:
+        self._paths = list_images(folder)
+        self._rows = {p: i for i, p in enumerate(self._paths)}
+        self._photos.clear()
+        self._selected = None
+        self.canvas.delete("all")
+        x = TILE_PAD
+        for i, path in enumerate(self._paths):
+            y = i * self.tile_h + TILE_PAD
+            self.canvas.create_rectangle(x, y, x + self.thumb, y + self.thumb, fill="#2a2a2a", outline="",
+                                         tags=(f"tile{i}", "tile"))
+            name = os.path.basename(path)
+            if len(name) > 22:
+                name = name[:10] + "…" + name[-10:]
+            self.canvas.create_text(x, y + self.thumb + 2, text=name, anchor="nw", fill="#aaa",
+                                    font=("TkDefaultFont", 8))
+        self.canvas.configure(scrollregion=(0, 0, self.thumb + 2 * TILE_PAD, len(self._paths) * self.tile_h))
+        self.canvas.yview_moveto(0)
+        self.header.config(text=f"{os.path.basename(folder.rstrip(os.sep)) or folder}: {len(self._paths)}")
+
+        self._gen = self.loader.load(self._paths)
+        self._prioritize_visible()
+        if self._poll_job is None:
+            self._poll_job = self.after(30, self._poll)
+        return len(self._paths)
+
+    def select(self, path: str):
+        self.canvas.delete("selection")
+        self._selected = path
+        i = self._rows.get(path)
+        if i is not None:
+            y = i * self.tile_h + TILE_PAD
+            self.canvas.create_rectangle(TILE_PAD - 3, y - 3, TILE_PAD + self.thumb + 3, y + self.thumb + 3,
+                                         outline="#4da3ff", width=3, tags="selection")
+
+    def close(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.loader.stop()
+        self.cache.flush()
+
+    def _visible_indices(self) -> range:
+        top = self.canvas.canvasy(0)
+        bottom = top + max(1, self.canvas.winfo_height())
+        first = max(0, int(top // self.tile_h))
+        last = min(len(self._paths), int(bottom // self.tile_h) + 1)
+        return range(first, last)
+
+    def _prioritize_visible(self):
+        idx = self._visible_indices()
+        self.loader.prioritize([self._paths[i] for i in idx if i not in self._photos])
+
+    def _on_yscroll(self, first, last):
+        self._bar.set(first, last)
+        self._prioritize_visible()
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-2, "units")
+        else:
+            self.canvas.yview_scroll(2, "units")
+
+    def _on_click(self, event):
+        i = int(self.canvas.canvasy(event.y) // self.tile_h)
+        if 0 <= i < len(self._paths):
+            self.select(self._paths[i])
+            self._opening = self._paths[i]
+            self.loader.open(self._paths[i])
+
+    def _poll(self):
+        from PIL import ImageTk
+        results = self.loader.poll()
+        for gen, path, thumb, err in results:
+            if gen != self._gen:
+                continue
+            i = self._rows[path]
+            if err is not None:
+                # Açılamayan dosya: kutucuk kırmızımsı kalır
+                self.canvas.itemconfig(f"tile{i}", fill="#4a1f1f")
+                self._photos[i] = None
+                continue
+            photo = ImageTk.PhotoImage(thumb)
+            self._photos[i] = photo
+            self.canvas.create_image(TILE_PAD, i * self.tile_h + TILE_PAD, image=photo, anchor="nw")
+        if results and self._selected is not None:
+            self.canvas.tag_raise("selection")
+        if results and len(self._photos) == len(self._paths):
+            self.cache.flush()
+        for path, square, stats, err in self.loader.poll_opened():
+            if path == self._opening:
+                self._opening = None
+                self.on_select(path, square, stats, err)
+        self._poll_job = self.after(30, self._poll)
@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from stage_cache import image_nbytes
+
+
+def _freeze(settings: dict) -> tuple:
+    return tuple(sorted(settings.items()))
+
+
+class History:
+    """
+    Ayar geçmişi (geri al / yinele). Her adım yalnızca değişen ayarları tutar: ({ad: eski}, {ad: yeni}).
+    Aynı ayarları değiştiren ve aralarında `coalesce_s` saniyeden az olan kayıtlar (slider sürükleme,
+    yazı yazma) tek adımda birleşir. En fazla `max_steps` adım tutulur, en eskisi düşer.
+
+    Render edilmiş kareler ayrıca (görsel anahtarı, ayarlar) ile LRU'da tutulur; toplamı `max_bytes`'ı
+    geçmez. Karesi olan adıma dönüş anında gösterilir, olmayan adım pipeline'dan yeniden render edilir.
+    """
+
+    def __init__(self, settings: dict, max_bytes: int = 48 * 1024 * 1024, coalesce_s: float = 0.8,
+                 max_steps: int = 500, clock=time.monotonic):
+        self.max_bytes = int(max_bytes)
+        self.coalesce_s = float(coalesce_s)
+        self.max_steps = int(max_steps)
+        self._clock = clock
+        self._current = dict(settings)
+        self._steps = []
+        self._pos = 0               # uygulanmış adım sayısı; _pos < len(_steps) ise yinelenebilir adım var
+        self._last_keys = None      # birleştirme için son adımın anahtarları
+        self._last_t = 0.0
+        self._frames = OrderedDict()    # (görsel anahtarı, ayarlar) -> (Image, bayt)
+        self._frame_bytes = 0
+
+    @property
+    def current(self) -> dict:
+        return dict(self._current)
+
+    @property
+    def can_undo(self) -> bool:
+        return self._pos > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._pos < len(self._steps)
+
+    @property
+    def nbytes(self) -> int:
+        return self._frame_bytes
+
+    def record(self, settings: dict) -> bool:
+        """Yeni durumu kaydeder; değişen ayar yoksa False."""
+        changed = {k: v for k, v in settings.items() if self._current.get(k) != v}
+        if not changed:
+            return False
+        now = self._clock()
+        keys = frozenset(changed)
+        if (self._last_keys == keys and self._pos == len(self._steps) and self._pos > 0
+                and now - self._last_t <= self.coalesce_s):
+            old, new = self._steps[-1]
+            new.update(changed)
+            if all(new[k] == old[k] for k in new):
+                # Sürükleme başladığı değere döndü: adım boşaldı
+                self._steps.pop()
+                self._pos -= 1
+                keys = None
+        else:
+            del self._steps[self._pos:]
+            self._steps.append(({k: self._current.get(k) for k in changed}, changed))
+            if len(self._steps) > self.max_steps:
+                del self._steps[0]
+            self._pos = len(self._steps)
+        self._current.update(changed)
+        self._last_keys, self._last_t = keys, now
+        return True
+
+    def undo(self):
+        """Bir önceki ayarlar (dict) ya da geri alınacak adım yoksa None."""
+        if not self.can_undo:
+            return None
+        self._pos -= 1
+        self._current.update(self._steps[self._pos][0])
+        self._last_keys = None
+        return self.current
+
+    def redo(self):
+        if not self.can_redo:
+            return None
+        self._current.update(self._steps[self._pos][1])
+        self._pos += 1
+        self._last_keys = None
+        return self.current
+
+    def put_frame(self, image_key, settings: dict, img: Image.Image):
+        nbytes = image_nbytes(img)
+        if nbytes > self.max_bytes:
+            return
+        key = (image_key, _freeze(settings))
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            return
+        self._frames[key] = (img, nbytes)
+        self._frame_bytes += nbytes
+        while self._frame_bytes > self.max_bytes:
+            _key, (_img, old) = self._frames.popitem(last=False)
+            self._frame_bytes -= old
+
+    def frame(self, image_key, settings: dict):
+        key = (image_key, _freeze(settings))
+        entry = self._frames.get(key)
+        if entry is None:
+            return None
+        self._frames.move_to_end(key)
+        return entry[0]
+
+    def drop_frames(self):
+        self._frames.clear()
+        self._frame_bytes = 0
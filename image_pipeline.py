@@ -1,100 +1,282 @@
+import importlib.util
+import math
 import os
-from PIL import (
-    Image, ImageOps, ImageEnhance,
-    ImageFilter, ImageChops, ImageDraw, ImageFont
-)
+from typing import TYPE_CHECKING
+
+# Yalnızca Image baştan yüklenir; diğer Pillow modülleri, font taraması (font_registry) ve
+# numpy_backend ilk kullanıldıkları fonksiyonda içe aktarılır (bkz. benchmark.py --startup)
+from PIL import Image
+
+from film_grain import grain_layer
+from profiling import profiled
+from underline import underline_provider
+
+if TYPE_CHECKING:
+    from PIL import ImageDraw, ImageFont
+
+# Renk/keskinlik/glow/grain için arka uç: "pillow" (varsayılan) ya da "numpy" (numpy_backend, NumPy kuruluysa)
+BACKENDS = ("pillow", "numpy")
+_backend = "pillow"
+
+
+def available_backends() -> list[str]:
+    # Yalnızca kurulu mu diye bakılır; numpy ilk numpy_backend kullanımında yüklenir
+    if importlib.util.find_spec("numpy") is None:
+        return ["pillow"]
+    return list(BACKENDS)
+
+
+def set_backend(name: str) -> str:
+    """Arka ucu seçer; NumPy yoksa Pillow'a düşer. Gerçekte etkin olan arka ucu döndürür."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Bilinmeyen arka uç: {name} ({', '.join(BACKENDS)})")
+    _backend = name if name in available_backends() else "pillow"
+    return _backend
+
+
+def get_backend() -> str:
+    return _backend
+
+
+# IPM_BACKEND=numpy ile açık başlar; süreç havuzundaki worker'lar da ortamı devralır
+if os.environ.get("IPM_BACKEND") in BACKENDS:
+    set_backend(os.environ["IPM_BACKEND"])
+
+##RRGGBB -> (r, g, b)
+def hex_to_rgb(s: str) -> tuple[int, int, int]:
+    s = s.strip()
+    if s.startswith("#"):
+        s = s[1:]
+    if len(s) != 6:
+        raise ValueError("Renk #RRGGBB olmalı")
+    return (int(s[0:2], 16), int(s[2:4], 16), int(s[4:6], 16))
+
+
+def _color_or_white(s) -> tuple[int, int, int]:
+    try:
+        return hex_to_rgb(s)
+    except Exception:
+        return (255, 255, 255)
+
 
 #Instagram için kare boyutu getir
+@profiled("square")
 def make_instagram_square(img: Image.Image, size=(1080, 1080)) -> Image.Image:
     if img.mode == "RGBA":
         bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
         img = Image.alpha_composite(bg, img).convert("RGB")
     elif img.mode != "RGB":
         img = img.convert("RGB")
+    from PIL import ImageOps
     return ImageOps.fit(img, size, method=Image.LANCZOS, centering=(0.5, 0.5))
 
-#Filtre uygula
-def apply_filter(img: Image.Image, filter_name: str) -> Image.Image:
+# Filtreler, parlaklık ve kontrast kanal başına nokta işlemleridir: hepsi tek bir LUT'a (point)
+# derlenir. Ara adımlardaki 0..255 kırpma ve tamsayıya kesme LUT içinde birebir korunur.
+# Doygunluk kanalları karıştırdığı için gerekiyorsa ayrı bir 3x4 renk matrisiyle uygulanır.
+_LUMA = (0.299, 0.587, 0.114)   # Pillow'un RGB -> L katsayıları
+_IDENTITY_CURVE = list(range(256))
+_GRAY_FILTERS = ("Siyah-Beyaz", "Sepya")
+
+
+def _blend_value(base: float, v: int, factor: float) -> int:
+    # Image.blend(degenerate, img, factor) ile aynı: base + factor*(v-base), kesilip sınırlanır
+    t = base + factor * (v - base)
+    if t <= 0.0:
+        return 0
+    if t >= 255.0:
+        return 255
+    return int(t)
+
+
+def _filter_curves(filter_name: str):
     f = filter_name
-    if f == "Normal":
-        return img
-    if f == "Siyah-Beyaz":
-        return ImageOps.grayscale(img).convert("RGB")
+    ident = _IDENTITY_CURVE
+    up = [min(255, int(i * 1.08)) for i in range(256)]
+    down = [max(0, int(i * 0.94)) for i in range(256)]
     if f == "Invert":
-        return ImageOps.invert(img)
-    if f == "Sepya":
-        g = ImageOps.grayscale(img)
-        return ImageOps.colorize(g, black="#2b1b0f", white="#f2d7b6").convert("RGB")
+        inv = [255 - i for i in range(256)]
+        return [inv, inv, inv]
     if f == "Sıcak":
-        r, g, b = img.split()
-        r = r.point(lambda i: min(255, int(i * 1.08)))
-        b = b.point(lambda i: max(0, int(i * 0.94)))
-        return Image.merge("RGB", (r, g, b))
+        return [up, ident, down]
     if f == "Soğuk":
-        r, g, b = img.split()
-        b = b.point(lambda i: min(255, int(i * 1.08)))
-        r = r.point(lambda i: max(0, int(i * 0.94)))
-        return Image.merge("RGB", (r, g, b))
-    return img
+        return [down, ident, up]
+    if f == "Sepya":
+        # ImageOps.colorize(g, black, white) tablosu; girdi gri (L) kanaldır
+        black = hex_to_rgb("#2b1b0f")
+        white = hex_to_rgb("#f2d7b6")
+        return [[black[c] + i * (white[c] - black[c]) // 255 for i in range(255)] + [white[c]] for c in range(3)]
+    return [ident, ident, ident]
+
+
+def color_curves(filter_name: str, brightness: float = 1.0, contrast: float = 1.0, histogram=None):
+    """
+    Filtre + parlaklık + kontrastı kanal başına 3 adet 256'lık eğriye derler.
+    Siyah-Beyaz/Sepya'da eğriler gri (L) kanala uygulanır. Kontrast, ImageEnhance.Contrast gibi
+    ortalama parlaklık etrafında uygulanır; ortalama girdi histogramından hesaplanır (ek görüntü geçişi yok).
+    """
+    brightness, contrast = float(brightness), float(contrast)
+    curves = _filter_curves(filter_name)
+
+    if brightness != 1.0:
+        curves = [[_blend_value(0.0, v, brightness) for v in cv] for cv in curves]
+    if contrast != 1.0:
+        if len(histogram) == 256:
+            hists = [histogram] * 3
+        else:
+            hists = [histogram[0:256], histogram[256:512], histogram[512:768]]
+        n = max(1, sum(hists[0]))
+        means = [sum(h * cv[i] for i, h in enumerate(hh)) / n for hh, cv in zip(hists, curves)]
+        mean = int(sum(w * m for w, m in zip(_LUMA, means)) + 0.5)
+        curves = [[_blend_value(mean, v, contrast) for v in cv] for cv in curves]
+    return curves
+
+
+def saturation_matrix(saturation: float):
+    """ImageEnhance.Color karşılığı: x -> L + s*(x - L), Image.convert("RGB", matrix) için 12'li tuple."""
+    s = float(saturation)
+    k = 1.0 - s
+    rows = []
+    for r in range(3):
+        rows.extend(k * _LUMA[c] + (s if r == c else 0.0) for c in range(3))
+        rows.append(0.0)
+    return tuple(rows)
+
+
+#Filtre + parlaklık/kontrast/doygunluğu birleşik uygula
+@profiled("color")
+def apply_color(img: Image.Image, filter_name: str, brightness: float, contrast: float, saturation: float) -> Image.Image:
+    gray = filter_name in _GRAY_FILTERS
+    src = img.convert("L") if gray else img
+    histogram = src.histogram() if float(contrast) != 1.0 else None
+    curves = color_curves(filter_name, brightness, contrast, histogram=histogram)
+
+    if gray:
+        if curves[0] == curves[1] == curves[2]:
+            # Siyah-Beyaz: tek kanalda LUT, sonra RGB; doygunluk griyi değiştirmez
+            return src.point(curves[0]).convert("RGB")
+        out = src.convert("RGB").point(curves[0] + curves[1] + curves[2])
+    elif curves[0] is curves[1] is curves[2] is _IDENTITY_CURVE:
+        out = img
+    else:
+        out = img.point(curves[0] + curves[1] + curves[2])
+
+    if float(saturation) != 1.0:
+        out = out.convert("RGB", saturation_matrix(saturation))
+    return out
+
+#Keskinlik (gerçek bir konvolüsyon olduğu için ayrı geçiş)
+@profiled("sharpness")
+def apply_sharpness(img: Image.Image, sharpness: float) -> Image.Image:
+    sharpness = float(sharpness)
+    if sharpness == 1.0:
+        return img
+    from PIL import ImageEnhance
+    return ImageEnhance.Sharpness(img).enhance(sharpness)
+
+#Filtre uygula
+def apply_filter(img: Image.Image, filter_name: str) -> Image.Image:
+    return apply_color(img, filter_name, 1.0, 1.0, 1.0)
 
 #Görüntü ayarlarını uygula
 def apply_adjustments(img: Image.Image, brightness: float, contrast: float, saturation: float, sharpness: float) -> Image.Image:
-    img = ImageEnhance.Brightness(img).enhance(float(brightness))
-    img = ImageEnhance.Contrast(img).enhance(float(contrast))
-    img = ImageEnhance.Color(img).enhance(float(saturation))
-    img = ImageEnhance.Sharpness(img).enhance(float(sharpness))
-    return img
+    img = apply_color(img, "Normal", brightness, contrast, saturation)
+    return apply_sharpness(img, sharpness)
+
+# Büyük yarıçaplı blur'u düşük çözünürlükte yap: görseli 2^k küçült, kalan sigmayı orada uygula, geri büyüt.
+# Kutu küçültme ve bilinear büyütmenin kendi bulanıklığı toplam varyanstan düşülür.
+def pyramid_blur(img: Image.Image, radius: float, min_radius: float = 2.0) -> Image.Image:
+    from PIL import ImageFilter
+    w, h = img.size
+    f = 1
+    while radius / (f * 2) >= min_radius and min(w, h) // (f * 2) >= 16:
+        f *= 2
+    if f == 1:
+        return img.filter(ImageFilter.GaussianBlur(radius=radius))
+
+    small = img.reduce(f)
+    var = radius * radius - (f * f - 1) / 12.0 - (f * f) / 6.0
+    r_small = math.sqrt(max(0.0, var)) / f
+    if r_small > 0.0:
+        small = small.filter(ImageFilter.GaussianBlur(radius=r_small))
+    return small.resize((w, h), Image.BILINEAR)
+
+def glow_layer(img: Image.Image, radius: float) -> Image.Image:
+    """Glow'un screen katmanı (piramit blur + screen). Güçten bağımsızdır; radius ölçeklenmiş yarıçaptır."""
+    from PIL import ImageChops
+    return ImageChops.screen(img, pyramid_blur(img, radius))
 
 #Parlama efekti uygulama
-def apply_glow(img: Image.Image, enabled: bool, strength: float, radius: float) -> Image.Image:
+@profiled("glow")
+def apply_glow(img: Image.Image, enabled: bool, strength: float, radius: float, scale: float = 1.0,
+               layer: Image.Image = None) -> Image.Image:
+    """
+    Blur + screen blend. Blur piramitle yapılır; süre yarıçaptan neredeyse bağımsızdır.
+    layer: aynı girdi ve yarıçap için önceden hesaplanmış glow_layer (yalnızca güç değişiyorsa blur atlanır).
+    apply_glow_exact ile farkı 1080 px'de, yarıçap 0-20 aralığında: ortalama mutlak fark < 0.5,
+    en büyük fark strength 1.0'da < 24 seviye (varsayılan strength 0.35'te <= 8).
+    """
+    # scale: görsel 1080 px'e göre küçültülmüşse (önizleme proxy'si) blur yarıçapı da aynı oranda küçülür
+    if not enabled:
+        return img
+    strength = float(strength)
+    radius = float(radius) * float(scale)
+    if strength <= 0.0 or radius <= 0.0:
+        return img
+    if layer is None:
+        layer = glow_layer(img, radius)
+    return Image.blend(img, layer, strength)
+
+#Parlama efekti (tam çözünürlük blur; apply_glow için referans)
+def apply_glow_exact(img: Image.Image, enabled: bool, strength: float, radius: float, scale: float = 1.0) -> Image.Image:
     if not enabled:
         return img
     strength = float(strength)
-    radius = float(radius)
+    radius = float(radius) * float(scale)
     if strength <= 0.0 or radius <= 0.0:
         return img
+    from PIL import ImageChops, ImageFilter
     blurred = img.filter(ImageFilter.GaussianBlur(radius=radius))
     screened = ImageChops.screen(img, blurred)
     return Image.blend(img, screened, strength)
 
 #Film grain efekti uygula
-def apply_film_grain(img: Image.Image, enabled: bool, amount: float) -> Image.Image:
+@profiled("grain")
+def apply_film_grain(img: Image.Image, enabled: bool, amount: float, scale: float = 1.0, seed: int = 0) -> Image.Image:
+    # Gürültü seed'li ve önbellekli karolardan gelir: önizleme ile kayıt aynı grain'i verir
     if not enabled:
         return img
     amount = float(amount)
     if amount <= 0.0:
         return img
-    w, h = img.size
     sigma = 5 + int(amount * 180)
-    noise = Image.effect_noise((w, h), sigma).convert("RGB")
-    noise = noise.filter(ImageFilter.GaussianBlur(radius=0.6))
+    noise = grain_layer(img.size, sigma, seed=seed, scale=scale)
     return Image.blend(img, noise, amount)
 
-#Metin fontlarını al
-def get_font(size: int) -> ImageFont.ImageFont:
-    candidates = [
-        "/System/Library/Fonts/Supplemental/Helvetica.ttf",
-        "/System/Library/Fonts/Supplemental/Arial.ttf",
-        "/System/Library/Fonts/Supplemental/Times New Roman.ttf",
-    ]
-    for p in candidates:
-        if os.path.exists(p):
-            try:
-                return ImageFont.truetype(p, size=int(size))
-            except Exception:
-                pass
-    return ImageFont.load_default()
+#Metin fontlarını al (sistem fontları bir kez taranır, (yol, boyut) başına bir kez yüklenir)
+def get_font(size: int) -> "ImageFont.ImageFont":
+    import font_registry
+    return font_registry.get_font(int(size))
 
 #Metin pozisyonlarını ayarla
-def text_xy(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, pos_name: str, canvas_size=(1080, 1080)):
+def text_xy(draw: "ImageDraw.ImageDraw", text: str, font: "ImageFont.ImageFont", pos_name: str, canvas_size=(1080, 1080),
+            scale: float = 1.0):
+    # draw artık kullanılmıyor (ölçüm font_registry'de önbellekli); eski çağrılar için parametre duruyor
+    import font_registry
     w, h = canvas_size
-    margin = 70
-    bbox = draw.textbbox((0, 0), text, font=font)
+    margin = int(round(70 * scale))
+    bbox = font_registry.text_bbox(text, font)
     tw = bbox[2] - bbox[0]
     th = bbox[3] - bbox[1]
 
     x = (w - tw) // 2
-    if pos_name == "Üst-Orta":
+    if isinstance(pos_name, (int, float)):
+        # Animasyonda (sweep.py) konum TEXT_POSITIONS sırasında kesirli indekstir: 0.5 Üst-Orta ile Orta arası
+        ys = (margin, (h - th) // 2, h - margin - th)
+        t = min(2.0, max(0.0, float(pos_name)))
+        i = min(1, int(t))
+        y = int(round(ys[i] + (ys[i + 1] - ys[i]) * (t - i)))
+    elif pos_name == "Üst-Orta":
         y = margin
     elif pos_name == "Orta":
         y = (h - th) // 2
@@ -103,6 +285,24 @@ def text_xy(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, pos
     return x, y, tw, th
 
 
+def _overlay_with_offset(overlay):
+    # provider eski tipte tam tuval RGBA da döndürebilir
+    if isinstance(overlay, tuple):
+        return overlay
+    return overlay, (0, 0)
+
+
+def _composite_at(dst: Image.Image, overlay: Image.Image, offset) -> None:
+    # dst.alpha_composite negatif konumu kabul etmez; tuval dışına taşan kısmı kes
+    ox, oy = int(offset[0]), int(offset[1])
+    if ox < 0 or oy < 0:
+        overlay = overlay.crop((max(0, -ox), max(0, -oy), overlay.width, overlay.height))
+        ox, oy = max(0, ox), max(0, oy)
+    if overlay.width > 0 and overlay.height > 0 and ox < dst.width and oy < dst.height:
+        dst.alpha_composite(overlay, dest=(ox, oy))
+
+
+@profiled("text")
 def apply_text_effect(
     img_rgb: Image.Image,
     enabled: bool,
@@ -111,7 +311,8 @@ def apply_text_effect(
     text_size: int,
     text_color_rgb: tuple[int, int, int],
     underline_enabled: bool,
-    underline_overlay_provider,  # callable(text_bbox)->RGBA overlay or None
+    underline_overlay_provider,  # callable(text_bbox, canvas_size)->(RGBA overlay, (x, y)), tam tuval RGBA veya None
+    scale: float = 1.0,          # proxy önizlemede 1080'e göre ölçek; yazı ve gölge de ölçeklenir
 ) -> Image.Image:
     if not enabled:
         return img_rgb
@@ -120,30 +321,104 @@ def apply_text_effect(
     if not text:
         return img_rgb
 
-    img = img_rgb.convert("RGBA")
-    base = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(base)
+    import font_registry
+    from PIL import ImageDraw, ImageFilter
 
-    font = get_font(int(text_size))
-    x, y, tw, th = text_xy(draw, text, font, text_pos, canvas_size=img.size)
+    # Tüm katmanlar yalnızca yazı + gölge + underline kutusu kadar; fotoğraf RGBA'ya çevrilmez
+    font = get_font(max(1, int(round(int(text_size) * scale))))
+    x, y, tw, th = text_xy(None, text, font, text_pos, canvas_size=img_rgb.size, scale=scale)
     text_bbox = (x, y, tw, th)
 
+    off = max(1, int(round(2 * scale)))
+    blur = 2.0 * scale
+    pad = int(math.ceil(blur * 3)) + 1
+    ink = font_registry.text_bbox(text, font)
+    box = [x + ink[0] - pad, y + ink[1] - pad, x + ink[2] + off + pad, y + ink[3] + off + pad]
+
+    overlay = None
     if underline_enabled and underline_overlay_provider is not None:
-        overlay = underline_overlay_provider(text_bbox)
+        overlay = underline_overlay_provider(text_bbox, img_rgb.size)
         if overlay is not None:
-            base = Image.alpha_composite(base, overlay)
+            overlay, (ox, oy) = _overlay_with_offset(overlay)
+            box = [min(box[0], ox), min(box[1], oy),
+                   max(box[2], ox + overlay.width), max(box[3], oy + overlay.height)]
+
+    w, h = img_rgb.size
+    left, top = max(0, box[0]), max(0, box[1])
+    right, bottom = min(w, box[2]), min(h, box[3])
+    if right <= left or bottom <= top:
+        return img_rgb
+    size = (right - left, bottom - top)
+
+    layer = Image.new("RGBA", size, (0, 0, 0, 0))
+    if overlay is not None:
+        _composite_at(layer, overlay, (ox - left, oy - top))
 
     # shadow
-    shadow = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    shadow = Image.new("RGBA", size, (0, 0, 0, 0))
     sd = ImageDraw.Draw(shadow)
-    sd.text((x + 2, y + 2), text, font=font, fill=(0, 0, 0, 140))
-    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=2.0))
-    base = Image.alpha_composite(base, shadow)
+    sd.text((x + off - left, y + off - top), text, font=font, fill=(0, 0, 0, 140))
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=blur))
+    layer.alpha_composite(shadow)
 
     # text
-    draw = ImageDraw.Draw(base)
+    draw = ImageDraw.Draw(layer)
     r, g, b = text_color_rgb
-    draw.text((x, y), text, font=font, fill=(int(r), int(g), int(b), 255))
+    draw.text((x - left, y - top), text, font=font, fill=(int(r), int(g), int(b), 255))
 
-    out = Image.alpha_composite(img, base).convert("RGB")
+    out = img_rgb.copy()
+    out.paste(layer, (left, top), layer)
     return out
+
+
+#Ayar sözlüğünden pipeline aşamalarını oluştur
+def build_stages(settings: dict, underline_overlay_provider=None, scale: float = 1.0):
+    """
+    [(ad, parametreler, fn), ...] döndürür. Parametreler hash'lenebilir tuple'lardır ve
+    stage_cache.run_stages tarafından aşama anahtarı olarak kullanılır.
+    scale < 1 ise aşamalar küçültülmüş proxy görsel üzerinde son çıktıya benzer görünecek şekilde çalışır.
+    """
+    scale = float(scale)
+    s = settings
+    text_color = _color_or_white(s["text_color"])
+    underline_on = bool(s["underline_on"])
+    if underline_overlay_provider is None:
+        underline_overlay_provider = underline_provider(
+            _color_or_white(s["underline_color"]), int(s["underline_thickness"]), int(s["underline_seed"])
+        )
+
+    color_p = (s["filter"], float(s["brightness"]), float(s["contrast"]), float(s["saturation"]))
+    sharp_p = (float(s["sharpness"]),)
+    glow_p = (bool(s["glow_on"]), float(s["glow_strength"]), float(s["glow_radius"]), scale)
+    grain_p = (bool(s["grain_on"]), float(s["grain_amount"]), scale, int(s["grain_seed"]))
+    text_p = (
+        bool(s["text_on"]), s["text"], s["text_pos"], int(s["text_size"]), text_color,
+        underline_on, _color_or_white(s["underline_color"]),
+        int(s["underline_thickness"]), int(s["underline_seed"]), scale,
+    )
+
+    if _backend == "numpy":
+        # Dört aşama tek "effects" aşamasında: görsel diziye bir kez girip bir kez çıkar
+        import numpy_backend
+        effects_p = (color_p, sharp_p, glow_p, grain_p)
+        stages = [("effects", effects_p, lambda img: numpy_backend.apply_stack(img, *effects_p))]
+    else:
+        stages = [
+            ("color", color_p, lambda img: apply_color(img, *color_p)),
+            ("sharpness", sharp_p, lambda img: apply_sharpness(img, *sharp_p)),
+            ("glow", glow_p, lambda img: apply_glow(img, *glow_p)),
+            ("grain", grain_p, lambda img: apply_film_grain(img, *grain_p)),
+        ]
+    return stages + [
+        ("text", text_p, lambda img: apply_text_effect(
+            img_rgb=img,
+            enabled=text_p[0],
+            text=s["text"],
+            text_pos=s["text_pos"],
+            text_size=int(s["text_size"]),
+            text_color_rgb=text_color,
+            underline_enabled=underline_on,
+            underline_overlay_provider=(underline_overlay_provider if underline_on else None),
+            scale=scale,
+        )),
+    ]
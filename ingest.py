@@ -0,0 +1,119 @@
+import math
+
+from PIL import Image
+
+from constants import INSTAGRAM_SIZE
+from profiling import profiled
+
+_EXIF_ORIENTATION = 0x0112
+_ORIENT_OPS = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def center_crop_box(src_size: tuple[int, int], target_size: tuple[int, int]) -> tuple[float, float, float, float]:
+    """ImageOps.fit(centering=(0.5, 0.5)) ile aynı kırpma kutusu."""
+    sw, sh = src_size
+    tw, th = target_size
+    src_ratio = sw / sh
+    out_ratio = tw / th
+    if src_ratio == out_ratio:
+        cw, ch = sw, sh
+    elif src_ratio >= out_ratio:
+        cw, ch = out_ratio * sh, sh
+    else:
+        cw, ch = sw, sw / out_ratio
+    left = (sw - cw) * 0.5
+    top = (sh - ch) * 0.5
+    return left, top, left + cw, top + ch
+
+
+def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+    if img.mode == "RGBA":
+        bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        return Image.alpha_composite(bg, img).convert("RGB")
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _nbytes(img: Image.Image) -> int:
+    return img.size[0] * img.size[1] * len(img.getbands())
+
+
+def decode_scaled(source, target_sizes=(INSTAGRAM_SIZE,), stats: dict = None) -> Image.Image:
+    """
+    Kaynağı, verilen tüm hedef boyutların merkez kırpmasını karşılayan en küçük ölçekte çözer.
+    EXIF yönü uygulanmış RGB görsel döner (kırpılmamış, ölçeklenmiş).
+
+    stats verilirse doldurulur: source_size, decoded_size, scale, decoded_bytes (çözülen en büyük
+    görsel tamponunun hesaplanan bayt boyutu; ölçülmüş süreç belleği değildir).
+    """
+    im = Image.open(source)
+    img = im
+    try:
+        orientation = im.getexif().get(_EXIF_ORIENTATION, 1)
+        swap = orientation in (5, 6, 7, 8)
+        raw_w, raw_h = im.size
+        ow, oh = (raw_h, raw_w) if swap else (raw_w, raw_h)
+
+        # Her hedefin kırpma kutusunu dolduracak en küçük ölçek (yönlendirilmiş koordinatlarda)
+        need = 0.0
+        for size in target_sizes:
+            l, t, r, b = center_crop_box((ow, oh), size)
+            need = max(need, size[0] / (r - l), size[1] / (b - t))
+        need = min(1.0, need)
+
+        if im.format == "JPEG" and need < 1.0:
+            req = (math.ceil(ow * need), math.ceil(oh * need))
+            im.draft("RGB", (req[1], req[0]) if swap else req)
+
+        # make_instagram_square ile aynı: yalnızca RGBA beyaz zemine oturtulur, diğer modlar RGB'ye
+        if im.mode not in ("RGB", "RGBA"):
+            img = im.convert("RGB")
+        img.load()
+        decoded = _nbytes(img)
+
+        # draft'tan sonra kalan fazlalık reduce ile atılır; kalite için hedefin en az 2 katı bırakılır
+        k = int(img.size[0] / raw_w / (need * 2))
+        if k > 1:
+            img = img.reduce(k)
+    except Exception:
+        im.close()
+        raise
+    if img is not im:
+        im.close()
+
+    op = _ORIENT_OPS.get(orientation)
+    if op is not None:
+        img = img.transpose(op)
+    img = _flatten_to_rgb(img)
+
+    if stats is not None:
+        stats.update(
+            source_size=(ow, oh),
+            decoded_size=img.size,
+            scale=img.size[0] / ow,
+            decoded_bytes=max(decoded, _nbytes(img)),
+        )
+    return img
+
+
+def fit_to(img: Image.Image, size: tuple[int, int]) -> Image.Image:
+    return img.resize(tuple(size), Image.LANCZOS, box=center_crop_box(img.size, size))
+
+
+@profiled("ingest")
+def load_square(source, size=INSTAGRAM_SIZE, stats: dict = None) -> Image.Image:
+    """
+    make_instagram_square(Image.open(...)) ile aynı kare, ama tam çözünürlük orijinal bellekte tutulmaz:
+    JPEG'ler draft() ile DCT ölçeklemesiyle, diğerleri reduce() ile küçük çözülür.
+    Tam çözümlü yolla farkı kanal başına ortalama < 1 seviye (tests/test_ingest.py).
+    """
+    return fit_to(decode_scaled(source, (tuple(size),), stats=stats), size)
@@ -1,5 +1,9 @@
-from ui_app import InstagramPostMaker
-
-if __name__ == "__main__":
+def main():
+    # Arayüz (tkinter) yalnızca uygulama başlatılınca yüklenir; headless araçlar bu modülden bağımsızdır
+    from ui_app import InstagramPostMaker
     app = InstagramPostMaker()
     app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+from PIL import Image
+
+from constants import INSTAGRAM_SIZE, EXPORT_TARGETS
+from encoder import save_image
+from ingest import center_crop_box, decode_scaled, fit_to
+from profiling import profiled, span
+from recipe import compile_plan, validate
+
+
+def group_targets(targets: dict) -> list:
+    """
+    Aynı en-boy oranındaki hedefler aynı kırpmayı paylaşır: gruptaki en büyük hedef render edilir,
+    diğerleri (ör. feed -> thumb) bitmiş çıktıdan küçültülür. [[(ad, (w, h)), ...], ...] döndürür.
+    """
+    groups = {}
+    for name, size in targets.items():
+        w, h = size
+        groups.setdefault(Fraction(int(w), int(h)), []).append((name, (int(w), int(h))))
+    return [sorted(members, key=lambda m: m[1][0], reverse=True) for members in groups.values()]
+
+
+def shared_buffer(buf: Image.Image, sizes) -> Image.Image:
+    """
+    Tüm hedeflerin merkez kırpmalarının birleşimini, en çok ölçek isteyen hedefe yetecek boyuta
+    bir kez küçültür. Kırpmalar ortalı olduğu için her hedef bu tampondan yine ortalı kırpılır;
+    böylece her hedef büyük tampon yerine çok daha küçük bir görselden yeniden örneklenir.
+    """
+    boxes = [center_crop_box(buf.size, size) for size in sizes]
+    uw = max(r - l for l, _t, r, _b in boxes)
+    uh = max(b - t for _l, t, _r, b in boxes)
+    scale = max(size[0] / (r - l) for size, (l, _t, r, _b) in zip(sizes, boxes))
+    if scale >= 1.0:
+        return buf
+    left, top = (buf.width - uw) * 0.5, (buf.height - uh) * 0.5
+    out_size = (max(1, round(uw * scale)), max(1, round(uh * scale)))
+    return buf.resize(out_size, Image.LANCZOS, box=(left, top, left + uw, top + uh))
+
+
+def _render_group(buf: Image.Image, settings: dict, members: list) -> dict:
+    name, size = members[0]
+    # Efektler ve yazı yerleşimi her tuvalin kendi boyutuna göre (genişlik 1080'e göre ölçek)
+    plan = compile_plan(settings, scale=size[0] / INSTAGRAM_SIZE[0], check=False)
+    with span("target", "export", target=name, size=f"{size[0]}x{size[1]}"):
+        out = plan.run(fit_to(buf, size))
+    results = {name: out}
+    for other, other_size in members[1:]:
+        results[other] = out if other_size == size else out.resize(other_size, Image.LANCZOS)
+    return results
+
+
+def _run(source, settings: dict, targets, workers, stats, check, each):
+    targets = dict(targets or EXPORT_TARGETS)
+    if check:
+        settings = validate(settings)
+    # Kaynak bir kez, tüm hedeflerin kırpmalarını karşılayan en küçük ölçekte çözülür
+    buf = decode_scaled(source, list(targets.values()), stats=stats)
+    with span("shared", "export"):
+        buf = shared_buffer(buf, list(targets.values()))
+    groups = group_targets(targets)
+    workers = max(1, min(len(groups), workers or os.cpu_count() or 1))
+
+    def job(members):
+        return each(_render_group(buf, settings, members))
+
+    if workers == 1:
+        parts = [job(members) for members in groups]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(job, groups))
+    out = {}
+    for part in parts:
+        out.update(part)
+    return {name: out[name] for name in targets}
+
+
+@profiled("export")
+def render_targets(source, settings: dict, targets: dict = None, workers: int = None, stats: dict = None,
+                   check: bool = True) -> dict:
+    """
+    Kaynağı bir kez açıp her hedef boyut için post üretir: {ad: Image}.
+    source: dosya yolu veya dosya nesnesi. targets varsayılanı constants.EXPORT_TARGETS.
+    Farklı oranlar thread'lerde paralel render edilir. check=False: ayarlar zaten validate() çıktısı.
+    """
+    return _run(source, settings, targets, workers, stats, check, lambda images: images)
+
+
+@profiled("export")
+def export_targets(source, out_dir: str, settings: dict, targets: dict = None, stem: str = None,
+                   ext: str = ".jpg", workers: int = None, stats: dict = None, check: bool = True,
+                   target_kb: float = None) -> dict:
+    """
+    render_targets gibi, ama her hedef render edildiği thread'de `<stem>_<ad><ext>` olarak kaydedilir
+    (target_kb verilirse her dosya bu boyutun altına sığdırılır). {ad: yol} döndürür.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if stem is None:
+        stem = os.path.splitext(os.path.basename(str(source)))[0]
+
+    def save_all(images):
+        paths = {}
+        for name, img in images.items():
+            path = os.path.join(out_dir, f"{stem}_{name}{ext}")
+            with span("encode", "export", target=name):
+                save_image(img, path, target_kb=target_kb)
+            paths[name] = path
+        return paths
+
+    return _run(source, settings, targets, workers, stats, check, save_all)
@@ -0,0 +1,165 @@
+"""
+İsteğe bağlı NumPy arka ucu. image_pipeline'daki renk/keskinlik/glow/grain fonksiyonlarıyla aynı imzalar;
+apply_stack ise bu dört aşamayı tek seferde çalıştırır: renk LUT'undan sonra görsel bir kez float32 diziye
+çevrilir, doygunluk/keskinlik/glow/grain karışımları dizide yerinde yapılır ve sonda bir kez uint8 görsele
+dönülür. Pillow'da kalanlar: 8 bitte zaten kesin olan LUT ve glow'un piramit blur'u (girdisi için ara görsel).
+
+Pillow arka ucuna göre fark: ara aşamalarda 8 bite yuvarlama yapılmadığı için kanal başına
+en fazla PARITY_TOLERANCE seviye (benchmark.py --parity ile ölçülür).
+"""
+import threading
+
+import numpy as np
+from PIL import Image
+
+import image_pipeline as ip
+from film_grain import grain_layer
+from profiling import profiled
+
+PARITY_TOLERANCE = 3        # Pillow arka ucuna göre izin verilen en büyük kanal farkı (0-255)
+
+# Thread başına yeniden kullanılan float32 tamponlar: 1080 px'de her yeni 14 MB'lık dizinin sayfa
+# hataları, üzerindeki aritmetikten pahalıya geliyor
+_local = threading.local()
+
+
+def _buffers(shape) -> list:
+    bufs = getattr(_local, "bufs", None)
+    if bufs is None or bufs[0].shape != shape:
+        bufs = _local.bufs = [np.empty(shape, dtype=np.float32) for _ in range(3)]
+        _local.luma = np.empty(shape[:2], dtype=np.float32)
+    return bufs
+
+
+def _to_image(arr: np.ndarray) -> Image.Image:
+    # Pillow'un blend'i gibi sınırla ve kes
+    np.clip(arr, 0.0, 255.0, out=arr)
+    return Image.fromarray(arr.astype(np.uint8))
+
+
+def _color(arr: np.ndarray, img: Image.Image, filter_name: str, brightness: float, contrast: float,
+           saturation: float) -> np.ndarray:
+    """
+    Filtre + parlaklık + kontrast tamsayı LUT'tur ve 8 bitte kesindir; Pillow'un point'i NumPy'ın
+    dizi indekslemesinden hızlı olduğu için uint8 görselde kalır. Doygunluk matrisi float32 dizide uygulanır.
+    """
+    np.copyto(arr, np.asarray(ip.apply_color(img, filter_name, brightness, contrast, 1.0)))
+    s = float(saturation)
+    curves = ip._filter_curves(filter_name)
+    if s != 1.0 and not (filter_name in ip._GRAY_FILTERS and curves[0] == curves[1] == curves[2]):
+        # ImageEnhance.Color: x -> L + s*(x - L)
+        luma = np.matmul(arr, np.asarray(ip._LUMA, dtype=np.float32), out=_local.luma)
+        luma *= 1.0 - s
+        arr *= s
+        arr += luma[..., None]
+    return arr
+
+
+def _sharpness(arr: np.ndarray, sharpness: float, tmp: np.ndarray, tmp2: np.ndarray) -> np.ndarray:
+    """
+    ImageEnhance.Sharpness: SMOOTH (3x3, merkez 5, diğerleri 1, /13) kopyasıyla doğrusal karışım.
+    Pillow gibi kenar pikselleri filtrelenmez.
+    """
+    h, w = arr.shape[:2]
+    if h < 3 or w < 3:
+        return arr
+    rows = np.add(arr[:, :-2], arr[:, 1:-1], out=tmp[:, :-2])
+    rows += arr[:, 2:]
+    smooth = np.add(rows[:-2], rows[1:-1], out=tmp2[:-2, :-2])
+    smooth += rows[2:]
+    inner = arr[1:-1, 1:-1]
+    # merkez ağırlığı 5: kutu toplamında zaten 1 kez var
+    smooth += np.multiply(inner, 4.0, out=tmp[:-2, :-2])
+    smooth *= 1.0 / 13.0
+    # smooth + f*(inner - smooth), yerinde
+    inner -= smooth
+    inner *= float(sharpness)
+    inner += smooth
+    return arr
+
+
+def _glow(arr: np.ndarray, strength: float, radius: float, tmp: np.ndarray) -> np.ndarray:
+    blurred = np.asarray(ip.pyramid_blur(_to_image(arr), radius))
+    # _to_image arr'ı yerinde 0-255'e sınırlar; Pillow da her aşamada sınırlıyor
+    # screen(a, b) - a = b * (255 - a) / 255, dolayısıyla blend: a += strength * b * (255 - a) / 255
+    np.subtract(255.0, arr, out=tmp)
+    tmp *= blurred
+    tmp *= strength / 255.0
+    arr += tmp
+    return arr
+
+
+def _grain(arr: np.ndarray, amount: float, size, scale: float, seed: int, tmp: np.ndarray) -> np.ndarray:
+    sigma = 5 + int(amount * 180)
+    noise = np.asarray(grain_layer(size, sigma, seed=seed, scale=scale))
+    arr *= 1.0 - amount
+    arr += np.multiply(noise, amount, out=tmp)
+    return arr
+
+
+@profiled("effects")
+def apply_stack(img: Image.Image, color_p: tuple, sharp_p: tuple, glow_p: tuple, grain_p: tuple) -> Image.Image:
+    """
+    color -> sharpness -> glow -> grain, tek dizi dönüşümüyle. Parametre tuple'ları
+    image_pipeline.build_stages'teki düzendedir; etkisiz aşamalar atlanır.
+    """
+    filter_name, brightness, contrast, saturation = color_p
+    sharpness = float(sharp_p[0])
+    glow_on, strength, radius, glow_scale = glow_p
+    grain_on, amount, grain_scale, seed = grain_p
+    color_id = filter_name == "Normal" and brightness == contrast == saturation == 1.0
+    radius = float(radius) * float(glow_scale)
+    glow_id = not glow_on or strength <= 0.0 or radius <= 0.0
+    grain_id = not grain_on or amount <= 0.0
+    if color_id and sharpness == 1.0 and glow_id and grain_id:
+        return img
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    arr, tmp, tmp2 = _buffers((img.height, img.width, 3))
+    if color_id:
+        np.copyto(arr, np.asarray(img))
+    else:
+        _color(arr, img, filter_name, brightness, contrast, saturation)
+    if sharpness != 1.0:
+        _sharpness(arr, sharpness, tmp, tmp2)
+    if not glow_id:
+        _glow(arr, float(strength), radius, tmp)
+    if not grain_id:
+        _grain(arr, float(amount), img.size, float(grain_scale), int(seed), tmp)
+    return _to_image(arr)
+
+
+# image_pipeline ile aynı imzalar (tek aşama; her biri kendi dönüşümünü yapar)
+_NO_COLOR = ("Normal", 1.0, 1.0, 1.0)
+_NO_SHARP = (1.0,)
+_NO_GLOW = (False, 0.0, 0.0, 1.0)
+_NO_GRAIN = (False, 0.0, 1.0, 0)
+
+
+def apply_color(img: Image.Image, filter_name: str, brightness: float, contrast: float, saturation: float) -> Image.Image:
+    color_p = (filter_name, float(brightness), float(contrast), float(saturation))
+    return apply_stack(img, color_p, _NO_SHARP, _NO_GLOW, _NO_GRAIN)
+
+
+def apply_sharpness(img: Image.Image, sharpness: float) -> Image.Image:
+    return apply_stack(img, _NO_COLOR, (float(sharpness),), _NO_GLOW, _NO_GRAIN)
+
+
+def apply_filter(img: Image.Image, filter_name: str) -> Image.Image:
+    return apply_color(img, filter_name, 1.0, 1.0, 1.0)
+
+
+def apply_adjustments(img: Image.Image, brightness: float, contrast: float, saturation: float, sharpness: float) -> Image.Image:
+    color_p = ("Normal", float(brightness), float(contrast), float(saturation))
+    return apply_stack(img, color_p, (float(sharpness),), _NO_GLOW, _NO_GRAIN)
+
+
+def apply_glow(img: Image.Image, enabled: bool, strength: float, radius: float, scale: float = 1.0) -> Image.Image:
+    glow_p = (bool(enabled), float(strength), float(radius), float(scale))
+    return apply_stack(img, _NO_COLOR, _NO_SHARP, glow_p, _NO_GRAIN)
+
+
+def apply_film_grain(img: Image.Image, enabled: bool, amount: float, scale: float = 1.0, seed: int = 0) -> Image.Image:
+    grain_p = (bool(enabled), float(amount), float(scale), int(seed))
+    return apply_stack(img, _NO_COLOR, _NO_SHARP, _NO_GLOW, grain_p)
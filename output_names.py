@@ -0,0 +1,64 @@
+"""
+Toplu render ve izleme modunun ortak çıktı adı kuralı: iki girdi asla aynı çıktı dosyasına yazmaz.
+
+Girdinin çıktısı normalde <ad><uzantı>'dır (alt klasörü korunur). Ad başka bir girdiye aitse
+<ad>_<kaynak uzantısı><uzantı> olur (a.png -> a_png.jpg), o da doluysa girdinin yol hash'i eklenir.
+İlk isteyen düz adı alır; izleme modu eşleşmeyi manifest'ten yeniden kurduğu için sahiplik
+yeniden başlatmada değişmez.
+"""
+import hashlib
+import os
+
+
+class OutputNames:
+    """
+    Girdi anahtarı -> çıktı adı (çıktı klasörüne göre) eşlemesi. Adlar os.path.normcase ile
+    karşılaştırılır; büyük/küçük harf duyarsız dosya sistemlerinde A.jpg ile a.jpg de çakışır.
+    """
+
+    def __init__(self, ext: str):
+        self.ext = ext
+        self._owner = {}            # normcase(çıktı) -> anahtar
+        self._output = {}           # anahtar -> çıktı
+
+    def seed(self, key: str, out: str) -> bool:
+        """Önceden bilinen eşleşmeyi (ör. manifest) kaydeder; ad başkasınınsa False."""
+        if os.path.normcase(out) in self._owner:
+            return False
+        self._owner[os.path.normcase(out)] = key
+        self._output[key] = out
+        return True
+
+    def get(self, key: str, rel: str = None) -> str:
+        """
+        `key` girdisinin çıktı adı; ilk çağrıda ayrılır. `rel` istenen ad (girdinin göreli yolu);
+        verilmezse anahtarın kendisi kullanılır.
+        """
+        out = self._output.get(key)
+        if out is not None and out.endswith(self.ext):
+            return out
+        out = next(c for c in self._candidates(key, key if rel is None else rel) if self._free(c, key))
+        self.release(key)
+        self._owner[os.path.normcase(out)] = key
+        self._output[key] = out
+        return out
+
+    def release(self, key: str):
+        """Girdi kalktı: adı başka bir girdiye verilebilir (çıktı dosyası yerinde kalır)."""
+        out = self._output.pop(key, None)
+        if out is not None and self._owner.get(os.path.normcase(out)) == key:
+            del self._owner[os.path.normcase(out)]
+
+    def _candidates(self, key: str, rel: str):
+        stem, src_ext = os.path.splitext(rel)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:8]
+        yield stem + self.ext
+        yield f"{stem}_{src_ext.lstrip('.').lower()}{self.ext}"
+        yield f"{stem}_{digest}{self.ext}"
+        n = 2
+        while True:     # hash'li ad da elle verilmiş bir dosyaya denk gelirse
+            yield f"{stem}_{digest}_{n}{self.ext}"
+            n += 1
+
+    def _free(self, out: str, key: str) -> bool:
+        return self._owner.get(os.path.normcase(out), key) == key
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+
+
+class Profiler:
+    """
+    Aşama sürelerini, piksel sayılarını ve önbellek isabetlerini toplar.
+    Olaylar sınırlı bir kuyrukta tutulur; Chrome trace-event JSON olarak dışa aktarılabilir
+    (chrome://tracing veya https://ui.perfetto.dev ile açılır).
+    """
+
+    def __init__(self, max_events: int = 200_000, window: int = 20):
+        self.events = deque(maxlen=max_events)   # (ad, kategori, başlangıç sn, süre sn, pid, tid, args)
+        self.counters = defaultdict(int)
+        self._recent = defaultdict(lambda: deque(maxlen=window))
+        self._thread_names = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, cat: str, start: float, dur: float, args: dict = None):
+        t = threading.current_thread()
+        with self._lock:
+            self.events.append((name, cat, start, dur, os.getpid(), t.ident, args))
+            self._recent[name].append(dur)
+            self._thread_names.setdefault((os.getpid(), t.ident), t.name)
+
+    def instant(self, name: str, cat: str, args: dict = None):
+        t = threading.current_thread()
+        with self._lock:
+            self.events.append((name, cat, time.perf_counter(), None, os.getpid(), t.ident, args))
+            self.counters[name] += 1
+            self._thread_names.setdefault((os.getpid(), t.ident), t.name)
+
+    def merge(self, events, thread_names=None):
+        """Başka süreçte (ör. batch worker) toplanan olayları ekler."""
+        with self._lock:
+            for ev in events:
+                self.events.append(ev)
+                if ev[3] is None:
+                    self.counters[ev[0]] += 1
+                else:
+                    self._recent[ev[0]].append(ev[3])
+            for key, name in thread_names or ():
+                self._thread_names.setdefault(tuple(key), name)
+
+    def drain(self):
+        """Olayları ve thread adlarını döndürüp temizler (worker -> ana süreç aktarımı için)."""
+        with self._lock:
+            events = list(self.events)
+            names = list(self._thread_names.items())
+            self.events.clear()
+        return events, names
+
+    def rolling_ms(self) -> dict:
+        """ad -> son `window` çalıştırmanın ortalama süresi (ms)."""
+        with self._lock:
+            return {name: 1000 * sum(d) / len(d) for name, d in self._recent.items() if d}
+
+    def cache_ratio(self):
+        hits = self.counters.get("cache_hit", 0)
+        total = hits + self.counters.get("cache_miss", 0)
+        return hits / total if total else None
+
+    def status_line(self, names) -> str:
+        """Durum çubuğu için kısa özet: 'color 2.1 · glow 38.0 · ... ms | önbellek %75'."""
+        ms = self.rolling_ms()
+        parts = [f"{name} {ms[name]:.1f}" for name in names if name in ms]
+        line = " · ".join(parts) + " ms" if parts else "ölçüm yok"
+        ratio = self.cache_ratio()
+        if ratio is not None:
+            line += f"  |  önbellek %{ratio * 100:.0f}"
+        return line
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self._recent.clear()
+
+    def chrome_trace(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+            names = dict(self._thread_names)
+        t0 = min((ev[2] for ev in events), default=0.0)
+        out = []
+        for (pid, tid), tname in names.items():
+            out.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+        for name, cat, start, dur, pid, tid, args in events:
+            ev = {"name": name, "cat": cat, "ts": (start - t0) * 1e6, "pid": pid, "tid": tid}
+            if dur is None:
+                ev.update(ph="i", s="t")
+            else:
+                ev.update(ph="X", dur=dur * 1e6)
+            if args:
+                ev["args"] = args
+            out.append(ev)
+        return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+
+# Kapalıyken tüm kancalar yalnızca bu değişkeni okur
+_active = None
+
+
+def enable(profiler: Profiler = None) -> Profiler:
+    global _active
+    _active = profiler or _active or Profiler()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    return _active
+
+
+def _pixels(obj):
+    size = getattr(obj, "size", None)
+    if isinstance(size, tuple) and len(size) == 2:
+        return size[0] * size[1]
+    return None
+
+
+class _Span:
+    __slots__ = ("prof", "name", "cat", "args", "start")
+
+    def __init__(self, prof, name, cat, args):
+        self.prof, self.name, self.cat, self.args = prof, name, cat, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.prof.record(self.name, self.cat, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, cat: str = "stage", **args):
+    """with span("önizleme"): ... — profil kapalıyken paylaşılan boş bağlam döner."""
+    prof = _active
+    if prof is None:
+        return _NULL_SPAN
+    return _Span(prof, name, cat, args or None)
+
+
+def instant(name: str, cat: str = "event", **args):
+    prof = _active
+    if prof is not None:
+        prof.instant(name, cat, args or None)
+
+
+def profiled(name: str, cat: str = "stage"):
+    """Fonksiyon süresini `name` adıyla kaydeder; ilk argüman görselse piksel sayısı da yazılır."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            prof = _active
+            if prof is None:
+                return fn(*args, **kwargs)
+            first = args[0] if args else next(iter(kwargs.values()), None)
+            px = _pixels(first)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.record(name, cat, start, time.perf_counter() - start,
+                            {"pixels": px} if px is not None else None)
+        return wrapper
+    return deco
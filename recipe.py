@@ -0,0 +1,203 @@
+import json
+import math
+import re
+
+from constants import DEFAULT_SETTINGS, FILTERS, TEXT_POSITIONS
+from image_pipeline import build_stages
+from stage_cache import run_stages
+
+RECIPE_FORMAT = "instagram-post-recipe"
+RECIPE_VERSION = 1
+
+# Arayüz kaydırıcılarından (24-140, 2-30) geniş tutulur; tarif dosyasındaki büyük bir değer
+# font/underline çiziminde gigabaytlarca bellek istemesin diye üstten sınırlanır
+TEXT_SIZE_MAX = 500
+UNDERLINE_THICKNESS_MAX = 100
+
+_HEX = re.compile(r"^#?[0-9a-fA-F]{6}$")
+
+
+class RecipeError(ValueError):
+    """Tarif dosyası okunamadı ya da ayarlardan biri geçersiz."""
+
+
+def _number(lo=None, hi=None):
+    def check(key, v):
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            raise RecipeError(f"{key}: sayı olmalı")
+        # json.loads NaN/Infinity'yi kabul eder; NaN her karşılaştırmada False döndüğü için aralık kontrolünü geçerdi
+        try:
+            finite = math.isfinite(v)
+        except OverflowError:   # float'a sığmayan tamsayı
+            finite = False
+        if not finite:
+            raise RecipeError(f"{key}: sonlu bir sayı olmalı")
+        if (lo is not None and v < lo) or (hi is not None and v > hi):
+            raise RecipeError(f"{key}: {lo} ile {hi if hi is not None else '∞'} arasında olmalı")
+        return float(v)
+    return check
+
+
+def _integer(lo=None, hi=None):
+    def check(key, v):
+        if isinstance(v, bool) or not isinstance(v, int):
+            raise RecipeError(f"{key}: tamsayı olmalı")
+        if (lo is not None and v < lo) or (hi is not None and v > hi):
+            if hi is None:
+                raise RecipeError(f"{key}: en az {lo} olmalı")
+            raise RecipeError(f"{key}: {lo} ile {hi} arasında olmalı")
+        return int(v)
+    return check
+
+
+def _boolean(key, v):
+    if not isinstance(v, bool):
+        raise RecipeError(f"{key}: true/false olmalı")
+    return v
+
+
+def _string(key, v):
+    if not isinstance(v, str):
+        raise RecipeError(f"{key}: metin olmalı")
+    return v
+
+
+def _choice(options):
+    def check(key, v):
+        if v not in options:
+            raise RecipeError(f"{key}: şunlardan biri olmalı: {', '.join(options)}")
+        return v
+    return check
+
+
+def _hex_color(key, v):
+    if not isinstance(v, str) or not _HEX.match(v.strip()):
+        raise RecipeError(f"{key}: renk #RRGGBB olmalı")
+    return v.strip()
+
+
+# Ayar adı -> doğrulayıcı. Anahtarlar DEFAULT_SETTINGS ile aynıdır.
+_FIELDS = {
+    "filter": _choice(FILTERS),
+    "brightness": _number(0.0),
+    "contrast": _number(0.0),
+    "saturation": _number(0.0),
+    "sharpness": _number(0.0),
+    "glow_on": _boolean,
+    "glow_strength": _number(0.0, 1.0),
+    "glow_radius": _number(0.0, 200.0),
+    "grain_on": _boolean,
+    "grain_amount": _number(0.0, 1.0),
+    "grain_seed": _integer(),
+    "text_on": _boolean,
+    "text": _string,
+    "text_pos": _choice(TEXT_POSITIONS),
+    "text_size": _integer(1, TEXT_SIZE_MAX),
+    "text_color": _hex_color,
+    "underline_on": _boolean,
+    "underline_color": _hex_color,
+    "underline_thickness": _integer(1, UNDERLINE_THICKNESS_MAX),
+    "underline_seed": _integer(),
+}
+
+
+def validate(settings: dict) -> dict:
+    """Eksik ayarları varsayılanlarla tamamlar, türleri normalize eder; hatada RecipeError."""
+    if not isinstance(settings, dict):
+        raise RecipeError("Ayarlar bir JSON nesnesi olmalı")
+    unknown = sorted(set(settings) - set(_FIELDS))
+    if unknown:
+        raise RecipeError(f"Bilinmeyen ayar: {', '.join(unknown)}")
+    out = dict(DEFAULT_SETTINGS)
+    for key, value in settings.items():
+        out[key] = _FIELDS[key](key, value)
+    return out
+
+
+def recipe_to_json(settings: dict) -> str:
+    data = {"format": RECIPE_FORMAT, "version": RECIPE_VERSION, "settings": validate(settings)}
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def recipe_from_json(text: str) -> dict:
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise RecipeError(f"Geçersiz JSON: {e}") from e
+    if not isinstance(data, dict) or data.get("format") != RECIPE_FORMAT:
+        raise RecipeError("Bu dosya bir post tarifi değil")
+    if data.get("version") != RECIPE_VERSION:
+        raise RecipeError(f"Desteklenmeyen tarif sürümü: {data.get('version')}")
+    return validate(data.get("settings", {}))
+
+
+def save_recipe(path: str, settings: dict):
+    text = recipe_to_json(settings)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+
+
+def load_recipe(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise RecipeError(f"Tarif okunamadı: {e}") from e
+    return recipe_from_json(text)
+
+
+# Aşama parametreleri build_stages'teki tuple düzenindedir
+def _is_identity(name: str, params: tuple) -> bool:
+    if name == "color":
+        filter_name, brightness, contrast, saturation = params
+        return filter_name == "Normal" and brightness == contrast == saturation == 1.0
+    if name == "sharpness":
+        return params[0] == 1.0
+    if name == "glow":
+        enabled, strength, radius, _scale = params
+        return not enabled or strength <= 0.0 or radius <= 0.0
+    if name == "grain":
+        enabled, amount, _scale, _seed = params
+        return not enabled or amount <= 0.0
+    if name == "text":
+        return not params[0] or not (params[1] or "").strip()
+    if name == "effects":
+        # NumPy arka ucu: color/sharpness/glow/grain tek aşamada
+        return all(_is_identity(sub, p) for sub, p in zip(("color", "sharpness", "glow", "grain"), params))
+    return False
+
+
+class Plan:
+    """
+    Derlenmiş tarif: yalnızca görüntüyü gerçekten değiştiren aşamalar, parametreleri bağlanmış halde.
+    Bir kez derlenip binlerce görselde kullanılabilir; run() doğrulama ya da ayar ayrıştırma yapmaz.
+    """
+
+    def __init__(self, settings: dict, stages: list, scale: float = 1.0):
+        self.settings = settings
+        self.stages = stages
+        self.scale = scale
+
+    @property
+    def stage_names(self) -> list[str]:
+        return [name for name, _params, _fn in self.stages]
+
+    def run(self, img, base_key=None, cache=None, should_cancel=None):
+        return run_stages(img, base_key, self.stages, cache=cache, should_cancel=should_cancel)
+
+    def __repr__(self):
+        return f"Plan({' -> '.join(self.stage_names) or 'kopya'}, scale={self.scale:g})"
+
+
+def compile_plan(settings: dict, scale: float = 1.0, underline_overlay_provider=None, check: bool = True) -> Plan:
+    """
+    Ayarları bir Plan'a derler. Etkisiz aşamalar (parlaklık 1.0, glow gücü 0, grain kapalı, boş yazı...)
+    plana girmez. Filtre, parlaklık, kontrast ve doygunluk zaten tek "color" aşamasında (tek LUT
+    + gerekirse tek renk matrisi) birleşik uygulanır.
+    check=False: ayarlar zaten doğrulanmış (ör. worker'a validate() çıktısı gönderildi) ya da
+    arayüzden geliyor; geçersiz renkler image_pipeline'da beyaza düşer.
+    """
+    if check:
+        settings = validate(settings)
+    stages = build_stages(settings, underline_overlay_provider=underline_overlay_provider, scale=scale)
+    return Plan(settings, [st for st in stages if not _is_identity(st[0], st[1])], float(scale))
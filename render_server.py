@@ -0,0 +1,324 @@
+"""
+Masaüstü oturumu olmadan post render eden yerel HTTP servisi (yalnızca standart kütüphane + Pillow).
+
+    python render_server.py --port 8765
+
+    curl --data-binary @foto.jpg -H "X-Recipe: $(tr -d '\\n' < tarif.json)" \\
+         "http://127.0.0.1:8765/render?format=jpg&target=feed" -o post.jpg
+    curl http://127.0.0.1:8765/metrics
+
+POST /render gövdesi ham görsel baytlarıdır. Tarif X-Recipe başlığında tek satırlık JSON olarak
+(tarif dosyası ya da yalnızca ayar sözlüğü) verilir; verilmezse varsayılan ayarlar kullanılır.
+Sorgu parametreleri: format (jpg/webp/png), target (feed/portrait/story/thumb),
+target_kb (isteğe bağlı boyut bütçesi). Yanıttaki X-Render-Source: render / coalesced / cache.
+"""
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import signal
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from constants import EXPORT_TARGETS
+from recipe import RECIPE_FORMAT, RecipeError, recipe_from_json, validate
+
+CONTENT_TYPES = {"jpg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+MAX_UPLOAD = 64 * 1024 * 1024
+
+
+def _render_bytes(data: bytes, settings: dict, fmt: str, target: str, target_kb):
+    """Worker süreci: yükleme -> post -> kodlanmış bayt. Tk hiç içe aktarılmaz."""
+    from encoder import FORMATS, encode, encode_to_budget
+    from multi_export import render_targets
+
+    img = render_targets(io.BytesIO(data), settings, {target: EXPORT_TARGETS[target]}, workers=1, check=False)[target]
+    pil_fmt = FORMATS["." + fmt]
+    if target_kb:
+        return encode_to_budget(img, target_kb, pil_fmt)["data"]
+    return encode(img, pil_fmt)
+
+
+def _init_worker():
+    # Ctrl+C yalnızca ana süreci durdursun; worker'lar havuz kapanınca çıkar
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # İlk isteğin gecikmesine modül yükleme ve font taraması eklenmesin
+    import image_pipeline
+    image_pipeline.get_font(72)
+
+
+class ResultCache:
+    """Kodlanmış çıktılar için bayt sınırlı LRU."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _k, old = self._items.popitem(last=False)
+                self._bytes -= len(old)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class Metrics:
+    def __init__(self, window: int = 10_000):
+        self.started = time.time()
+        self.counts = {"requests": 0, "renders": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+        self._latencies = deque(maxlen=window)     # (bitiş zamanı, sn)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append((time.time(), seconds))
+
+    def snapshot(self, in_flight: int) -> dict:
+        now = time.time()
+        with self._lock:
+            counts = dict(self.counts)
+            lat = sorted(s for _t, s in self._latencies)
+            last_min = sum(1 for t, _s in self._latencies if now - t <= 60)
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 1) if lat else None
+
+        uptime = now - self.started
+        return dict(
+            counts,
+            in_flight=in_flight,
+            uptime_s=round(uptime, 1),
+            latency_ms={"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+                        "mean": round(statistics.fmean(lat) * 1000, 1) if lat else None},
+            throughput_rps_60s=round(last_min / min(60.0, max(uptime, 1e-9)), 2),
+        )
+
+
+class RenderService:
+    """
+    HTTP'den bağımsız çekirdek: aynı anda gelen özdeş istekler (görsel hash'i + parametreler)
+    tek bir render'a bağlanır, bitmiş çıktılar LRU'da tutulur, render'lar süreç havuzunda çalışır.
+    """
+
+    def __init__(self, workers: int = None, cache_mb: float = 256):
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker)
+        self.cache = ResultCache(cache_mb * 1024 * 1024)
+        self.metrics = Metrics()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def request_key(data: bytes, settings: dict, fmt: str, target: str, target_kb) -> str:
+        h = hashlib.sha256(data)
+        h.update(json.dumps([settings, fmt, target, target_kb], sort_keys=True, ensure_ascii=False).encode())
+        return h.hexdigest()
+
+    def render(self, data: bytes, settings: dict, fmt: str = "jpg", target: str = "feed", target_kb=None):
+        """(bayt, kaynak) döndürür; kaynak 'cache', 'coalesced' veya 'render'. settings doğrulanmış olmalı."""
+        key = self.request_key(data, settings, fmt, target, target_kb)
+        # Önbellek ve uçuştaki işler aynı kilit altında bakılır: _finish sonucu önbelleğe koyup işi
+        # kaldırırken araya giren özdeş istek ikisini de kaçırıp ikinci kez render etmez
+        with self._lock:
+            cached = self.cache.get(key)
+            fut = None if cached is not None else self._inflight.get(key)
+            source = "coalesced"
+            if cached is None and fut is None:
+                fut = self.pool.submit(_render_bytes, data, settings, fmt, target, target_kb)
+                self._inflight[key] = fut
+                source = "render"
+        if cached is not None:
+            self.metrics.incr("cache_hits")
+            return cached, "cache"
+        if source == "render":
+            # Kilidin dışında: iş çoktan bittiyse geri çağırma hemen bu thread'de çalışır
+            fut.add_done_callback(lambda f, key=key: self._finish(key, f))
+        self.metrics.incr("renders" if source == "render" else "coalesced")
+        return fut.result(), source
+
+    def _finish(self, key, fut):
+        with self._lock:
+            if not fut.cancelled() and fut.exception() is None:
+                self.cache.put(key, fut.result())
+            self._inflight.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_target_kb(text):
+    """?target_kb= değeri: boşsa None; sonlu ve sıfırdan büyük olmalı (yoksa ValueError -> 400)."""
+    if not text:
+        return None
+    try:
+        kb = float(text)
+    except ValueError:
+        raise ValueError(f"target_kb sayı olmalı: {text!r}") from None
+    if not math.isfinite(kb) or kb <= 0:
+        raise ValueError(f"target_kb sıfırdan büyük, sonlu bir sayı olmalı: {text!r}")
+    return kb
+
+
+def parse_recipe(header) -> dict:
+    """X-Recipe: tarif dosyası JSON'u ya da yalnızca ayar sözlüğü. Boşsa varsayılan ayarlar."""
+    if not header:
+        return validate({})
+    try:
+        # http.server başlıkları latin-1 çözer; UTF-8 gönderilen "Sıcak" gibi değerleri geri kur
+        header = header.encode("iso-8859-1").decode("utf-8")
+    except UnicodeError:
+        pass
+    try:
+        data = json.loads(header)
+    except ValueError as e:
+        raise RecipeError(f"X-Recipe geçersiz JSON: {e}") from e
+    if isinstance(data, dict) and data.get("format") == RECIPE_FORMAT:
+        return recipe_from_json(header)
+    return validate(data)
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    server_version = "InstagramPostRender/1.0"
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, obj):
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def do_GET(self):
+        service = self.server.service
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send(200, b"ok", "text/plain")
+        elif path == "/metrics":
+            snap = service.metrics.snapshot(service.in_flight())
+            snap["cache"] = service.cache.stats()
+            self._json(200, snap)
+        else:
+            self._json(404, {"error": "bulunamadı"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/render":
+            self._json(404, {"error": "bulunamadı"})
+            return
+        service = self.server.service
+        service.metrics.incr("requests")
+        t0 = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0:
+                raise ValueError("Gövde boş: görsel baytlarını gönderin")
+            if length > MAX_UPLOAD:
+                service.metrics.incr("errors")
+                self._json(413, {"error": f"En fazla {MAX_UPLOAD // (1024 * 1024)} MB"})
+                return
+            data = self.rfile.read(length)
+
+            q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            fmt = q.get("format", "jpg").lower()
+            if fmt == "jpeg":
+                fmt = "jpg"
+            if fmt not in CONTENT_TYPES:
+                raise ValueError(f"format: {', '.join(CONTENT_TYPES)}")
+            target = q.get("target", "feed")
+            if target not in EXPORT_TARGETS:
+                raise ValueError(f"target: {', '.join(EXPORT_TARGETS)}")
+            target_kb = parse_target_kb(q.get("target_kb"))
+            settings = parse_recipe(self.headers.get("X-Recipe"))
+        except (ValueError, RecipeError) as e:
+            service.metrics.incr("errors")
+            self._json(400, {"error": str(e)})
+            return
+
+        try:
+            body, source = service.render(data, settings, fmt, target, target_kb)
+        except Exception as e:
+            # Bozuk/tanınmayan görsel gibi hatalar worker'dan istisna olarak gelir
+            service.metrics.incr("errors")
+            self._json(422, {"error": f"{type(e).__name__}: {e}"})
+            return
+        elapsed = time.perf_counter() - t0
+        service.metrics.observe(elapsed)
+        self._send(200, body, CONTENT_TYPES[fmt], {"X-Render-Source": source, "X-Render-Ms": f"{elapsed * 1000:.1f}"})
+
+    def log_message(self, fmt, *args):
+        if not self.server.quiet:
+            super().log_message(fmt, *args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, workers: int = None, cache_mb: float = 256,
+                quiet: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), RenderHandler)
+    server.daemon_threads = True
+    server.service = RenderService(workers=workers, cache_mb=cache_mb)
+    server.quiet = quiet
+    return server
+
+
+def _parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Post render eden yerel HTTP servisi (Tk gerekmez).")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("-j", "--workers", type=int, default=None, help="Render süreç sayısı (varsayılan: çekirdek sayısı)")
+    p.add_argument("--cache-mb", type=float, default=256, help="Çıktı önbelleği sınırı (MB)")
+    p.add_argument("-q", "--quiet", action="store_true", help="İstek günlüğünü yazdırma")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    server = make_server(args.host, args.port, args.workers, args.cache_mb, args.quiet)
+    print(f"Dinleniyor: http://{args.host}:{server.server_address[1]}  (POST /render, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import queue
+import threading
+
+from stage_cache import RenderCancelled
+
+
+class RenderWorker:
+    """
+    Render işlerini tek bir arka plan thread'inde çalıştırır; Tk ana thread'i hiç bloklanmaz.
+
+    Bekleyen iş her zaman en son gönderilendir (latest-wins): yeni bir submit() sıradaki
+    eski işin yerine geçer, çalışmakta olan iş ise aşama aralarında bayat olduğunu
+    görüp RenderCancelled ile bırakılır. Sonuçlar poll() ile ana thread'den alınır.
+    """
+
+    def __init__(self, name: str = "render-worker"):
+        self._cond = threading.Condition()
+        self._pending = None            # (job_id, tag, job)
+        self._latest_id = 0
+        self._stopped = False
+        self._results = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, job, tag=None) -> int:
+        """job(should_cancel) -> sonuç. Dönen id, poll() sonuçlarını eşlemek içindir."""
+        with self._cond:
+            self._latest_id += 1
+            self._pending = (self._latest_id, tag, job)
+            self._cond.notify()
+            return self._latest_id
+
+    def cancel(self) -> int:
+        """Bekleyen işi siler, çalışanı bayat sayar. Bundan önceki tüm id'lerden büyük bir id döndürür."""
+        with self._cond:
+            self._latest_id += 1
+            self._pending = None
+            return self._latest_id
+
+    def is_stale(self, job_id: int) -> bool:
+        return job_id != self._latest_id
+
+    def poll(self):
+        """Biten işleri [(job_id, tag, sonuç, hata), ...] olarak döndürür (ana thread'den çağrılır)."""
+        out = []
+        while True:
+            try:
+                out.append(self._results.get_nowait())
+            except queue.Empty:
+                return out
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job_id, tag, job = self._pending
+                self._pending = None
+
+            try:
+                result = job(lambda: self.is_stale(job_id))
+            except RenderCancelled:
+                continue
+            except Exception as e:
+                self._results.put((job_id, tag, None, e))
+                continue
+            self._results.put((job_id, tag, result, None))
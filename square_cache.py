@@ -0,0 +1,323 @@
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from constants import INSTAGRAM_SIZE, GALLERY_THUMB, SQUARE_CACHE_MB
+from encoder import write_bytes
+from ingest import load_square
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+INDEX_VERSION = 1
+INDEX_MAX_FILES = 50_000    # index.json'da tutulan en fazla kayıt; fazlası en eski eklenenden atılır
+
+
+def default_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "instagram_post_maker", "squares")
+
+
+def list_images(folder: str) -> list[str]:
+    names = sorted(n for n in os.listdir(folder) if os.path.splitext(n)[1].lower() in IMAGE_EXTS)
+    return [os.path.join(folder, n) for n in names]
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SquareCache:
+    """
+    Kırpılmış kareler ve galeri küçük görselleri için disk önbelleği.
+    Anahtar = dosya içeriğinin SHA-256'sı + mtime + kırpma boyutu; kareler ham PPM olarak yazılır,
+    okunurken JPEG çözme/kırpma yapılmaz. Toplam boyut `max_bytes`'ı aşınca en uzun süredir
+    kullanılmayan dosya silinir (kullanım sırası dosya mtime'ında tutulur, oturumlar arası korunur).
+
+    index.json (yol, boyut, mtime) -> içerik hash'ini ve orijinal boyutu saklar; klasör yeniden
+    açıldığında dosyalar tekrar hash'lenmez. Silinen/taşınan dosyaların kayıtları flush()'ta atılır.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = SQUARE_CACHE_MB * 1024 * 1024,
+                 size=INSTAGRAM_SIZE, thumb_size: int = GALLERY_THUMB):
+        self.root = root or default_cache_dir()
+        self.max_bytes = int(max_bytes)
+        self.size = tuple(size)
+        self.thumb_size = int(thumb_size)
+        self._lock = threading.Lock()
+        self._entries = None        # dosya adı -> bayt, eskiden yeniye
+        self._bytes = 0
+        self._index = None          # yol -> [boyut, mtime_ns, hash, [w, h] | None]
+        self._index_dirty = False
+
+    # --- index ---
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._index = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    def _prune(self):
+        # stat kilit dışında: binlerce kayıtta render/küçük resim thread'leri beklemesin
+        with self._lock:
+            if self._index is None:
+                return
+            paths = list(self._index)
+        gone = [p for p in paths if not os.path.isfile(p)]
+        with self._lock:
+            for p in gone:
+                self._index.pop(p, None)
+            extra = len(self._index) - INDEX_MAX_FILES
+            for p in list(itertools.islice(self._index, max(0, extra))):
+                del self._index[p]
+            if gone or extra > 0:
+                self._index_dirty = True
+
+    def flush(self):
+        """Yok olan dosyaların kayıtlarını atıp index.json'u yazar (kapanışta ve galeri dolunca çağrılır)."""
+        self._prune()
+        with self._lock:
+            if not self._index_dirty:
+                return
+            text = json.dumps({"version": INDEX_VERSION, "files": self._index}, ensure_ascii=False)
+            self._index_dirty = False
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            write_bytes(self._index_path(), text.encode("utf-8"))
+        except OSError:
+            pass
+
+    def _identify(self, path: str):
+        """(anahtar, kayıt) — kayıt index'teki liste; dosya değiştiyse yeniden hash'lenir."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            self._load_index()
+            rec = self._index.get(path)
+        if rec is None or rec[0] != st.st_size or rec[1] != st.st_mtime_ns:
+            rec = [st.st_size, st.st_mtime_ns, file_hash(path), None]
+            with self._lock:
+                self._index[path] = rec
+                self._index_dirty = True
+        w, h = self.size
+        return f"{rec[2][:40]}_{st.st_mtime_ns}_{w}x{h}", rec
+
+    # --- LRU ---
+
+    def _scan(self):
+        if self._entries is not None:
+            return
+        found = []
+        try:
+            with os.scandir(self.root) as it:
+                for e in it:
+                    if e.is_file() and e.name.endswith((".ppm", ".jpg")):
+                        st = e.stat()
+                        found.append((st.st_mtime, e.name, st.st_size))
+        except OSError:
+            pass
+        found.sort()
+        self._entries = OrderedDict((name, nbytes) for _t, name, nbytes in found)
+        self._bytes = sum(self._entries.values())
+
+    def _open(self, name: str):
+        path = os.path.join(self.root, name)
+        with self._lock:
+            self._scan()
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with Image.open(path) as im:
+                im.load()
+                img = im.convert("RGB") if im.mode != "RGB" else im.copy()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._bytes -= self._entries.pop(name, 0)
+            return None
+        return img
+
+    def _store(self, name: str, img: Image.Image, fmt: str, **params):
+        buf = io.BytesIO()
+        img.save(buf, fmt, **params)
+        data = buf.getvalue()
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            write_bytes(os.path.join(self.root, name), data)
+        except OSError:
+            return      # önbellek yazılamıyorsa (salt okunur/dolu disk) önbelleksiz devam
+        with self._lock:
+            self._scan()
+            self._bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old, nbytes = self._entries.popitem(last=False)
+                self._bytes -= nbytes
+                try:
+                    os.remove(os.path.join(self.root, old))
+                except OSError:
+                    pass
+
+    # --- genel ---
+
+    def square(self, path: str, stats: dict = None) -> Image.Image:
+        """
+        load_square(path, size) ile aynı kare; önbellekte varsa orijinal hiç çözülmez.
+        stats verilirse source_size ve cached (bool) yazılır.
+        """
+        key, rec = self._identify(path)
+        img = self._open(key + ".ppm")
+        cached = img is not None
+        if not cached:
+            info = {}
+            img = load_square(path, self.size, stats=info)
+            self._store(key + ".ppm", img, "PPM")
+            with self._lock:
+                rec[3] = list(info["source_size"])
+                self._index_dirty = True
+            if stats is not None:
+                stats.update(info)
+        if stats is not None:
+            stats["source_size"] = tuple(rec[3]) if rec[3] else img.size
+            stats["cached"] = cached
+        return img
+
+    def thumbnail(self, path: str) -> Image.Image:
+        key, _rec = self._identify(path)
+        name = f"{key}_{self.thumb_size}t.jpg"
+        thumb = self._open(name)
+        if thumb is None:
+            side = self.thumb_size
+            thumb = self.square(path).resize((side, side), Image.LANCZOS, reducing_gap=2.0)
+            self._store(name, thumb, "JPEG", quality=85)
+        return thumb
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            self._scan()
+            return self._bytes
+
+
+class ThumbnailLoader:
+    """
+    Küçük görselleri thread havuzunda üretir. Sıra önceliklidir: load() klasör sırasını verir,
+    prioritize() o an görünen dosyaları öne alır. Sonuçlar poll() ile ana thread'den alınır
+    (RenderWorker gibi); her load() yeni bir nesil başlatır, eski nesil sonuçları atılır.
+    open() seçilen dosyanın tam karesini (hash + çözme) aynı thread'lerde, her şeyden önce hazırlar;
+    sonucu poll_opened() verir.
+    """
+
+    def __init__(self, cache: SquareCache, workers: int = None):
+        self.cache = cache
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._done = set()
+        self._gen = 0
+        self._stopped = False
+        self._results = queue.SimpleQueue()
+        self._opened = queue.SimpleQueue()
+        n = workers or min(4, os.cpu_count() or 1)
+        self._threads = [threading.Thread(target=self._run, name=f"thumbs-{i}", daemon=True) for i in range(n)]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def generation(self) -> int:
+        return self._gen
+
+    def load(self, paths) -> int:
+        with self._cond:
+            self._gen += 1
+            self._heap = [(i, next(self._seq), self._gen, p, "thumb") for i, p in enumerate(paths)]
+            heapq.heapify(self._heap)
+            self._done = set()
+            self._cond.notify_all()
+            return self._gen
+
+    def prioritize(self, paths):
+        with self._cond:
+            for p in paths:
+                if p not in self._done:
+                    heapq.heappush(self._heap, (-1, next(self._seq), self._gen, p, "thumb"))
+            self._cond.notify_all()
+
+    def open(self, path: str):
+        with self._cond:
+            heapq.heappush(self._heap, (-2, next(self._seq), self._gen, path, "square"))
+            self._cond.notify_all()
+
+    def poll(self):
+        """[(nesil, yol, küçük görsel, hata), ...]"""
+        out = []
+        while True:
+            try:
+                out.append(self._results.get_nowait())
+            except queue.Empty:
+                return out
+
+    def poll_opened(self):
+        """[(yol, kare, stats, hata), ...]"""
+        out = []
+        while True:
+            try:
+                out.append(self._opened.get_nowait())
+            except queue.Empty:
+                return out
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._heap = []
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    while self._heap and (self._heap[0][2] != self._gen or
+                                          (self._heap[0][4] == "thumb" and self._heap[0][3] in self._done)):
+                        heapq.heappop(self._heap)
+                    if self._heap:
+                        break
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                _prio, _seq, gen, path, kind = heapq.heappop(self._heap)
+                if kind == "thumb":
+                    self._done.add(path)
+            if kind == "square":
+                stats = {}
+                try:
+                    self._opened.put((path, self.cache.square(path, stats=stats), stats, None))
+                except Exception as e:
+                    self._opened.put((path, None, None, e))
+                continue
+            try:
+                self._results.put((gen, path, self.cache.thumbnail(path), None))
+            except Exception as e:
+                self._results.put((gen, path, None, e))
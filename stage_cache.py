@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+import profiling
+
+
+class RenderCancelled(Exception):
+    """Daha yeni bir render isteği geldiği için yarıda bırakılan render."""
+
+
+def image_nbytes(img: Image.Image) -> int:
+    w, h = img.size
+    return w * h * len(img.getbands())
+
+
+class StageCache:
+    """
+    Pipeline aşamalarının çıktılarını saklar. Anahtar = (aşama adı, aşama parametreleri, üst aşamanın anahtarı);
+    böylece bir slider değişince yalnızca parametresi değişen ilk aşamadan itibaren yeniden hesaplanır.
+
+    Her aşama için en fazla `per_stage` varyant tutulur (ileri-geri sürüklemede hızlı dönüş için),
+    toplam bellek `max_bytes`'ı aşarsa en eski kullanılan giriş atılır (LRU).
+    Aynı görsel nesnesi birden çok girişte tutulabilir (no-op aşama üst aşamanın görselini döndürür);
+    bellek her farklı görsel için bir kez sayılır ve son giriş atılana kadar düşülmez.
+    """
+
+    def __init__(self, max_bytes: int = 192 * 1024 * 1024, per_stage: int = 4):
+        self.max_bytes = int(max_bytes)
+        self.per_stage = int(per_stage)
+        self._entries = OrderedDict()   # key -> (stage, img)
+        self._refs = {}                 # id(img) -> [giriş sayısı, nbytes]
+        self._bytes = 0
+        self._lock = threading.Lock()   # render thread'i ve UI thread'i aynı anda erişebilir
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, stage: str, key, img: Image.Image):
+        nbytes = image_nbytes(img)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (stage, img)
+            ref = self._refs.get(id(img))
+            if ref is None:
+                # giriş görseli tuttuğu sürece id() başka bir nesneye verilemez
+                self._refs[id(img)] = [1, nbytes]
+                self._bytes += nbytes
+            else:
+                ref[0] += 1
+            self._evict(stage)
+
+    def count(self, hit: bool):
+        # render ve şerit thread'leri aynı önbelleği kullanır; sayaçlar da kilit altında artar
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def discard(self, stage: str):
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e[0] == stage]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refs.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _drop(self, key):
+        _stage, img = self._entries.pop(key)
+        ref = self._refs[id(img)]
+        ref[0] -= 1
+        if ref[0] == 0:
+            del self._refs[id(img)]
+            self._bytes -= ref[1]
+
+    def _evict(self, stage: str):
+        same = [k for k, e in self._entries.items() if e[0] == stage]
+        for key in same[:max(0, len(same) - self.per_stage)]:
+            self._drop(key)
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+
+def run_stages(img: Image.Image, base_key, stages, cache: StageCache = None, should_cancel=None) -> Image.Image:
+    """
+    stages: [(ad, parametreler, fn(img)->img), ...] sırasıyla uygulanır.
+    Önbellekte bulunan en son aşamadan devam edilir; girdi görseli değiştirilmez.
+    should_cancel() her aşamadan önce sorulur; True dönerse RenderCancelled fırlatılır.
+    """
+    keys = []
+    key = base_key
+    for name, params, _fn in stages:
+        key = (name, params, key)
+        keys.append(key)
+
+    start = 0
+    if cache is not None:
+        for i in range(len(stages) - 1, -1, -1):
+            cached = cache.get(keys[i])
+            if cached is not None:
+                cache.count(hit=True)
+                profiling.instant("cache_hit", "cache", stage=stages[i][0])
+                img = cached
+                start = i + 1
+                break
+
+    for i in range(start, len(stages)):
+        if should_cancel is not None and should_cancel():
+            raise RenderCancelled()
+        name, _params, fn = stages[i]
+        img = fn(img)
+        if cache is not None:
+            cache.count(hit=False)
+            profiling.instant("cache_miss", "cache", stage=name)
+            cache.put(name, keys[i], img)
+    return img
@@ -0,0 +1,66 @@
+import tkinter as tk
+
+from strip_render import StripRenderer
+
+
+class StripPanel(tk.Frame):
+    """
+    Yatay karşılaştırma şeridi: her karo bir filtre ya da tarif. Render StripRenderer'da,
+    arka planda; tıklanan karonun adı on_pick(ad) ile bildirilir.
+    """
+
+    def __init__(self, master, on_pick, **kw):
+        super().__init__(master, **kw)
+        self.renderer = StripRenderer()
+        self.on_pick = on_pick
+        self._tiles = {}            # ad -> Label
+        self._photos = {}           # ad -> PhotoImage (Tk referansı tutulmalı)
+        self._active = None
+        self._poll_job = self.after(30, self._poll)
+
+    def set_source(self, base, base_key):
+        self.renderer.set_source(base, base_key)
+
+    def update_tiles(self, tiles: dict, active: str = None):
+        """tiles: {ad: ayarlar} (sıra korunur). Değişmeyen karolar yeniden render edilmez."""
+        if list(tiles) != list(self._tiles):
+            for label in self._tiles.values():
+                label.destroy()
+            self._tiles.clear()
+            self._photos = {n: p for n, p in self._photos.items() if n in tiles}
+            side = self.renderer.side
+            for name in tiles:
+                label = tk.Label(self, text=name, compound="top", font=("TkDefaultFont", 8),
+                                 bd=2, relief="flat", cursor="hand2")
+                if name in self._photos:
+                    label.config(image=self._photos[name])
+                else:
+                    # Render gelene kadar boş karo da yaklaşık aynı genişlikte dursun
+                    label.config(width=side // 7)
+                label.pack(side="left", padx=2)
+                label.bind("<Button-1>", lambda _e, n=name: self.on_pick(n))
+                self._tiles[name] = label
+        self._set_active(active)
+        self.renderer.update(tiles)
+
+    def _set_active(self, name):
+        self._active = name
+        for n, label in self._tiles.items():
+            label.config(relief="solid" if n == name else "flat")
+
+    def close(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.renderer.close()
+
+    def _poll(self):
+        from PIL import ImageTk
+        for name, img, err in self.renderer.poll():
+            label = self._tiles.get(name)
+            if label is None or err is not None:
+                continue
+            photo = ImageTk.PhotoImage(img)
+            self._photos[name] = photo
+            label.config(image=photo, width=0)
+        self._poll_job = self.after(30, self._poll)
@@ -0,0 +1,106 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from constants import INSTAGRAM_SIZE, STRIP_TILE
+from recipe import compile_plan
+from stage_cache import RenderCancelled, StageCache
+
+
+class StripRenderer:
+    """
+    Karşılaştırma şeridi: aynı fotoğrafı her filtre (ve tarif) için küçük boyutta render eder.
+
+    Kaynak base_square'den bir kez küçültülür ve tüm karolar onu paylaşır. Karolar ortak bir
+    StageCache kullanır: yazı aşaması atlanır, bir slider değişince her karo yalnızca parametresi
+    değişen ilk aşamadan itibaren yeniden hesaplanır; hiçbir aşaması değişmeyen karo hiç render edilmez.
+    İşler thread havuzunda paralel çalışır; bir karo yeniden gönderilince eski işi aşama aralarında
+    bırakılır. Sonuçlar poll() ile ana thread'den alınır.
+    """
+
+    def __init__(self, side: int = STRIP_TILE, workers: int = None):
+        self.side = int(side)
+        self.cache = StageCache(max_bytes=32 * 1024 * 1024, per_stage=64)
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="strip")
+        self._source = None
+        self._source_key = None
+        self._wanted = {}           # karo adı -> gönderilmiş (render edilmiş ya da süren) aşama imzası
+        self._tile_gen = {}         # karo adı -> son gönderimin numarası; eski gönderimler bayattır
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._results = queue.SimpleQueue()
+
+    def set_source(self, base: Image.Image, base_key):
+        """Yeni fotoğraf: kaynak bir kez küçültülür, süren karolar bayatlar, önbellek bırakılır."""
+        with self._lock:
+            self._source = base.resize((self.side, self.side), Image.LANCZOS, reducing_gap=2.0)
+            self._source_key = ("strip", base_key, self.side)
+            self._wanted.clear()
+            self._tile_gen.clear()
+        self.cache.clear()
+
+    def update(self, tiles: dict) -> int:
+        """
+        tiles: {ad: ayarlar}. Aşama parametreleri son gönderimden farklı olan karolar için iş gönderir;
+        gönderilen karo sayısını döndürür.
+        """
+        scale = self.side / INSTAGRAM_SIZE[0]
+        jobs = []
+        with self._lock:
+            if self._source is None:
+                return 0
+            for name in [n for n in self._wanted if n not in tiles]:
+                del self._wanted[name]
+                self._tile_gen.pop(name, None)
+            for name, settings in tiles.items():
+                plan = compile_plan(dict(settings, text_on=False), scale=scale, check=False)
+                signature = tuple((st[0], st[1]) for st in plan.stages)
+                if self._wanted.get(name) == signature:
+                    continue
+                self._seq += 1
+                self._wanted[name] = signature
+                self._tile_gen[name] = self._seq
+                jobs.append((self._seq, name, plan))
+            source, base_key = self._source, self._source_key
+
+        for seq, name, plan in jobs:
+            self._pool.submit(self._render, seq, name, plan, source, base_key)
+        return len(jobs)
+
+    def _stale(self, seq: int, name: str) -> bool:
+        return self._tile_gen.get(name) != seq
+
+    def _render(self, seq, name, plan, source, base_key):
+        if self._stale(seq, name):
+            return
+        try:
+            img = plan.run(source, base_key, cache=self.cache, should_cancel=lambda: self._stale(seq, name))
+        except RenderCancelled:
+            return
+        except Exception as e:
+            with self._lock:
+                if not self._stale(seq, name):
+                    del self._wanted[name]      # bir sonraki update() yeniden denesin
+            self._results.put((seq, name, None, e))
+            return
+        self._results.put((seq, name, img, None))
+
+    def poll(self):
+        """Güncel karoların sonuçları: [(ad, görsel, hata), ...]. Bu arada bayatlayanlar atılır."""
+        out = []
+        while True:
+            try:
+                seq, name, img, err = self._results.get_nowait()
+            except queue.Empty:
+                return out
+            if not self._stale(seq, name) or err is not None:
+                out.append((name, img, err))
+
+    def close(self):
+        with self._lock:
+            self._tile_gen.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,376 @@
+"""
+Tk gerektirmeyen animasyon (sweep) render'ı: ayarların bir kısmı anahtar karelerle N kare boyunca
+değişir; kare dizisi PNG dosyaları ya da animasyonlu WebP/GIF olarak yazılır.
+
+Kareler arasında sabit kalan aşamalar yeniden hesaplanmaz: tüm karelerde aynı olan aşama öneki
+ana süreçte bir kez render edilir, worker süreçleri yalnızca değişen ilk aşamadan sonrasını çalıştırır.
+Kareler ardışık parçalar halinde dağıtılır; her worker'ın StageCache'i parça içinde sabit kalan
+aşamaları (ör. anahtar kareler arası bekleme) da tekrar kullanır.
+
+Örnek:
+    python sweep.py foto.jpg -o glow.webp --frames 90 --key glow_strength=0:0,89:1
+    python sweep.py foto.jpg -o kareler --frames 60 --key grain_amount=0:0,59:0.3 --recipe tarif.json
+    python sweep.py foto.jpg -o kayma.gif --frames 45 --key "text_pos=0:Üst-Orta,44:Alt-Orta" --size 540
+    python sweep.py foto.jpg -o cizim.webp --frames 30 --key underline_reveal=0:0,29:1
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from constants import INSTAGRAM_SIZE, TEXT_POSITIONS, DEFAULT_SETTINGS
+from encoder import write_bytes
+from image_pipeline import apply_glow, glow_layer, hex_to_rgb
+from ingest import load_square
+from recipe import RecipeError, compile_plan, load_recipe, validate
+from stage_cache import StageCache, run_stages
+from underline import underline_provider
+
+ANIMATED_FORMATS = {".webp": "WEBP", ".gif": "GIF"}
+FRAME_NAME = "frame_{:04d}.png"
+
+# Yalnızca animasyonda anlamlı ayarlar (tarife girmez): ad -> varsayılan.
+# underline_reveal: underline'ın çizilmiş oranı (0..1), "çizilme" animasyonu için.
+SWEEP_EXTRAS = {"underline_reveal": 1.0}
+
+# Her worker süreci başlangıç görselini bir kez alır (initializer), parça başına taşınmaz
+_worker_start = None
+_worker_shared = 0
+_worker_scale = 1.0
+_worker_cache = None
+_worker_out_dir = None
+_worker_gif = False
+
+# Glow screen katmanı (blur) yalnızca aşamanın girdisine ve yarıçapa bağlıdır: güç rampasında kareler
+# arasında yeniden kullanılır. Girdi, üst aşamaların önbellek anahtarıyla tanınır (süreç başına).
+_GLOW_LAYERS_MAX = 2
+_glow_layers = OrderedDict()    # (üst aşama anahtarı, yarıçap) -> screen katmanı
+
+
+def _kind(key: str) -> str:
+    """Ara karelerde değerin nasıl hesaplanacağı: float/int doğrusal, color RGB'de, position kayarak, step sabit."""
+    if key == "text_pos":
+        return "position"
+    if key.endswith("_color"):
+        return "color"
+    default = SWEEP_EXTRAS.get(key, DEFAULT_SETTINGS.get(key))
+    if isinstance(default, (bool, str)):
+        return "step"
+    if isinstance(default, int):
+        return "int"
+    return "float"
+
+
+def _parse_value(key: str, text: str):
+    kind = _kind(key)
+    try:
+        if kind == "float":
+            return float(text)
+        if kind == "int":
+            return int(text)
+    except ValueError:
+        raise RecipeError(f"{key}: sayı olmalı ({text!r})") from None
+    if isinstance(DEFAULT_SETTINGS.get(key), bool):
+        if text.lower() not in ("true", "false", "1", "0"):
+            raise RecipeError(f"{key}: true/false olmalı ({text!r})")
+        return text.lower() in ("true", "1")
+    return text
+
+
+def parse_key_spec(spec: str):
+    """'ayar=kare:değer,kare:değer' -> (ayar, [(kare, değer), ...]). Değerler ayarın türüne çevrilir."""
+    key, sep, body = spec.partition("=")
+    key = key.strip()
+    if not sep or not body.strip():
+        raise RecipeError(f"Anahtar kare biçimi ayar=kare:değer,... olmalı: {spec!r}")
+    points = []
+    for item in body.split(","):
+        frame, sep, value = item.partition(":")
+        try:
+            frame = int(frame)
+        except ValueError:
+            raise RecipeError(f"{key}: kare numarası tamsayı olmalı ({item!r})") from None
+        if not sep:
+            raise RecipeError(f"{key}: kare:değer bekleniyordu ({item!r})")
+        points.append((frame, _parse_value(key, value.strip())))
+    return key, points
+
+
+def normalize_keys(keys: dict) -> dict:
+    """{ayar: [(kare, değer), ...]} doğrular ve karelere göre sıralar; hatada RecipeError."""
+    out = {}
+    for key, points in keys.items():
+        if key not in DEFAULT_SETTINGS and key not in SWEEP_EXTRAS:
+            raise RecipeError(f"Bilinmeyen ayar: {key}")
+        if not points:
+            raise RecipeError(f"{key}: en az bir anahtar kare gerekli")
+        checked = {}
+        for frame, value in points:
+            frame = int(frame)
+            if frame < 0:
+                raise RecipeError(f"{key}: kare numarası negatif olamaz")
+            if frame in checked:
+                raise RecipeError(f"{key}: {frame}. kare iki kez verilmiş")
+            if key in SWEEP_EXTRAS:
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0.0 <= value <= 1.0:
+                    raise RecipeError(f"{key}: 0 ile 1 arasında olmalı")
+                checked[frame] = float(value)
+            else:
+                checked[frame] = validate({key: value})[key]
+        out[key] = sorted(checked.items())
+    return out
+
+
+def value_at(key: str, points: list, frame: int):
+    """Anahtar karelerden `frame`'deki değer; ilk kareden önce ilk, sonuncudan sonra son değer."""
+    if frame <= points[0][0]:
+        return points[0][1]
+    if frame >= points[-1][0]:
+        return points[-1][1]
+    for (f0, v0), (f1, v1) in zip(points, points[1:]):
+        if f0 <= frame < f1:
+            break
+    t = (frame - f0) / (f1 - f0)
+    kind = _kind(key)
+    if t == 0.0 or kind == "step":
+        return v0
+    if kind == "float":
+        return v0 + (v1 - v0) * t
+    if kind == "int":
+        return int(round(v0 + (v1 - v0) * t))
+    if kind == "color":
+        a, b = hex_to_rgb(v0), hex_to_rgb(v1)
+        return "#" + "".join(f"{int(round(x + (y - x) * t)):02X}" for x, y in zip(a, b))
+    # position: TEXT_POSITIONS sırasında kesirli indeks (image_pipeline.text_xy kaydırır)
+    a, b = TEXT_POSITIONS.index(v0), TEXT_POSITIONS.index(v1)
+    pos = a + (b - a) * t
+    return TEXT_POSITIONS[int(pos)] if pos == int(pos) else pos
+
+
+def frame_settings(settings: dict, keys: dict, frames: int) -> list[dict]:
+    """Her kare için tam ayarlar; keys normalize_keys çıktısı olmalı."""
+    base = dict(SWEEP_EXTRAS, **settings)
+    return [dict(base, **{k: value_at(k, pts, i) for k, pts in keys.items()}) for i in range(int(frames))]
+
+
+def frame_stages(settings: dict, scale: float = 1.0) -> list:
+    """Karenin plan aşamaları; underline_reveal < 1 ise yazı aşaması underline'ı kısmen çizer."""
+    reveal = float(settings.get("underline_reveal", 1.0))
+    settings = {k: v for k, v in settings.items() if k not in SWEEP_EXTRAS}
+    if reveal >= 1.0:
+        return compile_plan(settings, scale=scale, check=False).stages
+    provider = underline_provider(hex_to_rgb(settings["underline_color"]), int(settings["underline_thickness"]),
+                                  int(settings["underline_seed"]), reveal=reveal)
+    plan = compile_plan(settings, scale=scale, underline_overlay_provider=provider, check=False)
+    # reveal aşama anahtarına girmezse önbellek farklı karelerin yazısını karıştırır
+    return [(name, params + (reveal,), fn) if name == "text" else (name, params, fn)
+            for name, params, fn in plan.stages]
+
+
+def shared_prefix(stage_lists: list) -> int:
+    """Tüm karelerde adı ve parametreleri aynı olan baştaki aşama sayısı."""
+    first = stage_lists[0]
+    n = 0
+    while n < len(first) and all(len(st) > n and st[n][:2] == first[n][:2] for st in stage_lists):
+        n += 1
+    return n
+
+
+def _glow_stage(parent_key, params):
+    enabled, strength, radius, scale = params
+
+    def fn(img):
+        r = float(radius) * float(scale)
+        if not enabled or float(strength) <= 0.0 or r <= 0.0:
+            return img
+        key = (parent_key, r)
+        layer = _glow_layers.get(key)
+        if layer is None:
+            layer = _glow_layers[key] = glow_layer(img, r)
+            while len(_glow_layers) > _GLOW_LAYERS_MAX:
+                _glow_layers.popitem(last=False)
+        else:
+            _glow_layers.move_to_end(key)
+        return apply_glow(img, enabled, strength, radius, scale, layer=layer)
+    return fn
+
+
+def reuse_glow(stages: list, base_key) -> list:
+    """Glow aşamasını screen katmanını kareler arasında paylaşan sürümüyle değiştirir (anahtarlar aynı kalır)."""
+    out = []
+    key = base_key
+    for name, params, fn in stages:
+        if name == "glow":
+            fn = _glow_stage(key, params)
+        out.append((name, params, fn))
+        key = (name, params, key)
+    return out
+
+
+def _pack(img: Image.Image):
+    return img.mode, img.size, img.tobytes(), img.getpalette() if img.mode == "P" else None
+
+
+def _unpack(packed) -> Image.Image:
+    mode, size, data, palette = packed
+    img = Image.frombytes(mode, size, data)
+    if palette is not None:
+        img.putpalette(palette)
+    return img
+
+
+def _init_worker(packed_start, shared, scale, out_dir=None, gif=False):
+    global _worker_start, _worker_shared, _worker_scale, _worker_cache, _worker_out_dir, _worker_gif
+    _worker_start = _unpack(packed_start)
+    _worker_shared = shared
+    _worker_scale = scale
+    _worker_cache = StageCache(max_bytes=64 * 1024 * 1024)
+    _worker_out_dir = out_dir
+    _worker_gif = gif
+    _glow_layers.clear()     # başlangıç görseli değişti; eski anahtarlar başka girdiyi gösterir
+
+
+def _render_chunk(chunk):
+    """[(kare no, ayarlar), ...] -> [(kare no, yazılan yol ya da paketlenmiş görsel), ...]"""
+    out = []
+    for i, settings in chunk:
+        stages = reuse_glow(frame_stages(settings, _worker_scale)[_worker_shared:], ("sweep",))
+        img = run_stages(_worker_start, ("sweep",), stages, cache=_worker_cache)
+        if _worker_out_dir is not None:
+            # Kareler ara çıktıdır: PNG hızlı sıkıştırmayla (optimize kare başına çok pahalı)
+            buf = io.BytesIO()
+            img.save(buf, "PNG", compress_level=1)
+            path = os.path.join(_worker_out_dir, FRAME_NAME.format(i))
+            write_bytes(path, buf.getvalue())
+            out.append((i, path))
+        else:
+            # GIF paleti worker'da çıkarılır: niceleme paralel olur, ana sürece 1 bayt/piksel taşınır
+            out.append((i, _pack(img.quantize(256) if _worker_gif else img)))
+    return out
+
+
+def _chunks(items: list, n: int) -> list:
+    n = max(1, min(len(items), n))
+    bounds = [round(k * len(items) / n) for k in range(n + 1)]
+    return [items[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def render_sweep(source, out: str, settings: dict, keys: dict, frames: int, fps: float = 30.0,
+                 size: int = None, workers: int = None, quality: int = 90, progress=None) -> dict:
+    """
+    `source`'u `frames` kare boyunca keys'teki anahtar karelerle render eder. out .webp/.gif ise
+    animasyon tek dosyaya, değilse klasöre frame_0000.png ... olarak yazılır (hepsi atomik).
+    size: kare kenarı (px); küçükse aşamalar önizleme proxy'si gibi ölçeklenir.
+    progress(biten kare, toplam) ana süreçte çağrılır.
+    """
+    settings = validate(settings)
+    keys = normalize_keys(keys)
+    frames = int(frames)
+    if frames < 1:
+        raise RecipeError("Kare sayısı en az 1 olmalı")
+    if fps <= 0:
+        raise RecipeError("fps sıfırdan büyük olmalı")
+    side = int(size or INSTAGRAM_SIZE[0])
+    scale = side / INSTAGRAM_SIZE[0]
+    fmt = ANIMATED_FORMATS.get(os.path.splitext(out)[1].lower())
+    workers = workers or os.cpu_count() or 1
+
+    t_start = time.perf_counter()
+    per_frame = frame_settings(settings, keys, frames)
+    stage_lists = [frame_stages(s, scale) for s in per_frame]
+    shared = shared_prefix(stage_lists)
+    start = run_stages(load_square(source, (side, side)), None, stage_lists[0][:shared])
+
+    out_dir = None
+    if fmt is None:
+        out_dir = out
+        os.makedirs(out_dir, exist_ok=True)
+    results = [None] * frames
+    initargs = (_pack(start), shared, scale, out_dir, fmt == "GIF")
+    chunks = _chunks(list(enumerate(per_frame)), workers * 2)
+    done = 0
+    ex = None
+    if workers > 1 and len(chunks) > 1:
+        ex = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=initargs)
+        finished = (fut.result() for fut in as_completed([ex.submit(_render_chunk, c) for c in chunks]))
+    else:
+        _init_worker(*initargs)
+        finished = (_render_chunk(c) for c in chunks)
+    try:
+        for part in finished:
+            for i, payload in part:
+                results[i] = payload
+            done += len(part)
+            if progress is not None:
+                progress(done, frames)
+    finally:
+        if ex is not None:
+            ex.shutdown(cancel_futures=True)
+
+    if fmt is not None:
+        images = [_unpack(p) for p in results]
+        results = None
+        buf = io.BytesIO()
+        params = {"save_all": True, "append_images": images[1:], "duration": int(round(1000 / fps)), "loop": 0}
+        if fmt == "WEBP":
+            params.update(quality=int(quality), method=4)
+        images[0].save(buf, fmt, **params)
+        write_bytes(out, buf.getvalue())
+
+    wall = time.perf_counter() - t_start
+    return {
+        "frames": frames,
+        "path": out,
+        "shared_stages": [name for name, _p, _fn in stage_lists[0][:shared]],
+        "varying_stages": sorted({name for st in stage_lists for name, _p, _fn in st[shared:]}),
+        "wall_s": wall,
+        "frames_per_s": frames / wall if wall > 0 else 0.0,
+    }
+
+
+def _parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Anahtar karelerle değişen ayarlarla kare dizisi / animasyon üretir.")
+    p.add_argument("source", help="Girdi fotoğrafı")
+    p.add_argument("-o", "--out", required=True, help="Animasyon dosyası (.webp, .gif) ya da PNG kareleri için klasör")
+    p.add_argument("--frames", type=int, default=30, help="Kare sayısı")
+    p.add_argument("--fps", type=float, default=30.0, help="Animasyon hızı (kare/sn)")
+    p.add_argument("--key", action="append", required=True, metavar="AYAR=KARE:DEĞER,...",
+                   help="Anahtar kareler, örn. glow_strength=0:0,89:1; tekrarlanabilir. "
+                        f"Ayrıca: {', '.join(SWEEP_EXTRAS)} (0..1)")
+    p.add_argument("--recipe", default=None, metavar="DOSYA", help="Sabit ayarlar bu tariften (varsayılan: arayüz varsayılanları)")
+    p.add_argument("--size", type=int, default=None, help=f"Kare kenarı px (varsayılan {INSTAGRAM_SIZE[0]})")
+    p.add_argument("--quality", type=int, default=90, help="WebP kalitesi")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    try:
+        settings = load_recipe(args.recipe) if args.recipe else dict(DEFAULT_SETTINGS)
+        keys = dict(parse_key_spec(spec) for spec in args.key)
+
+        def progress(done, total):
+            print(f"\r{done}/{total} kare", end="", flush=True)
+
+        stats = render_sweep(args.source, args.out, settings, keys, args.frames, fps=args.fps, size=args.size,
+                             workers=args.workers, quality=args.quality, progress=progress)
+    except RecipeError as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 2
+    print(
+        f"\n{stats['frames']} kare -> {stats['path']}  |  {stats['wall_s']:.1f} sn  |  "
+        f"{stats['frames_per_s']:.1f} kare/sn\n"
+        f"Bir kez: {', '.join(stats['shared_stages']) or '-'}  |  "
+        f"Her karede: {', '.join(stats['varying_stages']) or '-'}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
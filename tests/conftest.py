@@ -0,0 +1,31 @@
+import os
+import random
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+# Modüller depo kökünde düz duruyor; `pytest` hangi klasörden çalıştırılırsa çalıştırılsın bulunsun
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_photo(size=(1080, 1080), seed: int = 3) -> Image.Image:
+    """
+    Gradyan + gürültü + keskin kenarlı daireler: blur/ölçek farklarını fotoğraftan daha çok zorlar.
+    Gürültü de seed'den üretilir (Image.effect_noise seed almaz); aynı seed her çalıştırmada aynı görseldir.
+    """
+    w, h = size
+    rnd = random.Random(seed)
+    ramp = Image.linear_gradient("L").resize((w, h))
+    noise = Image.frombytes("L", (w, h), rnd.randbytes(w * h))
+    img = Image.merge("RGB", (ramp, ramp.rotate(90), noise))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y, r = rnd.randrange(w), rnd.randrange(h), rnd.randrange(5, max(6, w // 9))
+        draw.ellipse((x, y, x + r, y + r), fill=tuple(rnd.randrange(256) for _ in range(3)))
+    return img
+
+
+@pytest.fixture(scope="session")
+def photo() -> Image.Image:
+    return synthetic_photo()
@@ -0,0 +1,97 @@
+import os
+
+from PIL import Image
+
+import batch_render
+from batch_render import POOL_BROKEN, input_root, iter_inputs, run_batch
+from output_names import OutputNames
+
+
+def _written(out) -> list:
+    return sorted(os.path.relpath(os.path.join(d, f), out) for d, _s, fs in os.walk(out) for f in fs)
+
+
+def _channel(path) -> str:
+    """Çıktının baskın rengi; varsayılan glow/grain tonu biraz kaydırır ama kanal sırası değişmez."""
+    with Image.open(path) as im:
+        px = im.convert("RGB").getpixel((540, 540))
+    return "RGB"[px.index(max(px))]
+
+
+def test_recursive_batch_keeps_subfolders_and_gives_collisions_distinct_names(tmp_path):
+    src, out = tmp_path / "gelen", tmp_path / "cikti"
+    (src / "alt").mkdir(parents=True)
+    for rel, color in (("a.jpg", "red"), ("a.png", "blue"), ("alt/a.jpg", "green")):
+        Image.new("RGB", (320, 240), color).save(src / rel)
+
+    # Girdi sırası sabit: ilk gelen düz adı alır (izleme moduyla aynı kural)
+    paths = [str(src / "a.png"), str(src / "a.jpg"), str(src / "alt" / "a.jpg")]
+    stats = run_batch(paths, str(out), {"text_on": False}, workers=1, root=input_root(str(src)))
+
+    assert stats["ok"] == 3 and stats["failed"] == []
+    assert _written(out) == ["a.jpg", "a_jpg.jpg", os.path.join("alt", "a.jpg")]
+    assert _channel(out / "a.jpg") == "B"
+    assert _channel(out / "a_jpg.jpg") == "R"
+    assert _channel(out / "alt" / "a.jpg") == "G"
+
+
+def test_batch_from_folder_writes_every_input(tmp_path):
+    src, out = tmp_path / "gelen", tmp_path / "cikti"
+    src.mkdir()
+    for name, color in (("a.jpg", "red"), ("a.png", "blue")):
+        Image.new("RGB", (320, 240), color).save(src / name)
+
+    stats = run_batch(iter_inputs(str(src)), str(out), {"text_on": False}, workers=1, root=input_root(str(src)))
+
+    assert stats["ok"] == 2
+    assert len(_written(out)) == 2 and "a.jpg" in _written(out)
+
+
+def test_output_names_are_stable_and_released():
+    names = OutputNames(".jpg")
+    assert names.seed("a.png", "a.jpg")             # manifest'ten gelen sahiplik korunur
+    assert names.get("a.jpg") == "a_jpg.jpg"
+    assert names.get("a.png") == "a.jpg"
+    assert names.get("a.jpg") == "a_jpg.jpg"        # ikinci çağrı aynı adı verir
+    names.release("a.png")
+    assert names.get("b/a.jpg") == os.path.join("b", "a.jpg")
+    # Üç aday da doluysa hash'li ad sayı alır; asla başka girdinin adı verilmez
+    crowded = OutputNames(".jpg")
+    outs = {crowded.get(k, "a.jpg") for k in ("x", "y", "z", "w", "v")}
+    assert len(outs) == 5
+
+
+def _crash_on_bozuk(path, out_path):
+    # Bellek yetmeyip öldürülen worker gibi: sonuç dönmeden süreç biter
+    if "bozuk" in os.path.basename(path):
+        os._exit(1)
+    return path, 0.0, None, None
+
+
+def test_worker_crash_fails_the_rest_instead_of_aborting(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_render, "_render_one", _crash_on_bozuk)
+    paths = [str(tmp_path / n) for n in ("a.jpg", "bozuk.jpg", "c.jpg", "d.jpg")]
+    seen = []
+    stats = run_batch(paths, str(tmp_path / "cikti"), {}, workers=1, max_inflight=1,
+                      progress=lambda path, _secs, err: seen.append((os.path.basename(path), err)))
+
+    assert stats["ok"] == 1
+    assert [os.path.basename(p) for p, _err in stats["failed"]] == ["bozuk.jpg", "c.jpg", "d.jpg"]
+    assert all(err == POOL_BROKEN for _p, err in stats["failed"])
+    assert [name for name, _err in seen] == ["a.jpg", "bozuk.jpg", "c.jpg", "d.jpg"]
+
+
+def test_worker_crash_still_prints_summary(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(batch_render, "_render_one", _crash_on_bozuk)
+    src = tmp_path / "gelen"
+    src.mkdir()
+    for name in ("bozuk1.jpg", "bozuk2.jpg"):
+        Image.new("RGB", (64, 64)).save(src / name)
+
+    assert batch_render.main([str(src), "-o", str(tmp_path / "cikti"), "-j", "1"]) == 1
+    assert "Toplam: 0 başarılı, 2 hatalı" in capsys.readouterr().out
+
+
+def test_input_root_of_glob_is_its_literal_prefix(tmp_path):
+    assert input_root(str(tmp_path)) == str(tmp_path)
+    assert input_root(os.path.join(str(tmp_path), "*", "*.jpg")) == str(tmp_path)
@@ -0,0 +1,22 @@
+from benchmark import compare
+
+
+BASELINE = {
+    "filter/Sepya": {"wall_ms": 10.0},
+    "glow/r=6": {"wall_ms": 20.0},
+    "underline/turtle": {"wall_ms": 50.0},
+}
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    results = {"filter/Sepya": {"wall_ms": 10.5}, "glow/r=6": {"wall_ms": 30.0}}
+    assert compare(results, BASELINE, threshold=0.15) == [("glow/r=6", 20.0, 30.0)]
+
+
+def test_compare_reports_errors_but_not_explicit_skips():
+    results = {
+        "filter/Sepya": {"error": "zaman aşımı (600 sn)"},
+        "underline/turtle": {"skipped": "ekran yok ($DISPLAY)"},
+        "yeni/durum": {"error": "çıkış kodu 1"},   # baseline'ı yok: karşılaştırılacak bir şey yok
+    }
+    assert compare(results, BASELINE, threshold=0.15) == [("filter/Sepya", 10.0, None)]
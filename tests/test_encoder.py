@@ -0,0 +1,40 @@
+import os
+import threading
+
+from conftest import synthetic_photo
+from encoder import JPEG_VARIANTS, QUALITY_RANGE, encode, encode_to_budget, write_bytes
+
+
+def test_concurrent_writers_never_publish_mixed_data(tmp_path):
+    path = str(tmp_path / "kare.jpg")
+    bad = []
+
+    def writer(marker: int):
+        for _ in range(50):
+            try:
+                write_bytes(path, bytes([marker]) * 256 * 1024)
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError as e:     # ortak geçici dosyayı başka yazar taşımış olabilir
+                bad.append(e)
+                continue
+            if len(data) != 256 * 1024 or len(set(data)) != 1:
+                bad.append(marker)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not bad
+    assert os.listdir(tmp_path) == ["kare.jpg"]     # geçici dosya kalmadı
+
+
+def test_unreachable_budget_returns_smallest_candidate():
+    img = synthetic_photo((640, 640))
+    smallest = min(len(encode(img, "JPEG", QUALITY_RANGE[0], **params)) for params in JPEG_VARIANTS)
+    result = encode_to_budget(img, 1.0, "JPEG")     # 1 KB: hiçbir varyant sığmaz
+    assert result["fits"] is False
+    assert result["quality"] == QUALITY_RANGE[0]
+    assert len(result["data"]) == smallest
+    assert result["params"]["subsampling"] == 2     # 4:2:0 her zaman daha küçük
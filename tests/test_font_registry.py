@@ -0,0 +1,36 @@
+import os
+
+from font_registry import FontRegistry
+
+
+def _touch(path: str, mtime_ns: int):
+    open(path, "wb").close()
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_index_sees_font_added_to_existing_subfolder(tmp_path):
+    family = tmp_path / "fonts" / "truetype" / "aile"
+    family.mkdir(parents=True)
+    _touch(str(family / "Aile-Regular.ttf"), 1_000_000_000)
+    index_path = str(tmp_path / "fonts.json")
+
+    assert set(FontRegistry([str(tmp_path / "fonts")], index_path).index()) == {"aile-regular"}
+
+    # Yalnızca alt klasörün mtime'ı değişir; üst klasörler aynı kalır
+    top = os.stat(tmp_path / "fonts").st_mtime_ns
+    _touch(str(family / "Aile-Bold.ttf"), 2_000_000_000)
+    os.utime(family, ns=(2_000_000_000, 2_000_000_000))
+    assert os.stat(tmp_path / "fonts").st_mtime_ns == top
+
+    assert set(FontRegistry([str(tmp_path / "fonts")], index_path).index()) == {"aile-regular", "aile-bold"}
+
+
+def test_unchanged_folders_reuse_persisted_index(tmp_path, monkeypatch):
+    (tmp_path / "fonts").mkdir()
+    _touch(str(tmp_path / "fonts" / "Tek.otf"), 1_000_000_000)
+    index_path = str(tmp_path / "fonts.json")
+    FontRegistry([str(tmp_path / "fonts")], index_path).index()
+
+    reg = FontRegistry([str(tmp_path / "fonts")], index_path)
+    monkeypatch.setattr(reg, "_scan", lambda: (_ for _ in ()).throw(AssertionError("yeniden tarandı")))
+    assert reg.find("Tek").endswith("Tek.otf")
@@ -0,0 +1,32 @@
+import pytest
+from PIL import ImageChops, ImageStat
+
+from image_pipeline import apply_glow, apply_glow_exact
+
+
+def _diff(a, b):
+    d = ImageChops.difference(a, b)
+    return max(hi for _lo, hi in d.getextrema()), max(ImageStat.Stat(d).mean)
+
+
+@pytest.mark.parametrize("radius", [1.0, 2.0, 4.0, 6.0, 12.0, 20.0])
+@pytest.mark.parametrize("strength, max_levels", [(0.35, 8), (1.0, 23)])
+def test_pyramid_glow_matches_exact(photo, radius, strength, max_levels):
+    # apply_glow docstring'indeki sınır: ortalama < 0.5, en büyük fark 0.35'te <= 8, 1.0'da < 24
+    worst, mean = _diff(apply_glow(photo, True, strength, radius), apply_glow_exact(photo, True, strength, radius))
+    assert worst <= max_levels
+    assert mean < 0.5
+
+
+def test_glow_scale_shrinks_radius(photo):
+    # Önizleme proxy'si: yarım boyutta yarım yarıçap, tam boyuttaki referansın küçültülmüşüne yakın
+    half = photo.resize((540, 540))
+    worst, mean = _diff(apply_glow(half, True, 1.0, 12.0, scale=0.5), apply_glow_exact(half, True, 1.0, 6.0))
+    assert worst <= 23
+    assert mean < 0.5
+
+
+def test_glow_noop_returns_input(photo):
+    assert apply_glow(photo, False, 1.0, 6.0) is photo
+    assert apply_glow(photo, True, 0.0, 6.0) is photo
+    assert apply_glow(photo, True, 1.0, 0.0) is photo
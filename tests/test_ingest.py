@@ -0,0 +1,61 @@
+import pytest
+from PIL import Image, ImageChops, ImageFilter, ImageOps, ImageStat
+
+from conftest import synthetic_photo
+from image_pipeline import make_instagram_square
+from ingest import center_crop_box, load_square
+
+SOURCE_SIZE = (6000, 4000)     # 24 MP; tam çözümlü RGB tampon 72 MB
+
+
+@pytest.fixture(scope="module")
+def large_jpeg(tmp_path_factory):
+    # Yumuşatılmış sentetik görsel: JPEG'de fotoğraf gibi davranır, yine de keskin kenarları var
+    img = synthetic_photo(SOURCE_SIZE).filter(ImageFilter.GaussianBlur(2))
+    paths = {}
+    for orientation in (1, 3, 6, 8):
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        path = tmp_path_factory.mktemp("ingest") / f"buyuk_{orientation}.jpg"
+        img.save(path, quality=92, exif=exif.tobytes())
+        paths[orientation] = str(path)
+    return paths
+
+
+def _reference(path: str, size) -> Image.Image:
+    with Image.open(path) as im:
+        return make_instagram_square(ImageOps.exif_transpose(im), size=size)
+
+
+@pytest.mark.parametrize("size", [(1080, 1080), (1080, 1920)])
+def test_draft_decode_keeps_decoded_buffer_small(large_jpeg, size):
+    stats = {}
+    load_square(large_jpeg[1], size, stats=stats)
+    full_rgb = SOURCE_SIZE[0] * SOURCE_SIZE[1] * 3
+    assert stats["source_size"] == SOURCE_SIZE
+    # draft 1/2 ölçekte çözer ve tampon tam RGB'nin tam 1/4'ü olur; sınır buna pay bırakır ama
+    # bir üst kademeyi (tam boyut çözüm) yine yakalar
+    assert stats["decoded_bytes"] < full_rgb // 3
+    # Küçük çözülen görselin kırpma kutusu hâlâ hedefi büyütmeden dolduruyor
+    left, top, right, bottom = center_crop_box(stats["decoded_size"], size)
+    assert right - left >= size[0] and bottom - top >= size[1]
+
+
+@pytest.mark.parametrize("orientation", [1, 3, 6, 8])
+@pytest.mark.parametrize("size", [(1080, 1080), (1080, 1920)])
+def test_draft_decode_matches_full_decode(large_jpeg, orientation, size):
+    got = load_square(large_jpeg[orientation], size)
+    ref = _reference(large_jpeg[orientation], size)
+    assert got.size == ref.size == size
+    diff = ImageChops.difference(got, ref)
+    assert max(ImageStat.Stat(diff).mean) < 1.0
+    assert max(hi for _lo, hi in diff.getextrema()) <= 16
+
+
+def test_small_png_is_identical(tmp_path):
+    path = str(tmp_path / "kucuk.png")
+    synthetic_photo((800, 600)).save(path)
+    stats = {}
+    got = load_square(path, (1080, 1080), stats=stats)
+    assert stats["scale"] == 1.0
+    assert ImageChops.difference(got, _reference(path, (1080, 1080))).getbbox() is None
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import benchmark  # noqa: E402
+from benchmark import PARITY_CASES  # noqa: E402
+from numpy_backend import PARITY_TOLERANCE  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def parity_results():
+    import image_pipeline as ip
+    before = ip.get_backend()
+    results = benchmark.parity()
+    assert ip.get_backend() == before       # parity() seçili arka ucu geri koyar
+    return results
+
+
+@pytest.mark.parametrize("case", sorted(PARITY_CASES))
+def test_numpy_backend_matches_pillow(parity_results, case):
+    worst, mean = parity_results[case]
+    assert worst <= PARITY_TOLERANCE, f"{case}: en büyük fark {worst}, ortalama {mean:.3f}"
+
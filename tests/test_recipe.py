@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from recipe import TEXT_SIZE_MAX, UNDERLINE_THICKNESS_MAX, RecipeError, recipe_from_json, validate
+
+
+def _recipe(**settings) -> str:
+    return json.dumps({"format": "instagram-post-recipe", "version": 1, "settings": settings})
+
+
+@pytest.mark.parametrize("literal", ["NaN", "Infinity", "-Infinity", "1e400"])
+@pytest.mark.parametrize("key", ["brightness", "glow_radius", "grain_amount"])
+def test_non_finite_numbers_are_rejected(key, literal):
+    # json.loads bu değişmezleri float nan/inf olarak okur
+    text = _recipe().replace('"settings": {}', f'"settings": {{"{key}": {literal}}}')
+    with pytest.raises(RecipeError, match=key):
+        recipe_from_json(text)
+
+
+def test_huge_integer_is_rejected_not_overflow():
+    with pytest.raises(RecipeError, match="brightness"):
+        validate({"brightness": 10 ** 400})
+
+
+@pytest.mark.parametrize("key, limit", [("text_size", TEXT_SIZE_MAX),
+                                        ("underline_thickness", UNDERLINE_THICKNESS_MAX)])
+def test_size_limits(key, limit):
+    assert validate({key: limit})[key] == limit
+    for bad in (0, limit + 1, 10 ** 9):
+        with pytest.raises(RecipeError, match=key):
+            validate({key: bad})
+
+
+@pytest.mark.parametrize("settings", [{"glow_strength": 1.5}, {"glow_radius": -1}, {"grain_amount": 2}])
+def test_out_of_range_numbers_are_rejected(settings):
+    with pytest.raises(RecipeError):
+        validate(settings)
@@ -0,0 +1,47 @@
+import io
+import threading
+
+import pytest
+
+from conftest import synthetic_photo
+from recipe import validate
+from render_server import RenderService, parse_target_kb
+
+
+@pytest.mark.parametrize("text", ["0", "-5", "nan", "inf", "-inf", "abc"])
+def test_target_kb_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_target_kb(text)
+
+
+def test_target_kb_accepts_positive():
+    assert parse_target_kb(None) is None
+    assert parse_target_kb("") is None
+    assert parse_target_kb("250.5") == 250.5
+
+
+def test_identical_concurrent_requests_render_once():
+    buf = io.BytesIO()
+    synthetic_photo((640, 480)).save(buf, "JPEG")
+    data = buf.getvalue()
+    settings = validate({"text_on": False})
+    service = RenderService(workers=1, cache_mb=16)
+    try:
+        start = threading.Barrier(8)
+        sources = []
+
+        def request():
+            start.wait()
+            sources.append(service.render(data, settings, "jpg", "thumb")[1])
+
+        for _round in range(2):
+            threads = [threading.Thread(target=request) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert sources.count("render") == 1
+        assert service.metrics.counts["renders"] == 1
+        assert service.in_flight() == 0
+    finally:
+        service.close()
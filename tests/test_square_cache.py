@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+from conftest import synthetic_photo
+from square_cache import SquareCache, ThumbnailLoader
+
+
+def _photos(folder, n):
+    paths = []
+    for i in range(n):
+        path = str(folder / f"foto_{i}.jpg")
+        synthetic_photo((400, 300), seed=i).save(path)
+        paths.append(path)
+    return paths
+
+
+def _index(cache_dir):
+    with open(os.path.join(cache_dir, "index.json"), encoding="utf-8") as f:
+        return json.load(f)["files"]
+
+
+def test_flush_drops_records_of_deleted_files(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    a, b = _photos(src, 2)
+    cache = SquareCache(str(tmp_path / "cache"), size=(120, 120), thumb_size=32)
+    cache.thumbnail(a)
+    cache.thumbnail(b)
+    cache.flush()
+    assert set(_index(cache.root)) == {a, b}
+
+    os.remove(a)
+    cache.flush()       # yeni hash yok; yalnızca silinen kayıt atılır
+    assert set(_index(cache.root)) == {b}
+
+
+def test_open_prepares_square_off_the_caller_thread(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    paths = _photos(src, 3)
+    cache = SquareCache(str(tmp_path / "cache"), size=(120, 120), thumb_size=32)
+    loader = ThumbnailLoader(cache, workers=1)
+    try:
+        loader.open(paths[1])
+        opened = []
+        deadline = time.monotonic() + 10
+        while not opened and time.monotonic() < deadline:
+            opened = loader.poll_opened()
+            time.sleep(0.01)
+        (path, square, stats, err), = opened
+        assert err is None and path == paths[1]
+        assert square.size == (120, 120) and stats["source_size"] == (400, 300)
+
+        loader.open(str(src / "yok.jpg"))
+        deadline = time.monotonic() + 10
+        opened = []
+        while not opened and time.monotonic() < deadline:
+            opened = loader.poll_opened()
+            time.sleep(0.01)
+        assert opened[0][1] is None and isinstance(opened[0][3], OSError)
+    finally:
+        loader.stop()
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import benchmark
+from benchmark import STARTUP_BUDGET_MS, _STARTUP_CHILD
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 3
+
+# Önizleme durumları JPEG üretir ve yavaştır; burada yalnızca içe aktarmalar denetlenir
+IMPORT_CASES = {name: case for name, case in benchmark.startup_cases("").items() if name.startswith("import/")}
+
+
+def _child(body: str, forbidden) -> dict:
+    code = _STARTUP_CHILD.format(body=body, forbidden=list(forbidden))
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60, cwd=ROOT)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_core_imports_leave_gui_and_lazy_modules_unloaded():
+    # startup_cases'in çekirdek listesi: GUI + ertelenen modüller (numpy arka ucu seçiliyse numpy hariç)
+    _, forbidden = IMPORT_CASES["import/recipe"]
+    res = _child("import image_pipeline, recipe", forbidden)
+    assert res["loaded"] == []
+
+
+@pytest.mark.parametrize("name", sorted(IMPORT_CASES))
+def test_import_stays_lazy_and_within_budget(name):
+    body, forbidden = IMPORT_CASES[name]
+    if name == "import/ui_app":
+        pytest.importorskip("tkinter")
+    runs = [_child(body, forbidden) for _ in range(REPEAT)]
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    assert loaded == [], f"{name} açılışta yükledi: {', '.join(loaded)}"
+    # Tek bir gürültülü ölçüm testi düşürmesin diye en kısa süre bütçeyle karşılaştırılır
+    best = min(r["ms"] for r in runs)
+    assert best <= STARTUP_BUDGET_MS[name], f"{name}: {best:.1f} ms > {STARTUP_BUDGET_MS[name]} ms"
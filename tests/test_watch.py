@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import signal
+import time
+
+import pytest
+from PIL import Image
+
+import watch
+
+
+def _summary(capsys) -> dict:
+    line = capsys.readouterr().out.strip().splitlines()[-1]
+    m = re.search(r"(\d+) render, (\d+) değişmemiş, (\d+) hatalı", line)
+    return {"rendered": int(m[1]), "unchanged": int(m[2]), "failed": int(m[3])}
+
+
+def _manifest(out_dir) -> dict:
+    with open(os.path.join(out_dir, watch.MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)["files"]
+
+
+def _age(path, seconds: float = 60.0):
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+@pytest.fixture
+def folders(tmp_path):
+    src, out = tmp_path / "gelen", tmp_path / "cikti"
+    src.mkdir()
+    for name, color in (("a.jpg", "red"), ("a.png", "blue"), ("b.jpg", "green")):
+        Image.new("RGB", (320, 240), color).save(src / name)
+        _age(src / name)
+    return str(src), str(out)
+
+
+def _once(src, out, *extra):
+    handler = signal.getsignal(signal.SIGTERM)    # main() SIGTERM'i kendisine bağlar
+    try:
+        return watch.main([src, "-o", out, "--once", "-j", "1", "--settle", "0.5", *extra])
+    finally:
+        signal.signal(signal.SIGTERM, handler)
+
+
+def test_once_twice_renders_then_skips(folders, capsys):
+    src, out = folders
+    assert _once(src, out) == 0
+    assert _summary(capsys) == {"rendered": 3, "unchanged": 0, "failed": 0}
+
+    files = _manifest(out)
+    outputs = [rec["output"] for rec in files.values()]
+    assert sorted(files) == ["a.jpg", "a.png", "b.jpg"]
+    assert len(set(outputs)) == 3       # a.jpg ile a.png aynı çıktıya yazmaz
+    assert all(os.path.exists(os.path.join(out, o)) for o in outputs)
+    mtimes = {o: os.stat(os.path.join(out, o)).st_mtime_ns for o in outputs}
+
+    assert _once(src, out) == 0
+    assert _summary(capsys) == {"rendered": 0, "unchanged": 0, "failed": 0}
+    assert _manifest(out) == files
+    assert {o: os.stat(os.path.join(out, o)).st_mtime_ns for o in outputs} == mtimes
+
+
+def test_touched_file_is_hashed_not_rendered(folders, capsys):
+    src, out = folders
+    _once(src, out)
+    capsys.readouterr()
+    os.utime(os.path.join(src, "b.jpg"))
+    _age(os.path.join(src, "b.jpg"), 5.0)
+    assert _once(src, out) == 0
+    assert _summary(capsys) == {"rendered": 0, "unchanged": 1, "failed": 0}
+
+
+def test_once_waits_for_unsettled_file(folders, capsys):
+    src, out = folders
+    _once(src, out)
+    capsys.readouterr()
+    Image.new("RGB", (320, 240), "white").save(os.path.join(src, "yeni.jpg"))
+    t0 = time.monotonic()
+    assert _once(src, out, "--settle", "1.0", "--interval", "0.1") == 0
+    assert time.monotonic() - t0 >= 0.5     # dosya oturana kadar beklendi
+    assert _summary(capsys)["rendered"] == 1
+    assert os.path.exists(os.path.join(out, _manifest(out)["yeni.jpg"]["output"]))
+
+
+def test_broken_file_is_recorded_and_not_retried(folders, capsys):
+    src, out = folders
+    bad = os.path.join(src, "bozuk.jpg")
+    with open(bad, "wb") as f:
+        f.write(b"jpeg degil")
+    _age(bad)
+    assert _once(src, out) == 1
+    assert _summary(capsys)["failed"] == 1
+    assert "error" in _manifest(out)["bozuk.jpg"]
+
+    assert _once(src, out) == 0
+    assert _summary(capsys) == {"rendered": 0, "unchanged": 0, "failed": 0}
+
+
+def test_deleted_input_releases_its_record(folders, capsys):
+    src, out = folders
+    _once(src, out)
+    os.remove(os.path.join(src, "a.png"))
+    _once(src, out)
+    capsys.readouterr()
+    assert sorted(_manifest(out)) == ["a.jpg", "b.jpg"]
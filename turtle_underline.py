@@ -1,11 +1,15 @@
 import os
-import math
-import random
 import tempfile
 from pathlib import Path
 
-import turtle
-from PIL import Image, ImageOps, ImageDraw
+from PIL import Image, ImageOps
+
+# hex_to_rgb ve pil_underline_overlay eskiden burada tanımlıydı; eski importlar için yeniden dışa aktarılır,
+# yeni kod underline / image_pipeline modüllerini kullanır
+from image_pipeline import hex_to_rgb
+from underline import underline_path, pil_underline_overlay
+
+__all__ = ["turtle_underline_overlay", "pil_underline_overlay", "hex_to_rgb"]
 
 
 def turtle_underline_overlay(
@@ -18,15 +22,12 @@ def turtle_underline_overlay(
 ) -> Image.Image:
     """
     Turtle ile underline çizip transparan RGBA overlay üretir.
-    Ghostscript / PS->Image dönüşümü sorun olursa exception fırlatır (UI fallback kullanır).
+    Ghostscript / PS->Image dönüşümü sorun olursa exception fırlatır.
+    Arayüz artık underline.vector_underline_overlay kullanır; bu sürüm karşılaştırma için duruyor.
     """
-    w, h = size
-    x, y, tw, th = text_bbox
+    import turtle  # Tk gerektirir; yalnızca bu fonksiyon çağrılınca yüklenir
 
-    pad_x = int(max(24, tw * 0.06))
-    x0 = x - pad_x
-    x1 = x + tw + pad_x
-    base_y = y + th + 18
+    w, h = size
 
     def to_turtle(px, py):
         tx = px - (w / 2)
@@ -49,20 +50,13 @@ def turtle_underline_overlay(
     t.pencolor(int(stroke_rgb[0]), int(stroke_rgb[1]), int(stroke_rgb[2]))
     t.penup()
 
-    rng = random.Random(int(seed))
-    steps = 80
-    amp = 6 + min(16, int(thickness))
-    freq = rng.choice([1.5, 2.0, 2.5])
+    points = underline_path(text_bbox, thickness, seed)
 
-    sx, sy = to_turtle(x0, base_y)
+    sx, sy = to_turtle(*points[0])
     t.goto(sx, sy)
     t.pendown()
 
-    for i in range(steps + 1):
-        px = x0 + (x1 - x0) * (i / steps)
-        wobble = math.sin((i / steps) * math.pi * 2 * freq) * amp
-        wobble += rng.uniform(-amp * 0.35, amp * 0.35)
-        py = base_y + wobble
+    for px, py in points[1:]:
         tx, ty = to_turtle(px, py)
         t.goto(tx, ty)
 
@@ -91,27 +85,3 @@ def turtle_underline_overlay(
         pass
 
     return img_rgba
-
-
-def pil_underline_overlay(
-    size: tuple[int, int],
-    x0: int,
-    x1: int,
-    y: int,
-    stroke_rgb: tuple[int, int, int],
-    thickness: int,
-) -> Image.Image:
-    w, h = size
-    overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    d = ImageDraw.Draw(overlay)
-    d.line([(x0, y), (x1, y)], fill=(stroke_rgb[0], stroke_rgb[1], stroke_rgb[2], 255), width=int(thickness))
-    return overlay
-
-
-def hex_to_rgb(s: str) -> tuple[int, int, int]:
-    s = s.strip()
-    if s.startswith("#"):
-        s = s[1:]
-    if len(s) != 6:
-        raise ValueError("Renk #RRGGBB olmalı")
-    return (int(s[0:2], 16), int(s[2:4], 16), int(s[4:6], 16))
@@ -1,35 +1,72 @@
 import os
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
 
-from PIL import Image, ImageTk, ImageOps
+from PIL import Image
 
+import profiling
 from constants import (
-    INSTAGRAM_SIZE, PREVIEW_MAX, FILTERS, TEXT_POSITIONS, CHROMA_GREEN
-)
-from image_pipeline import (
-    make_instagram_square, apply_filter, apply_adjustments,
-    apply_glow, apply_film_grain, apply_text_effect
-)
-from turtle_underline import (
-    turtle_underline_overlay, pil_underline_overlay, hex_to_rgb
+    INSTAGRAM_SIZE, PREVIEW_MAX, PREVIEW_IDLE_MS, FILTERS, TEXT_POSITIONS, PROFILE_STAGES,
+    HISTORY_MAX_MB, HISTORY_COALESCE_MS, STRIP_DELAY_MS
 )
+from encoder import Encoder, format_for_path
+from history import History
+from square_cache import SquareCache
+from strip_panel import StripPanel
+from multi_export import export_targets
+from recipe import RecipeError, compile_plan, load_recipe, save_recipe, validate
+from render_worker import RenderWorker
+from stage_cache import StageCache
 
 
 class InstagramPostMaker(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Instagram Post Hazırlayıcı (Tkinter + Yazı Efekti)")
-        self.geometry("980x840")
+        self.geometry("1160x940")
         self.minsize(880, 720)
 
-        self.original_img = None
+        # Orijinal tam çözünürlük tutulmaz; ingest.load_square doğrudan kareyi üretir.
+        # Tüm formatları dışa aktarırken kaynak bu yoldan bir kez yeniden çözülür.
+        # Kareler diskte önbelleklenir: daha önce açılan fotoğraf yeniden çözülmeden gelir.
+        self._squares = SquareCache()
+        self.source_path = None
         self.base_square = None
         self.output_img = None
         self.preview_tk = None
 
-        self._underline_cache_key = None
-        self._underline_overlay_cached = None
+        # Aşama önbelleği: base_square değişince _base_key artar, eski girişler kullanılmaz
+        self._stage_cache = StageCache()
+        self._base_key = 0
+
+        # Slider hareket ederken pipeline tuvale göre küçültülmüş proxy üzerinde çalışır;
+        # tam çözünürlük yalnızca girdi durunca (veya kaydederken) render edilir.
+        self._proxy_img = None
+        self._proxy_key = None
+        self._full_dirty = True
+        self._idle_job = None
+
+        # Render işleri arka plan thread'inde; sonuçlar after() ile ana thread'e alınır
+        self._worker = RenderWorker()
+        self._shown_job = 0
+        self._save_pending = False
+        self._poll_job = None
+
+        # Kaydetme ve çoklu format dışa aktarma ayrı bir thread'de (pencere ve önizleme donmaz);
+        # hedef boyut aramasındaki varyantlar Encoder'ın süreç havuzunda paralel denenir
+        self._bg_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self._export_future = None
+        self._save_future = None
+        self._save_progress = (0, 1)
+        self._encoder = Encoder()
+        self.target_kb_var = tk.StringVar(value="")
+
+        # Profil kapalıyken kancalar yalnızca bir global okur; IPM_PROFILE=1 ile açık başlar
+        self._profiler = profiling.Profiler()
+        self.profile_on = tk.BooleanVar(value=bool(os.environ.get("IPM_PROFILE")))
+        if self.profile_on.get():
+            profiling.enable(self._profiler)
 
         self.filter_var = tk.StringVar(value="Normal")
         self.brightness_var = tk.DoubleVar(value=1.0)
@@ -43,6 +80,7 @@ class InstagramPostMaker(tk.Tk):
 
         self.grain_on = tk.BooleanVar(value=True)
         self.grain_amount_var = tk.DoubleVar(value=0.08)
+        self.grain_seed_var = tk.IntVar(value=0)
 
         self.text_on = tk.BooleanVar(value=True)
         self.text_var = tk.StringVar(value="Merhaba 🌿")
@@ -55,21 +93,58 @@ class InstagramPostMaker(tk.Tk):
         self.underline_thickness_var = tk.IntVar(value=10)
         self.underline_seed_var = tk.IntVar(value=7)
 
+        # Geri al/yinele: adımlar yalnızca değişen ayarları tutar; kareler bellek sınırlı LRU'da.
+        # _applying: değişkenler topluca set edilirken (tarif, geri al) her set ayrı adım olmasın
+        # _settings: son geçerli ayarlar (sayı alanı yarım yazılmışken render bunlarla sürer)
+        self._settings = self._current_settings()
+        self._history = History(self._settings, max_bytes=HISTORY_MAX_MB * 1024 * 1024,
+                                coalesce_s=HISTORY_COALESCE_MS / 1000.0)
+        self._applying = False
+        self._full_request = None
+
+        # Karşılaştırma şeridi: filtreler + bu oturumda yüklenen/kaydedilen tarifler
+        self._presets = {}
+        self._strip_job = None
+
         self._build_ui()
         self.canvas.bind("<Configure>", self._refresh_preview)
+        self.bind("<Control-z>", lambda _e: self.undo())
+        self.bind("<Control-y>", lambda _e: self.redo())
+        self.bind("<Control-Z>", lambda _e: self.redo())    # Ctrl+Shift+Z
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_job = self.after(16, self._poll_worker)
 
     def _build_ui(self):
         top = tk.Frame(self)
         top.pack(fill="x", padx=12, pady=12)
 
         tk.Button(top, text="📷 Fotoğraf Seç", command=self.pick_image, height=2).pack(side="left")
+        tk.Button(top, text="🖼️ Klasör", command=self.open_folder, height=2).pack(side="left", padx=(6, 0))
         tk.Button(top, text="💾 1080x1080 Kaydet", command=self.save_output, height=2).pack(side="left", padx=10)
+        tk.Label(top, text="Hedef KB").pack(side="left")
+        tk.Entry(top, textvariable=self.target_kb_var, width=6).pack(side="left", padx=(4, 10))
+        tk.Button(top, text="🗂️ Tüm Formatlar", command=self.export_all, height=2).pack(side="left", padx=(0, 10))
+        tk.Button(top, text="📄 Tarif Kaydet", command=self.save_recipe_dialog, height=2).pack(side="left")
+        tk.Button(top, text="📂 Tarif Yükle", command=self.load_recipe_dialog, height=2).pack(side="left", padx=(10, 0))
+        self.undo_btn = tk.Button(top, text="↶", command=self.undo, height=2, state="disabled")
+        self.undo_btn.pack(side="left", padx=(10, 0))
+        self.redo_btn = tk.Button(top, text="↷", command=self.redo, height=2, state="disabled")
+        self.redo_btn.pack(side="left")
 
         self.info = tk.Label(top, text="Seçilen: -", anchor="w")
         self.info.pack(side="left", padx=10)
+        self.save_status = tk.Label(top, text="", anchor="e", fg="#666")
+        self.save_status.pack(side="right")
+
+        self._middle = tk.Frame(self)
+        self._middle.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+        # Galeri (ve küçük görsel thread'leri) ilk klasör açılınca oluşturulur
+        self.gallery = None
+        self.canvas = tk.Canvas(self._middle, bg="#111", highlightthickness=0)
+        self.canvas.pack(side="left", fill="both", expand=True)
 
-        self.canvas = tk.Canvas(self, bg="#111", highlightthickness=0)
-        self.canvas.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+        self.strip = StripPanel(self, on_pick=self._pick_tile)
+        self.strip.pack(fill="x", padx=12, pady=(0, 8))
 
         controls = tk.Frame(self)
         controls.pack(fill="x", padx=12, pady=(0, 10))
@@ -104,27 +179,32 @@ class InstagramPostMaker(tk.Tk):
         tk.Checkbutton(controls, text="🎞️ Film Grain", variable=self.grain_on, command=self.update_output)\
             .grid(row=3, column=0, sticky="w")
         slider(3, 2, "Grain Yoğunluğu", self.grain_amount_var, 0.0, 0.30, 0.01)
+        tk.Label(controls, text="Grain Seed").grid(row=3, column=4, sticky="w")
+        tk.Entry(controls, textvariable=self.grain_seed_var, width=8)\
+            .grid(row=3, column=5, sticky="w", padx=(6, 18))
+        # geçersiz/yarım sayı update_output'ta TclError olarak yakalanır, geçerli olunca render edilir
+        self.grain_seed_var.trace_add("write", lambda *_: self.update_output())
 
         
         r = 4
-        tk.Checkbutton(controls, text="🅰️ Yazı", variable=self.text_on, command=self._invalidate_underline_and_update)\
+        tk.Checkbutton(controls, text="🅰️ Yazı", variable=self.text_on, command=self.update_output)\
             .grid(row=r, column=0, sticky="w", pady=(10, 0))
 
         tk.Entry(controls, textvariable=self.text_var, width=30).grid(
             row=r, column=1, sticky="w", padx=(6, 18), pady=(10, 0)
         )
-        self.text_var.trace_add("write", lambda *_: self._invalidate_underline_and_update())
+        self.text_var.trace_add("write", lambda *_: self.update_output())
 
         tk.Label(controls, text="Konum:").grid(row=r, column=2, sticky="w", pady=(10, 0))
         pos = tk.OptionMenu(controls, self.text_pos_var, *TEXT_POSITIONS,
-                            command=lambda *_: self._invalidate_underline_and_update())
+                            command=lambda *_: self.update_output())
         pos.config(width=10)
         pos.grid(row=r, column=3, sticky="w", padx=(6, 18), pady=(10, 0))
 
         tk.Label(controls, text="Boyut").grid(row=r, column=4, sticky="w", pady=(10, 0))
         tk.Scale(
             controls, from_=24, to=140, resolution=2, orient="horizontal", length=220,
-            variable=self.text_size_var, command=lambda _v: self._invalidate_underline_and_update()
+            variable=self.text_size_var, command=lambda _v: self.update_output()
         ).grid(row=r, column=5, sticky="w", padx=(6, 18), pady=(10, 0))
 
         r = 5
@@ -132,8 +212,8 @@ class InstagramPostMaker(tk.Tk):
         tk.Entry(controls, textvariable=self.text_color_var, width=12)\
             .grid(row=r, column=1, sticky="w", padx=(6, 18))
 
-        tk.Checkbutton(controls, text="✍️ Turtle Underline", variable=self.underline_on,
-                       command=self._invalidate_underline_and_update)\
+        tk.Checkbutton(controls, text="✍️ Underline", variable=self.underline_on,
+                       command=self.update_output)\
             .grid(row=r, column=2, sticky="w")
 
         tk.Label(controls, text="Renk:").grid(row=r, column=3, sticky="w")
@@ -144,19 +224,24 @@ class InstagramPostMaker(tk.Tk):
         tk.Label(controls, text="Kalınlık").grid(row=r, column=0, sticky="w")
         tk.Scale(
             controls, from_=2, to=30, resolution=1, orient="horizontal", length=220,
-            variable=self.underline_thickness_var, command=lambda _v: self._invalidate_underline_and_update()
+            variable=self.underline_thickness_var, command=lambda _v: self.update_output()
         ).grid(row=r, column=1, sticky="w", padx=(6, 18))
 
         tk.Label(controls, text="Seed").grid(row=r, column=2, sticky="w")
         tk.Entry(controls, textvariable=self.underline_seed_var, width=8)\
             .grid(row=r, column=3, sticky="w", padx=(6, 18))
 
-        tk.Button(controls, text="🔄 Underline Yenile", command=self._invalidate_underline_and_update)\
+        tk.Button(controls, text="🔄 Underline Yenile", command=self.update_output)\
             .grid(row=r, column=4, sticky="w")
 
         bottom = tk.Frame(self)
         bottom.pack(fill="x", padx=12, pady=(0, 12))
-        tk.Label(bottom, text="1080×1080 — Filtre/efekt + yazı + turtle underline (opsiyonel).").pack(anchor="w")
+        tk.Label(bottom, text="1080×1080 — Filtre/efekt + yazı + el çizimi underline (opsiyonel).").pack(side="left")
+        tk.Button(bottom, text="Trace Kaydet", command=self.export_trace).pack(side="right")
+        tk.Checkbutton(bottom, text="⏱️ Profil", variable=self.profile_on, command=self._toggle_profile)\
+            .pack(side="right", padx=(10, 6))
+        self.perf_label = tk.Label(bottom, text="", anchor="e", fg="#666")
+        self.perf_label.pack(side="right")
 
     def reset_adjustments(self):
         self.filter_var.set("Normal")
@@ -172,11 +257,6 @@ class InstagramPostMaker(tk.Tk):
         self.grain_on.set(True)
         self.grain_amount_var.set(0.08)
 
-        self._invalidate_underline_and_update()
-
-    def _invalidate_underline_and_update(self):
-        self._underline_cache_key = None
-        self._underline_overlay_cached = None
         self.update_output()
 
     def pick_image(self):
@@ -186,94 +266,328 @@ class InstagramPostMaker(tk.Tk):
         )
         if not path:
             return
+        self.open_image(path)
+
+    def open_folder(self):
+        folder = filedialog.askdirectory(title="Fotoğraf klasörü seç")
+        if not folder:
+            return
+        if self.gallery is None:
+            from gallery_panel import GalleryPanel
+            self.gallery = GalleryPanel(self._middle, self._squares, on_select=self._open_loaded)
+        try:
+            count = self.gallery.show_folder(folder)
+        except OSError as e:
+            messagebox.showerror("Hata", f"Klasör okunamadı:\n{e}")
+            return
+        if not self.gallery.winfo_ismapped():
+            self.gallery.pack(side="left", fill="y", padx=(0, 12), before=self.canvas)
+        if count == 0:
+            messagebox.showinfo("Galeri", "Bu klasörde görsel yok.")
 
+    def open_image(self, path: str):
         try:
-            img = Image.open(path)
-            img = ImageOps.exif_transpose(img)
-            self.original_img = img
+            stats = {}
+            square = self._squares.square(path, stats=stats)
+        except Exception as e:
+            messagebox.showerror("Hata", f"Görsel açılamadı:\n{e}")
+            return
+        self._open_loaded(path, square, stats, None)
 
-            self.base_square = make_instagram_square(img, size=INSTAGRAM_SIZE)
-            self._invalidate_underline_and_update()
+    def _open_loaded(self, path: str, square, stats: dict, err):
+        # Galeri kareyi (hash + çözme) küçük resim thread'lerinde hazırlar; burası yalnızca ana thread işi
+        if err is not None:
+            messagebox.showerror("Hata", f"Görsel açılamadı:\n{err}")
+            return
+        try:
+            self.base_square = square
+            self.source_path = path
+            self._base_key += 1
+            self._stage_cache.clear()
+            self._history.drop_frames()
+            self.strip.set_source(self.base_square, self._base_key)
+            self.update_output()
 
             fname = os.path.basename(path)
-            self.info.config(text=f"Seçilen: {fname}  |  Orijinal: {img.size[0]}×{img.size[1]}")
+            sw, sh = stats["source_size"]
+            self.info.config(text=f"Seçilen: {fname}  |  Orijinal: {sw}×{sh}")
+            if self.gallery is not None:
+                self.gallery.select(path)
         except Exception as e:
             messagebox.showerror("Hata", f"Görsel açılamadı:\n{e}")
 
-    def _underline_overlay_provider(self, text_bbox):
+    def _current_settings(self) -> dict:
+        return {
+            "filter": self.filter_var.get(),
+            "brightness": self.brightness_var.get(),
+            "contrast": self.contrast_var.get(),
+            "saturation": self.saturation_var.get(),
+            "sharpness": self.sharpness_var.get(),
+            "glow_on": self.glow_on.get(),
+            "glow_strength": self.glow_strength_var.get(),
+            "glow_radius": self.glow_radius_var.get(),
+            "grain_on": self.grain_on.get(),
+            "grain_amount": self.grain_amount_var.get(),
+            "grain_seed": self.grain_seed_var.get(),
+            "text_on": self.text_on.get(),
+            "text": self.text_var.get(),
+            "text_pos": self.text_pos_var.get(),
+            "text_size": self.text_size_var.get(),
+            "text_color": self.text_color_var.get(),
+            "underline_on": self.underline_on.get(),
+            "underline_color": self.underline_color_var.get(),
+            "underline_thickness": self.underline_thickness_var.get(),
+            "underline_seed": self.underline_seed_var.get(),
+        }
+
+    def _apply_settings(self, settings: dict):
+        self._applying = True
+        try:
+            self._set_vars(settings)
+        finally:
+            self._applying = False
+
+    def _set_vars(self, settings: dict):
+        self.filter_var.set(settings["filter"])
+        self.brightness_var.set(settings["brightness"])
+        self.contrast_var.set(settings["contrast"])
+        self.saturation_var.set(settings["saturation"])
+        self.sharpness_var.set(settings["sharpness"])
+        self.glow_on.set(settings["glow_on"])
+        self.glow_strength_var.set(settings["glow_strength"])
+        self.glow_radius_var.set(settings["glow_radius"])
+        self.grain_on.set(settings["grain_on"])
+        self.grain_amount_var.set(settings["grain_amount"])
+        self.grain_seed_var.set(settings["grain_seed"])
+        self.text_on.set(settings["text_on"])
+        self.text_var.set(settings["text"])
+        self.text_pos_var.set(settings["text_pos"])
+        self.text_size_var.set(settings["text_size"])
+        self.text_color_var.set(settings["text_color"])
+        self.underline_on.set(settings["underline_on"])
+        self.underline_color_var.set(settings["underline_color"])
+        self.underline_thickness_var.set(settings["underline_thickness"])
+        self.underline_seed_var.set(settings["underline_seed"])
+
+    def save_recipe_dialog(self):
+        path = filedialog.asksaveasfilename(
+            title="Tarifi kaydet",
+            defaultextension=".json",
+            filetypes=[("Tarif", "*.json"), ("Tümü", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            settings = validate(self._current_settings())
+            save_recipe(path, settings)
+        except (RecipeError, OSError, tk.TclError) as e:
+            messagebox.showerror("Hata", f"Tarif kaydedilemedi:\n{e}")
+            return
+        self._add_preset(path, settings)
+
+    def load_recipe_dialog(self):
+        path = filedialog.askopenfilename(
+            title="Tarif yükle",
+            filetypes=[("Tarif", "*.json"), ("Tümü", "*.*")]
+        )
+        if not path:
+            return
         try:
-            color_rgb = hex_to_rgb(self.underline_color_var.get())
-        except Exception:
-            color_rgb = (255, 255, 255)
+            settings = load_recipe(path)
+        except RecipeError as e:
+            messagebox.showerror("Hata", f"Tarif yüklenemedi:\n{e}")
+            return
+        self._add_preset(path, settings)
+        self._apply_settings(settings)
+        self.update_output()
 
-        thickness = int(self.underline_thickness_var.get())
-        seed = int(self.underline_seed_var.get())
-        key = (text_bbox, color_rgb, thickness, seed)
+    def _add_preset(self, path: str, settings: dict):
+        name = "📄 " + os.path.splitext(os.path.basename(path))[0]
+        self._presets[name] = settings
+        self._schedule_strip()
 
-        if self._underline_cache_key == key and self._underline_overlay_cached is not None:
-            return self._underline_overlay_cached
+    def _pick_tile(self, name: str):
+        if name in self._presets:
+            self._apply_settings(self._presets[name])
+        else:
+            self.filter_var.set(name)
+        self.update_output()
 
-        x, y, tw, th = text_bbox
-        pad_x = int(max(24, tw * 0.06))
-        x0 = x - pad_x
-        x1 = x + tw + pad_x
-        base_y = y + th + 18
+    def _schedule_strip(self):
+        # Ana önizleme önce render edilsin; şerit kısa bir gecikmeyle ve yalnızca değişen karolarla gelir
+        if self._strip_job is not None:
+            self.after_cancel(self._strip_job)
+        self._strip_job = self.after(STRIP_DELAY_MS, self._update_strip)
 
+    def _update_strip(self):
+        self._strip_job = None
+        if self.base_square is None:
+            return
         try:
-            overlay = turtle_underline_overlay(
-                size=INSTAGRAM_SIZE,
-                text_bbox=text_bbox,
-                stroke_rgb=color_rgb,
-                thickness=thickness,
-                seed=seed,
-                chroma_green=CHROMA_GREEN
-            )
-        except Exception:
-            overlay = pil_underline_overlay(
-                size=INSTAGRAM_SIZE,
-                x0=x0, x1=x1, y=base_y,
-                stroke_rgb=color_rgb,
-                thickness=thickness
-            )
-
-        self._underline_cache_key = key
-        self._underline_overlay_cached = overlay
-        return overlay
+            current = self._current_settings()
+        except tk.TclError:
+            return
+        tiles = {name: dict(current, filter=name) for name in FILTERS}
+        tiles.update(self._presets)
+        self.strip.update_tiles(tiles, active=current["filter"])
 
     def update_output(self):
+        if self._applying:
+            return
+        try:
+            settings = self._current_settings()
+        except tk.TclError:
+            return    # yarım yazılmış sayı alanı; geçerli olunca kaydedilir ve render edilir
+        self._settings = settings
+        if self._history.record(settings):
+            self._update_history_buttons()
         if self.base_square is None:
             return
 
-        img = self.base_square.copy()
-        img = apply_filter(img, self.filter_var.get())
-        img = apply_adjustments(
-            img,
-            brightness=self.brightness_var.get(),
-            contrast=self.contrast_var.get(),
-            saturation=self.saturation_var.get(),
-            sharpness=self.sharpness_var.get(),
-        )
-        img = apply_glow(img, self.glow_on.get(), self.glow_strength_var.get(), self.glow_radius_var.get())
-        img = apply_film_grain(img, self.grain_on.get(), self.grain_amount_var.get())
+        self._full_dirty = True
+        self._render_proxy(settings)
+        self._schedule_strip()
+        if self._idle_job is not None:
+            self.after_cancel(self._idle_job)
+        self._idle_job = self.after(PREVIEW_IDLE_MS, self._render_full)
 
-        try:
-            text_color = hex_to_rgb(self.text_color_var.get())
-        except Exception:
-            text_color = (255, 255, 255)
-
-        img = apply_text_effect(
-            img_rgb=img,
-            enabled=self.text_on.get(),
-            text=self.text_var.get(),
-            text_pos=self.text_pos_var.get(),
-            text_size=self.text_size_var.get(),
-            text_color_rgb=text_color,
-            underline_enabled=self.underline_on.get(),
-            underline_overlay_provider=(self._underline_overlay_provider if self.underline_on.get() else None),
+    def undo(self):
+        self._restore(self._history.undo())
+
+    def redo(self):
+        self._restore(self._history.redo())
+
+    def _restore(self, settings):
+        if settings is None:
+            return
+        self._apply_settings(settings)
+        self._settings = settings
+        self._update_history_buttons()
+        frame = None
+        if self.base_square is not None:
+            frame = self._history.frame(self._base_key, settings)
+        if frame is None:
+            self.update_output()
+            return
+        # Kare geçmişte: render yok, süren işlerin sonuçları da gösterilmez
+        if self._idle_job is not None:
+            self.after_cancel(self._idle_job)
+            self._idle_job = None
+        self._shown_job = self._worker.cancel()
+        self.output_img = frame
+        self._full_dirty = False
+        self.show_preview(frame)
+        self._schedule_strip()
+        if self._save_pending:
+            # iptal edilen tam render'ı bekleyen kayıt: geçmişteki kare zaten tam çözünürlük
+            self._save_pending = False
+            self._save_dialog()
+
+    def _update_history_buttons(self):
+        self.undo_btn.config(state="normal" if self._history.can_undo else "disabled")
+        self.redo_btn.config(state="normal" if self._history.can_redo else "disabled")
+
+    def _preview_side(self) -> int:
+        cw = max(1, self.canvas.winfo_width())
+        ch = max(1, self.canvas.winfo_height())
+        return max(1, min(PREVIEW_MAX, cw, ch))
+
+    def _render_proxy(self, settings: dict):
+        # Parametreler ana thread'de okunur; render işi worker thread'inde çalışır
+        base = self.base_square
+        side = min(self._preview_side(), INSTAGRAM_SIZE[0])
+        key = (self._base_key, side)
+        scale = side / INSTAGRAM_SIZE[0]
+
+        def job(should_cancel):
+            with profiling.span("render", "render", kind="proxy", side=side):
+                if self._proxy_key != key:
+                    self._proxy_img = base.resize((side, side), Image.LANCZOS)
+                    self._proxy_key = key
+                plan = compile_plan(settings, scale=scale, check=False)
+                return plan.run(self._proxy_img, ("proxy",) + key,
+                                cache=self._stage_cache, should_cancel=should_cancel)
+
+        self._worker.submit(job, tag="proxy")
+
+    def _render_full(self):
+        self._idle_job = None
+        if self.base_square is None or not self._full_dirty:
+            return
+
+        settings = self._settings
+        base = self.base_square
+        base_key = ("base", self._base_key)
+        self._full_request = (self._base_key, settings)
+
+        def job(should_cancel):
+            with profiling.span("render", "render", kind="full"):
+                plan = compile_plan(settings, check=False)
+                return plan.run(base, base_key, cache=self._stage_cache, should_cancel=should_cancel)
+
+        self._worker.submit(job, tag="full")
+
+    def _poll_worker(self):
+        results = self._worker.poll()
+        for job_id, tag, img, err in results:
+            if err is not None:
+                self.report_callback_exception(type(err), err, err.__traceback__)
+                continue
+            if tag == "full":
+                # Bu arada parametre değiştiyse sonuç bayattır; yeni boşta kalma render'ı gelecek
+                if self._worker.is_stale(job_id):
+                    continue
+                self.output_img = img
+                self._full_dirty = False
+                self._shown_job = job_id
+                self._history.put_frame(*self._full_request, img)
+                self.show_preview(self.output_img)
+                if self._save_pending:
+                    self._save_pending = False
+                    self._save_dialog()
+            elif job_id > self._shown_job:
+                self._shown_job = job_id
+                self.show_preview(img)
+        if results and profiling.active() is not None:
+            self.perf_label.config(text=self._profiler.status_line(PROFILE_STAGES))
+        self._poll_job = self.after(16, self._poll_worker)
+
+    def _toggle_profile(self):
+        if self.profile_on.get():
+            profiling.enable(self._profiler)
+            self.perf_label.config(text=self._profiler.status_line(PROFILE_STAGES))
+        else:
+            profiling.disable()
+            self.perf_label.config(text="")
+
+    def export_trace(self):
+        if not self._profiler.events:
+            messagebox.showwarning("Uyarı", "Kaydedilecek ölçüm yok. Önce ⏱️ Profil'i açıp biraz düzenleme yap.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Trace kaydet",
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("Tümü", "*.*")]
         )
+        if not path:
+            return
+        try:
+            self._profiler.export_chrome_trace(path)
+            messagebox.showinfo("Kaydedildi", f"Trace kaydedildi (chrome://tracing veya ui.perfetto.dev ile açılır):\n{path}")
+        except Exception as e:
+            messagebox.showerror("Hata", f"Kaydedilemedi:\n{e}")
 
-        self.output_img = img
-        self.show_preview(self.output_img)
+    def _on_close(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+        self._bg_pool.shutdown(wait=False, cancel_futures=True)
+        self._encoder.close()
+        self._worker.stop()
+        if self.gallery is not None:
+            self.gallery.close()
+        self._squares.flush()
+        self.strip.close()
+        self.destroy()
 
     def show_preview(self, img: Image.Image):
         if img is None:
@@ -283,40 +597,130 @@ class InstagramPostMaker(tk.Tk):
         max_w = min(PREVIEW_MAX, cw)
         max_h = min(PREVIEW_MAX, ch)
 
-        preview = img.copy()
-        preview.thumbnail((max_w, max_h), Image.LANCZOS)
-
-        self.preview_tk = ImageTk.PhotoImage(preview)
+        from PIL import ImageTk
+        with profiling.span("preview", "ui", pixels=img.size[0] * img.size[1]):
+            preview = img.copy()
+            preview.thumbnail((max_w, max_h), Image.LANCZOS)
+            self.preview_tk = ImageTk.PhotoImage(preview)
         self.canvas.delete("all")
         self.canvas.create_image(cw // 2, ch // 2, image=self.preview_tk, anchor="center")
 
     def _refresh_preview(self, _event=None):
-        if self.output_img is not None:
+        if self.base_square is None:
+            return
+        if self._full_dirty:
+            self._render_proxy(self._settings)
+            # Yeni proxy işi süren tam render'ı bayat yapar (sonucu atılır); tam render ve ona bağlı
+            # bekleyen kayıt penceresi kaybolmasın diye boşta kalma render'ı yeniden kurulur
+            if self._idle_job is not None:
+                self.after_cancel(self._idle_job)
+            self._idle_job = self.after(PREVIEW_IDLE_MS, self._render_full)
+        else:
             self.show_preview(self.output_img)
 
     def save_output(self):
-        if self.output_img is None:
+        if self.base_square is None:
+            messagebox.showwarning("Uyarı", "Önce bir fotoğraf seçmelisin.")
+            return
+        if not self._full_dirty:
+            self._save_dialog()
+            return
+        # Tam çözünürlük render bitince kaydetme penceresi açılır
+        self._save_pending = True
+        if self._idle_job is not None:
+            self.after_cancel(self._idle_job)
+        self._render_full()
+
+    def export_all(self):
+        if self.source_path is None:
             messagebox.showwarning("Uyarı", "Önce bir fotoğraf seçmelisin.")
             return
+        if self._export_future is not None and not self._export_future.done():
+            messagebox.showinfo("Bekle", "Önceki dışa aktarma sürüyor.")
+            return
+        try:
+            settings = validate(self._current_settings())
+        except (RecipeError, tk.TclError) as e:
+            messagebox.showerror("Hata", f"Ayarlar geçersiz:\n{e}")
+            return
+        out_dir = filedialog.askdirectory(title="Çıktı klasörü seç")
+        if not out_dir:
+            return
+        self._export_future = self._bg_pool.submit(export_targets, self.source_path, out_dir, settings)
+        self.after(100, self._poll_export)
 
+    def _poll_export(self):
+        fut = self._export_future
+        if fut is None:
+            return
+        if not fut.done():
+            self.after(100, self._poll_export)
+            return
+        self._export_future = None
+        try:
+            paths = fut.result()
+        except Exception as e:
+            messagebox.showerror("Hata", f"Dışa aktarılamadı:\n{e}")
+            return
+        names = "\n".join(os.path.basename(p) for p in paths.values())
+        messagebox.showinfo("Kaydedildi", f"{os.path.dirname(next(iter(paths.values())))}\n{names}")
+
+    def _target_kb(self):
+        text = self.target_kb_var.get().strip()
+        if not text:
+            return None
+        kb = float(text.replace(",", "."))
+        if kb <= 0:
+            raise ValueError("Hedef KB sıfırdan büyük olmalı")
+        return kb
+
+    def _save_dialog(self):
+        if self._save_future is not None and not self._save_future.done():
+            messagebox.showinfo("Bekle", "Önceki kayıt sürüyor.")
+            return
         path = filedialog.asksaveasfilename(
             title="Kaydet",
             defaultextension=".jpg",
-            filetypes=[("JPEG", "*.jpg *.jpeg"), ("PNG", "*.png"), ("Tümü", "*.*")]
+            filetypes=[("JPEG", "*.jpg *.jpeg"), ("WebP", "*.webp"), ("PNG", "*.png"), ("Tümü", "*.*")]
         )
         if not path:
             return
 
         try:
-            img_to_save = self.output_img
-            if path.lower().endswith((".jpg", ".jpeg")) and img_to_save.mode != "RGB":
-                img_to_save = img_to_save.convert("RGB")
+            format_for_path(path)
+            target_kb = self._target_kb()
+        except ValueError as e:
+            messagebox.showerror("Hata", f"Kaydedilemedi:\n{e}")
+            return
+
+        def progress(done, total):
+            self._save_progress = (done, total)    # worker thread'i yazar, _poll_save okur
 
-            if path.lower().endswith((".jpg", ".jpeg")):
-                img_to_save.save(path, quality=95, optimize=True)
-            else:
-                img_to_save.save(path)
+        self._save_progress = (0, 1)
+        self._save_future = self._bg_pool.submit(self._encoder.save, self.output_img, path, target_kb, progress)
+        self._poll_save()
 
-            messagebox.showinfo("Kaydedildi", f"Kayıt tamam:\n{path}")
+    def _poll_save(self):
+        fut = self._save_future
+        if fut is None:
+            return
+        if not fut.done():
+            done, total = self._save_progress
+            self.save_status.config(text=f"Kaydediliyor… {done}/{total}")
+            self.after(100, self._poll_save)
+            return
+        self._save_future = None
+        self.save_status.config(text="")
+        try:
+            result = fut.result()
         except Exception as e:
             messagebox.showerror("Hata", f"Kaydedilemedi:\n{e}")
+            return
+
+        detail = f"{len(result['data']) / 1024:.0f} KB"
+        if result["quality"] is not None:
+            detail += f", kalite {result['quality']}"
+        if not result["fits"]:
+            messagebox.showwarning("Kaydedildi", f"Hedef boyuta sığmadı, en küçük hali kaydedildi:\n{result['path']}\n{detail}")
+        else:
+            messagebox.showinfo("Kaydedildi", f"Kayıt tamam:\n{result['path']}\n{detail}")
@@ -0,0 +1,121 @@
+import math
+import random
+from functools import lru_cache
+
+from PIL import Image
+
+from constants import INSTAGRAM_SIZE
+from profiling import profiled
+
+
+def underline_span(text_bbox: tuple[int, int, int, int], scale: float = 1.0) -> tuple[int, int, int]:
+    """
+    Yazı kutusuna göre underline'ın yatay aralığını ve taban y'sini döndürür: (x0, x1, base_y).
+    """
+    x, y, tw, th = text_bbox
+    pad_x = int(max(24 * scale, tw * 0.06))
+    return x - pad_x, x + tw + pad_x, y + th + int(round(18 * scale))
+
+
+def underline_path(text_bbox: tuple[int, int, int, int], thickness: int, seed: int, scale: float = 1.0):
+    """
+    Turtle sürümüyle aynı seed'li dalgalı yol: aynı seed her zaman aynı noktaları verir.
+    """
+    x0, x1, base_y = underline_span(text_bbox, scale)
+    rng = random.Random(int(seed))
+    steps = 80
+    amp = (6 + min(16, int(thickness))) * scale
+    freq = rng.choice([1.5, 2.0, 2.5])
+
+    points = [(x0, base_y)]
+    for i in range(steps + 1):
+        px = x0 + (x1 - x0) * (i / steps)
+        wobble = math.sin((i / steps) * math.pi * 2 * freq) * amp
+        wobble += rng.uniform(-amp * 0.35, amp * 0.35)
+        points.append((px, base_y + wobble))
+    return points
+
+
+def reveal_path(points: list, reveal: float) -> list:
+    """Yolun baştan `reveal` (0..1) oranı kadarı; son nokta iki nokta arasına düşebilir (çizilme animasyonu)."""
+    reveal = min(1.0, max(0.0, float(reveal)))
+    if reveal >= 1.0:
+        return points
+    pos = reveal * (len(points) - 1)
+    i = int(pos)
+    t = pos - i
+    (ax, ay), (bx, by) = points[i], points[i + 1]
+    return points[:i + 1] + [(ax + (bx - ax) * t, ay + (by - ay) * t)]
+
+
+@lru_cache(maxsize=32)
+def vector_underline_overlay(
+    text_bbox: tuple[int, int, int, int],   # (x, y, tw, th)
+    stroke_rgb: tuple[int, int, int],
+    thickness: int,
+    seed: int,
+    scale: float = 1.0,
+    supersample: int = 4,
+    reveal: float = 1.0,
+):
+    """
+    Underline'ı Tk/Ghostscript olmadan, süpersampling ile kenarları yumuşatarak çizer.
+    Tüm tuval yerine yalnızca çizginin kutusu kadar bir RGBA döndürür: (overlay, (x, y)).
+    reveal < 1: yolun yalnızca baştaki o kadarı çizilir (0'da None).
+    """
+    if reveal <= 0.0:
+        return None
+    points = reveal_path(underline_path(text_bbox, thickness, seed, scale), reveal)
+    width = max(1.0, int(thickness) * scale)
+    margin = width / 2 + 2
+
+    left = math.floor(min(p[0] for p in points) - margin)
+    top = math.floor(min(p[1] for p in points) - margin)
+    right = math.ceil(max(p[0] for p in points) + margin)
+    bottom = math.ceil(max(p[1] for p in points) + margin)
+
+    ss = int(supersample)
+    mask = Image.new("L", ((right - left) * ss, (bottom - top) * ss), 0)
+    from PIL import ImageDraw
+    d = ImageDraw.Draw(mask)
+    pts = [((px - left) * ss, (py - top) * ss) for px, py in points]
+    w = max(1, int(round(width * ss)))
+    d.line(pts, fill=255, width=w, joint="curve")
+    # turtle kalemi gibi yuvarlak uçlar
+    r = w / 2
+    for cx, cy in (pts[0], pts[-1]):
+        d.ellipse((cx - r, cy - r, cx + r, cy + r), fill=255)
+
+    if ss > 1:
+        mask = mask.reduce(ss)
+    overlay = Image.new("RGBA", mask.size, (int(stroke_rgb[0]), int(stroke_rgb[1]), int(stroke_rgb[2]), 0))
+    overlay.putalpha(mask)
+    return overlay, (left, top)
+
+
+def underline_provider(stroke_rgb: tuple[int, int, int], thickness: int, seed: int, reveal: float = 1.0):
+    """apply_text_effect için provider: (text_bbox, canvas_size) -> (overlay, (x, y))."""
+    stroke_rgb = tuple(int(v) for v in stroke_rgb)
+
+    @profiled("underline")
+    def provider(text_bbox, canvas_size=INSTAGRAM_SIZE):
+        scale = canvas_size[0] / INSTAGRAM_SIZE[0]
+        return vector_underline_overlay(tuple(text_bbox), stroke_rgb, int(thickness), int(seed), scale,
+                                        reveal=float(reveal))
+    return provider
+
+
+def pil_underline_overlay(
+    size: tuple[int, int],
+    x0: int,
+    x1: int,
+    y: int,
+    stroke_rgb: tuple[int, int, int],
+    thickness: int,
+) -> Image.Image:
+    w, h = size
+    overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    from PIL import ImageDraw
+    d = ImageDraw.Draw(overlay)
+    d.line([(x0, y), (x1, y)], fill=(stroke_rgb[0], stroke_rgb[1], stroke_rgb[2], 255), width=int(thickness))
+    return overlay
@@ -0,0 +1,433 @@
+"""
+Tk gerektirmeyen izleme modu: girdi klasörüne bırakılan fotoğrafları aynı ayarlarla 1080x1080 post
+olarak çıktı klasörüne yazar ve çalışmaya devam eder.
+
+Durum çıktı klasöründeki manifest'te (.watch_manifest.json) tutulur: her dosya için kaynak hash'i,
+ayar hash'i ve çıktı yolu. Yeniden başlatınca değişmeyen dosyalar okunmadan atlanır. Tarif dosyası
+değişince yalnızca çıktısı gerçekten değişecek dosyalar yeniden render edilir: ayar hash'i derlenmiş
+plandan hesaplanır, etkisiz ayarlar (ör. kapalı glow'un gücü) hash'e girmez.
+
+Linux'ta inotify (ctypes ile, ek paket gerekmez) klasör değişince hemen uyandırır; başka sistemlerde
+ya da inotify açılamazsa klasör `--interval` saniyede bir taranır.
+
+Örnek:
+    python watch.py gelen -o cikti --recipe kampanya.json
+    python watch.py gelen -o cikti --format webp --target-kb 400 -j 4
+    python watch.py gelen -o cikti --once      # bir kez tara, bekleyenleri render et, çık
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+
+from constants import INSTAGRAM_SIZE, DEFAULT_SETTINGS
+from encoder import save_image, write_bytes
+from ingest import load_square
+from output_names import OutputNames
+from recipe import RecipeError, compile_plan, load_recipe, validate
+from square_cache import IMAGE_EXTS, file_hash
+
+MANIFEST_NAME = ".watch_manifest.json"
+MANIFEST_VERSION = 1
+SETTLE_S = 2.0      # son yazmadan bu kadar sn geçmemiş dosya hâlâ kopyalanıyor sayılır
+FLUSH_S = 5.0       # manifest en fazla bu sıklıkla diske yazılır
+
+# inotify olay maskeleri (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+
+# Her worker süreci ayarları bir kez alır ve plana derler (initializer)
+_worker_plan = None
+_worker_target_kb = None
+
+
+def settings_hash(settings: dict, ext: str, target_kb: float = None) -> str:
+    """Çıktıyı belirleyen her şeyin hash'i: plan aşamaları (etkisizler hariç), format ve hedef boyut."""
+    plan = compile_plan(settings, check=False)
+    payload = json.dumps([ext, target_kb, [[name, params] for name, params, _fn in plan.stages]],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def scan(root: str, recursive: bool = False, skip: str = None):
+    """(göreli yol, tam yol, stat) üretir; listeyi bellekte tutmaz. Gizli dosyalar ve `skip` klasörü atlanır."""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for e in it:
+                    if e.name.startswith("."):
+                        continue
+                    if e.is_dir(follow_symlinks=False):
+                        if recursive and os.path.abspath(e.path) != skip:
+                            stack.append(e.path)
+                    elif e.name.lower().endswith(IMAGE_EXTS) and e.is_file():
+                        try:
+                            st = e.stat()
+                        except OSError:
+                            continue    # tarama sırasında silindi
+                        yield os.path.relpath(e.path, root), e.path, st
+        except OSError:
+            continue
+
+
+class Manifest:
+    """
+    göreli yol -> {"size", "mtime_ns", "hash", "settings", "output"[, "error"]}.
+    Değişiklikler bellekte toplanır, flush() ile atomik yazılır (dosya başına tüm JSON yazılmaz).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        self._dirty = False
+        self._flushed = time.monotonic()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, rel: str):
+        return self.files.get(rel)
+
+    def put(self, rel: str, record: dict):
+        self.files[rel] = record
+        self._dirty = True
+
+    def drop(self, rel: str):
+        if self.files.pop(rel, None) is not None:
+            self._dirty = True
+
+    def flush(self, force: bool = False):
+        if not self._dirty or (not force and time.monotonic() - self._flushed < FLUSH_S):
+            return
+        text = json.dumps({"version": MANIFEST_VERSION, "files": self.files}, ensure_ascii=False)
+        write_bytes(self.path, text.encode("utf-8"))
+        self._dirty = False
+        self._flushed = time.monotonic()
+
+
+class Inotify:
+    """Klasör değişince uyandıran en küçük inotify sarmalayıcısı; olay ayrıntısı okunmaz, klasör yeniden taranır."""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._watched = set()
+
+    def add(self, folder: str):
+        if folder in self._watched:
+            return
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(folder), self.MASK) >= 0:
+            self._watched.add(folder)
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self._fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_inotify():
+    """Linux dışında ya da inotify açılamazsa None (tarama aralığına düşülür)."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return Inotify()
+    except (OSError, AttributeError):
+        return None
+
+
+def _init_worker(settings, target_kb):
+    # Ctrl+C yalnızca ana süreci durdursun; worker'lar elindeki dosyayı bitirip havuzla çıkar
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    global _worker_plan, _worker_target_kb
+    _worker_plan = compile_plan(settings, check=False)
+    _worker_target_kb = target_kb
+
+
+def _render_file(path: str, out_path: str, known_hash: str = None):
+    """
+    Önce içerik hash'lenir; known_hash ile aynıysa (yalnızca mtime değişmiş) render edilmez.
+    Çözme aynı yoldan yapılır (dosya az önce okunduğu için sayfa önbelleğinden gelir). (durum, hash, süre, hata) döndürür; durum "rendered"/"unchanged"/"failed".
+    """
+    t0 = time.perf_counter()
+    digest = None
+    try:
+        digest = file_hash(path)
+        if digest == known_hash:
+            return "unchanged", digest, time.perf_counter() - t0, None
+        img = load_square(path, size=INSTAGRAM_SIZE)
+        out = _worker_plan.run(img)
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        save_image(out, out_path, target_kb=_worker_target_kb)
+    except Exception as e:
+        return "failed", digest, time.perf_counter() - t0, str(e)
+    return "rendered", digest, time.perf_counter() - t0, None
+
+
+class Watcher:
+    """
+    Girdi klasörünü izler, yeni/değişen dosyaları bir ProcessPoolExecutor ile render eder.
+    Aynı anda en fazla `max_inflight` iş kuyruktadır ve tarama üreteçle yapılır; binlerce dosyalık
+    birikimde de bellek dosya başına küçük bir manifest kaydıyla sınırlı kalır.
+    """
+
+    def __init__(self, src: str, out_dir: str, settings: dict = None, recipe_path: str = None,
+                 ext: str = ".jpg", target_kb: float = None, workers: int = None, max_inflight: int = None,
+                 recursive: bool = False, interval: float = 2.0, settle: float = SETTLE_S,
+                 manifest_path: str = None, log=print):
+        self.src = os.path.abspath(src)
+        self.out_dir = os.path.abspath(out_dir)
+        self.recipe_path = recipe_path
+        self.ext = ext
+        self.target_kb = target_kb
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or self.workers * 2
+        self.recursive = recursive
+        self.interval = float(interval)
+        self.settle = float(settle)
+        self.log = log
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.manifest = Manifest(manifest_path or os.path.join(self.out_dir, MANIFEST_NAME))
+        self.stats = {"rendered": 0, "unchanged": 0, "failed": 0}
+
+        self._pool = None
+        self._pending = {}          # future -> (göreli yol, stat)
+        # Çıktı adı sahipliği: a.jpg ile a.png aynı çıktıya yazmasın. Sahiplik manifest'ten gelir,
+        # böylece hangi dosyanın düz adı aldığı yeniden başlatmada değişmez.
+        self._names = OutputNames(ext)
+        for rel, rec in self.manifest.files.items():
+            if rec.get("output"):
+                self._names.seed(rel, rec["output"])
+        self._stopped = False
+        self._recipe_mtime = None
+        self.settings = None
+        self.hash = None
+        if recipe_path:
+            self._reload_recipe()
+        else:
+            self._set_settings(settings if settings is not None else DEFAULT_SETTINGS)
+
+    def _set_settings(self, settings: dict):
+        settings = validate(settings)
+        new_hash = settings_hash(settings, self.ext, self.target_kb)
+        if new_hash != self.hash and self._pool is not None:
+            # Worker'lar planı initializer'da derledi; yeni ayarlar için havuz yeniden kurulur
+            self._drain(ALL_COMPLETED)
+            self._pool.shutdown()
+            self._pool = None
+        self.settings, self.hash = settings, new_hash
+
+    def _reload_recipe(self):
+        try:
+            mtime = os.stat(self.recipe_path).st_mtime_ns
+        except OSError as e:
+            if self.settings is None:
+                raise RecipeError(f"Tarif okunamadı: {e}") from e
+            return
+        if mtime == self._recipe_mtime:
+            return
+        self._recipe_mtime = mtime
+        try:
+            settings = load_recipe(self.recipe_path)
+        except RecipeError as e:
+            if self.settings is None:
+                raise
+            self.log(f"Tarif yüklenemedi, eski ayarlarla devam: {e}")
+            return
+        old = self.hash
+        self._set_settings(settings)
+        if old is not None and self.hash != old:
+            self.log("Tarif değişti: etkilenen çıktılar yeniden render edilecek")
+
+    def output_for(self, rel: str) -> str:
+        """Girdinin çıktı yolu (çıktı klasörüne göre); ad çakışmaları output_names.OutputNames ile çözülür."""
+        return self._names.get(rel)
+
+    def stop(self):
+        self._stopped = True
+
+    def _submit(self, rel: str, path: str, st, known_hash: str):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.settings, self.target_kb))
+        out_path = os.path.join(self.out_dir, self.output_for(rel))
+        fut = self._pool.submit(_render_file, path, out_path, known_hash)
+        self._pending[fut] = (rel, st)
+        if len(self._pending) >= self.max_inflight:
+            self._drain(FIRST_COMPLETED)
+
+    def _drain(self, return_when):
+        if not self._pending:
+            return
+        done, _ = wait(list(self._pending), return_when=return_when)
+        for fut in done:
+            rel, st = self._pending.pop(fut)
+            status, digest, secs, err = fut.result()
+            self.stats[status] += 1
+            record = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest,
+                      "settings": self.hash, "output": self.output_for(rel)}
+            if status == "failed":
+                # Dosya değişene (ya da ayarlar değişene) kadar yeniden denenmez
+                record["error"] = err
+                self.log(f"✗ {rel}  {err}")
+            elif status == "rendered":
+                self.log(f"✓ {rel}  {secs * 1000:.0f} ms")
+            self.manifest.put(rel, record)
+        self.manifest.flush()
+
+    def _needs_render(self, rel: str, st):
+        """(render gerekli mi, bilinen hash). Bilinen hash verilirse worker içerik aynıysa render etmez."""
+        rec = self.manifest.get(rel)
+        if rec is None:
+            return True, None
+        same_settings = rec.get("settings") == self.hash and rec.get("output") == self.output_for(rel)
+        output_ok = same_settings and (
+            "error" in rec or os.path.exists(os.path.join(self.out_dir, rec["output"])))
+        if rec.get("size") == st.st_size and rec.get("mtime_ns") == st.st_mtime_ns:
+            return not output_ok, None
+        # Boyut/mtime değişti: içerik aynıysa (ör. yeniden kopyalama) worker hash'e bakıp atlar
+        return True, rec.get("hash") if output_ok and "error" not in rec else None
+
+    def scan_once(self) -> bool:
+        """Bir tarama + render turu. Henüz yazılmakta olan (oturmamış) dosya kaldıysa True."""
+        if self.recipe_path:
+            self._reload_recipe()
+        seen = set()
+        unsettled = False
+        now = time.time()
+        for rel, path, st in scan(self.src, self.recursive, skip=self.out_dir):
+            if self._stopped:
+                break
+            seen.add(rel)
+            if now - st.st_mtime < self.settle:
+                unsettled = True
+                continue
+            needed, known_hash = self._needs_render(rel, st)
+            if needed:
+                self._submit(rel, path, st, known_hash)
+        self._drain(ALL_COMPLETED)
+        if not self._stopped:
+            # Girdiden silinen dosyaların kaydı düşer; çıktıları yerinde kalır
+            for rel in [r for r in self.manifest.files if r not in seen]:
+                self.manifest.drop(rel)
+                self._names.release(rel)
+        self.manifest.flush(force=True)
+        return unsettled
+
+    def _watch_dirs(self, notifier):
+        notifier.add(self.src)
+        if self.recursive:
+            for folder, dirs, _files in os.walk(self.src):
+                dirs[:] = [d for d in dirs if not d.startswith(".")
+                           and os.path.abspath(os.path.join(folder, d)) != self.out_dir]
+                for d in dirs:
+                    notifier.add(os.path.join(folder, d))
+
+    def run(self, once: bool = False):
+        notifier = None if once else open_inotify()
+        self.log(f"İzleniyor: {self.src} -> {self.out_dir}  ({'inotify' if notifier else f'{self.interval:g} sn tarama'})")
+        try:
+            while not self._stopped:
+                if notifier is not None:
+                    self._watch_dirs(notifier)
+                unsettled = self.scan_once()
+                if once and not unsettled:
+                    break
+                timeout = min(self.interval, self.settle) if unsettled else self.interval
+                if notifier is not None:
+                    # inotify'da aralık yalnızca güvenlik taraması (kaçan olay, tarif değişikliği) içindir
+                    timeout = timeout if unsettled or self.recipe_path else max(timeout, 60.0)
+                    notifier.wait(timeout)
+                else:
+                    time.sleep(timeout)
+        finally:
+            self._drain(ALL_COMPLETED)
+            self.manifest.flush(force=True)
+            if self._pool is not None:
+                self._pool.shutdown()
+            if notifier is not None:
+                notifier.close()
+        return self.stats
+
+
+def _terminate(_signum, _frame):
+    # SIGTERM de Ctrl+C gibi: beklemedeki select/sleep hemen kesilir, süren işler bitirilip manifest yazılır
+    raise KeyboardInterrupt
+
+
+def _parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Klasörü izler, gelen fotoğrafları Tk olmadan posta dönüştürür.")
+    p.add_argument("source", help="İzlenecek girdi klasörü")
+    p.add_argument("-o", "--out", required=True, help="Çıktı klasörü (manifest de buraya yazılır)")
+    p.add_argument("--recipe", default=None, metavar="DOSYA",
+                   help="Ayarlar bu tariften; dosya değişince yeniden yüklenir (varsayılan: arayüz varsayılanları)")
+    p.add_argument("-r", "--recursive", action="store_true", help="Alt klasörleri de izle")
+    p.add_argument("--format", choices=["jpg", "webp", "png"], default="jpg")
+    p.add_argument("--target-kb", type=float, default=None, metavar="KB",
+                   help="Her dosyayı bu boyutun altına sığdıracak en yüksek kaliteyi ara (jpg/webp)")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    p.add_argument("--max-inflight", type=int, default=None, help="Aynı anda kuyrukta bekleyen en fazla iş")
+    p.add_argument("--interval", type=float, default=2.0, help="Tarama aralığı (sn; inotify yoksa)")
+    p.add_argument("--settle", type=float, default=SETTLE_S,
+                   help="Son değişiklikten bu kadar sn geçmemiş dosyalar henüz yazılıyor sayılır")
+    p.add_argument("--manifest", default=None, metavar="DOSYA", help=f"Manifest yolu (varsayılan: <çıktı>/{MANIFEST_NAME})")
+    p.add_argument("--once", action="store_true", help="Bir kez tara, bekleyenleri render et ve çık")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if not os.path.isdir(args.source):
+        print(f"Hata: klasör yok: {args.source}", file=sys.stderr)
+        return 2
+    if os.path.abspath(args.out) == os.path.abspath(args.source):
+        print("Hata: çıktı klasörü girdi klasörüyle aynı olamaz", file=sys.stderr)
+        return 2
+    try:
+        watcher = Watcher(args.source, args.out, recipe_path=args.recipe, ext="." + args.format,
+                          target_kb=args.target_kb, workers=args.workers, max_inflight=args.max_inflight,
+                          recursive=args.recursive, interval=args.interval, settle=args.settle,
+                          manifest_path=args.manifest)
+    except RecipeError as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 2
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        stats = watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        watcher.stop()
+        stats = watcher.stats
+    print(f"\nToplam: {stats['rendered']} render, {stats['unchanged']} değişmemiş, {stats['failed']} hatalı")
+    return 1 if args.once and stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())